@@ -0,0 +1,383 @@
+"""
+Arena
+=====
+Many snakes on one board: every snake is steered by a player (turns
+queued with 'Snake.turn', e.g. from the keyboard or the network) or by
+a simple bot, and all of them share one OccupancyGrid.
+
+Collisions are resolved through the grid, no snake looks at bodies of
+other snakes: every snake moves first, then a head is dead if its cell
+is counted as taken more than once (apples and rocks aside). A head in
+a cell of its own body hits itself, otherwise it has hit another snake,
+two heads in one cell hit each other. So a tick costs O(snakes) however
+long the snakes are, and 1000 bots play on a large board at hundreds of
+ticks per second.
+
+A snake that dies respawns at once with length 1 in a random empty
+cell, the others play on. Apples and rocks live and respawn as in
+a single game. If there is no empty cell left for an eaten apple or
+a respawning snake, the board is filled and the round is over: every
+snake gets BOARD_FILLED and the arena starts anew.
+
+Usage:
+    python the_snake.py --snakes 200 --width 128 --height 128
+
+    # benchmark: ticks per second of a headless arena
+    python arena.py --snakes 1000 --width 256 --height 256
+"""
+
+import argparse
+import sys
+import time
+from random import Random
+
+from snake_core import (
+    APPLE_EATEN,
+    BOARD_FILLED,
+    DIRECTIONS,
+    HIT_SELF,
+    HIT_SNAKE,
+    START_SPEED,
+    Apple,
+    BoardIsFullError,
+    ObjectStore,
+    OccupancyGrid,
+    Rock,
+    Snake,
+    TickScheduler,
+    greedy_direction,
+)
+
+# Размер арены по умолчанию:
+ARENA_WIDTH, ARENA_HEIGHT = 128, 128
+
+# Змейки, яблоки и камни арены по умолчанию:
+ARENA_SNAKES = 100
+ARENA_APPLES = 50
+ARENA_ROCKS = 50
+
+
+class Arena:
+    """
+    Game of many snakes on one board with a deterministic tick
+    function. Looks like a GameState to the frontend: 'snake' is the
+    first snake, 'step' returns what happened to it.
+
+    args:
+        width, height (int): board size in cells
+        snakes (int): amount of snakes
+        players (int): amount of snakes steered by players, the first
+            ones; the rest are steered by bots
+        apples (int): amount of apples on the board simultaneously
+        rocks (int): amount of rocks on the board simultaneously
+        seed (int | None): seed of the arena`s random generator,
+            a random one is chosen and kept in 'seed' if not given
+        snake_cls, apple_cls, rock_cls: classes to create game objects
+            with, as for GameState
+    raises:
+        ValueError: if there are no snakes, more players than snakes or
+            not a single cell is left empty
+    """
+
+    def __init__(
+        self,
+        width=ARENA_WIDTH,
+        height=ARENA_HEIGHT,
+        snakes=ARENA_SNAKES,
+        players=1,
+        apples=ARENA_APPLES,
+        rocks=ARENA_ROCKS,
+        seed=None,
+        snake_cls=Snake,
+        apple_cls=Apple,
+        rock_cls=Rock,
+    ):
+        if snakes < 1 or not 0 <= players <= snakes:
+            raise ValueError(
+                f'An arena needs snakes and no more players than snakes, '
+                f'not {snakes} snakes and {players} players.'
+            )
+        if snakes + apples + rocks >= width * height:
+            raise ValueError(
+                f'{snakes} snakes, {apples} apples and {rocks} rocks '
+                f'leave no empty cell on a {width}x{height} arena.'
+            )
+        if seed is None:
+            seed = Random().getrandbits(64)
+        self.seed = seed
+        self.rng = Random(seed)
+        self.board = OccupancyGrid(width, height)
+        self.speed = START_SPEED
+        self.players = players
+        self.scheduler = TickScheduler()
+        self.profiler = None
+        self.snakes = []
+        for _ in range(snakes):
+            snake = snake_cls(
+                board=self.board,
+                rng=self.rng,
+                position=self.board.random_empty_cell(self.rng),
+            )
+            snake.direction = self.rng.choice(DIRECTIONS)
+            self.snakes.append(snake)
+        self.store = ObjectStore(self.board, self.rng, self.scheduler)
+        self.apples = [apple_cls(store=self.store) for _ in range(apples)]
+        self.rocks = [rock_cls(store=self.store) for _ in range(rocks)]
+        # Что случилось с каждой змейкой за последний тик:
+        self.events = [None] * snakes
+
+    @property
+    def ticks(self):
+        """Amount of ticks played."""
+        return self.scheduler.tick
+
+    @property
+    def snake(self):
+        """The first snake, the one a frontend follows."""
+        return self.snakes[0]
+
+    @property
+    def objects(self):
+        """All game objects: snakes, apples and rocks."""
+        return [*self.snakes, *self.apples, *self.rocks]
+
+    def step(self, actions=None):
+        """
+        Advances the arena by one tick:
+        1. bots choose directions, players` turns are taken from
+           'actions' and their queues
+        2. every snake moves
+        3. resets apples and rocks whose lifespan is over
+        4. snakes that are alone in an apple`s cell eat it
+        5. resolves collisions of all heads, dead snakes respawn
+        What happened to every snake is kept in 'events'. If an apple
+        or a snake found no empty cell to respawn in, every snake gets
+        BOARD_FILLED and the arena is reset.
+
+        args:
+            actions (dict | None): directions to turn to by numbers of
+                snakes steered by players
+        returns:
+            str | None: event of the first snake, see 'GameState.step'
+        """
+        snakes = self.snakes
+        for number, direction in (actions or {}).items():
+            snakes[number].turn(direction)
+        for number in range(self.players, len(snakes)):
+            direction = bot_direction(self, number)
+            if direction is not None:
+                snakes[number].turn(direction)
+        for snake in snakes:
+            snake.update_direction()
+            snake.move()
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.lap('move')
+
+        self.scheduler.advance()
+        if profiler is not None:
+            profiler.lap('update_life')
+
+        try:
+            self._eat_apples()
+            self._resolve_collisions()
+        except BoardIsFullError:
+            # Поле заполнено - раунд окончен для всех змеек.
+            self.reset()
+            self.events[:] = [BOARD_FILLED] * len(snakes)
+        if profiler is not None:
+            profiler.lap('collisions')
+        return self.events[0]
+
+    def _eat_apples(self):
+        """Snakes grow from apples whose cell they have alone."""
+        events = self.events
+        cells = self.board.cells
+        items = self.board.items
+        for number, snake in enumerate(self.snakes):
+            head = snake.positions[0]
+            item = items.get(head)
+            # В клетке только голова и яблоко:
+            if (
+                item is not None
+                and item.collision_event == APPLE_EATEN
+                and cells[head] == 2
+            ):
+                snake.grow()
+                item.reset()
+                events[number] = APPLE_EATEN
+            else:
+                events[number] = None
+
+    def _resolve_collisions(self):
+        """
+        Finds dead heads by the counters of the grid and heads that
+        swapped cells, respawns their snakes after all of them are
+        found, so the order of snakes does not matter.
+        """
+        events = self.events
+        cells = self.board.cells
+        items = self.board.items
+        crossed = self._crossed_heads()
+        dead = []
+        for number, snake in enumerate(self.snakes):
+            head = snake.positions[0]
+            item = items.get(head)
+            if item is not None and item.collision_event != APPLE_EATEN:
+                events[number] = item.collision_event
+            elif cells[head] - (item is not None) > 1:
+                events[number] = (
+                    HIT_SELF if snake.is_hitting_itself() else HIT_SNAKE
+                )
+            elif number in crossed:
+                events[number] = HIT_SNAKE
+            else:
+                continue
+            dead.append(snake)
+        for snake in dead:
+            self.respawn(snake)
+
+    def _crossed_heads(self):
+        """
+        Numbers of snakes whose heads swapped cells: each head is in
+        the cell the other one has left. A snake of length 1 releases
+        the cell its head leaves, so if it is one of the two, the grid
+        counters do not see the heads passing each other. Two longer
+        snakes are both caught by the counters, each head is in the
+        neck of the other.
+
+        returns:
+            set: numbers of snakes
+        """
+        snakes = self.snakes
+        # Клетки, которые покинули головы змеек длины 1:
+        left_by = {
+            snake.last: number
+            for number, snake in enumerate(snakes)
+            if len(snake.positions) == 1
+        }
+        crossed = set()
+        if not left_by:
+            return crossed
+        for number, snake in enumerate(snakes):
+            positions = snake.positions
+            other = left_by.get(positions[0])
+            if other is None or other == number:
+                continue
+            previous = positions[1] if len(positions) > 1 else snake.last
+            if previous == snakes[other].positions[0]:
+                crossed.update((number, other))
+        return crossed
+
+    def respawn(self, snake):
+        """
+        Starts a snake anew with length 1 in a random empty cell.
+
+        args:
+            snake (Snake): snake of the arena
+        returns:
+            None
+        raises:
+            BoardIsFullError: if every cell is taken
+        """
+        snake.position = self.board.random_empty_cell(self.rng)
+        snake.reset()
+        snake.direction = self.rng.choice(DIRECTIONS)
+
+    def reset(self):
+        """
+        Starts a new round: every snake respawns with length 1, apples
+        and rocks move to new cells with new lifespans. Does not fail,
+        an arena always has an empty cell for a respawning snake.
+        """
+        for snake in self.snakes:
+            snake.reset()
+        for snake in self.snakes:
+            self.respawn(snake)
+        for obj in (*self.apples, *self.rocks):
+            obj.reset()
+
+
+def bot_direction(arena, number):
+    """
+    Steers a bot towards its apple (every bot is given one of the
+    apples by its number), see 'snake_core.greedy_direction'.
+
+    args:
+        arena (Arena): arena of the bot
+        number (int): number of the bot`s snake
+    returns:
+        tuple | None: direction to turn to, None to go on as is
+    """
+    snake = arena.snakes[number]
+    head = snake.positions[0]
+    if arena.apples:
+        target = arena.apples[number % len(arena.apples)].position
+    else:
+        target = head
+    return greedy_direction(arena.board, head, snake.direction, target)
+
+
+def benchmark(ticks, **arena_kwargs):
+    """
+    Plays a headless arena of bots.
+
+    args:
+        ticks (int): amount of ticks to play
+        arena_kwargs: arguments passed to Arena
+    returns:
+        dict: ticks per second and counters of the arena
+    """
+    arena = Arena(players=0, **arena_kwargs)
+    events = {}
+    started = time.perf_counter_ns()
+    for _ in range(ticks):
+        arena.step()
+        for event in arena.events:
+            if event is not None:
+                events[event] = events.get(event, 0) + 1
+    elapsed_ns = time.perf_counter_ns() - started
+    return {
+        'ticks_per_s': ticks / elapsed_ns * 1e9,
+        'us_per_tick': elapsed_ns / ticks / 1000,
+        'best_length': max(snake.length for snake in arena.snakes),
+        **events,
+    }
+
+
+def parse_args(argv=None):
+    """Parses command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark of a Snake arena played by bots.'
+    )
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--snakes', type=int, default=1000)
+    parser.add_argument('--width', type=int, default=256)
+    parser.add_argument('--height', type=int, default=256)
+    parser.add_argument('--apples', type=int, default=500)
+    parser.add_argument('--rocks', type=int, default=ARENA_ROCKS)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs the benchmark and prints its results."""
+    args = parse_args(argv)
+    result = benchmark(
+        args.ticks,
+        width=args.width,
+        height=args.height,
+        snakes=args.snakes,
+        apples=args.apples,
+        rocks=args.rocks,
+        seed=args.seed,
+    )
+    print(' '.join(
+        f'{name}={value:.1f}' if isinstance(value, float)
+        else f'{name}={value}'
+        for name, value in result.items()
+    ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
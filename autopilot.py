@@ -0,0 +1,309 @@
+"""
+Autopilot
+=========
+Computer player: steers a snake to the apple along the shortest path
+over the wrapping board, going around rocks and the snake`s body.
+
+A path is searched with A* (wrapped Manhattan distance to the apple as
+the heuristic) once per apple and is followed tick after tick. Areas
+of the board kept by 'fields.py' tell in O(1) whether the apple can be
+reached at all, so a hopeless search never floods the board. A path
+is only searched anew when the apple moves (is eaten or expires) or when
+the snake is not where the path expected it, e.g. after a game over.
+When the next cell of the path turns out to be taken (a rock has
+respawned there or the body is in the way) the path is repaired: a
+detour is searched from the head to the nearest free cell of the rest
+of the path and spliced in, the rest is kept.
+
+If the apple can`t be reached the snake heads for the neighbour cell
+with the largest reachable area to survive until a path opens up.
+
+Usage:
+    python the_snake.py --autopilot
+    python tournament.py --policy autopilot
+
+    # benchmark: decisions per second of a headless game
+    python autopilot.py --ticks 100000 --width 64 --height 64
+"""
+
+import argparse
+import sys
+import time
+from collections import deque
+from heapq import heappop, heappush
+from weakref import WeakKeyDictionary
+
+from fields import BoardFields
+from snake_core import (
+    APPLE_EATEN,
+    DIRECTIONS,
+    GAME_OVER_EVENTS,
+    GRID_HEIGHT,
+    GRID_WIDTH,
+    OPPOSITE,
+    ROCKS_GENERATED,
+    GameState,
+)
+
+
+class Autopilot:
+    """
+    Steers the snake of a game, see the module description.
+    Follows the board with BoardFields, so no other BoardFields may
+    follow the same board.
+
+    args:
+        game_state (GameState): game to play
+
+    Counters 'decisions', 'searches' (full path searches), 'repairs'
+    (detours spliced into a path) and 'stuck' (ticks without a path)
+    show how much work was done.
+    """
+
+    def __init__(self, game_state):
+        self.game_state = game_state
+        self.board = game_state.board
+        self.fields = BoardFields(game_state)
+        # Путь к яблоку в обратном порядке: path[-1] - следующая клетка:
+        self.path = []
+        self.target = None
+        self.expected_head = None
+        self.decisions = 0
+        self.searches = 0
+        self.repairs = 0
+        self.stuck = 0
+
+    def steer(self):
+        """Queues a turn for the next tick, as a player would."""
+        direction = self.decide()
+        if direction is not None:
+            self.game_state.snake.turn(direction)
+
+    def decide(self):
+        """
+        Chooses a direction for the next tick.
+
+        args:
+            None
+        returns:
+            tuple | None: direction to turn to, None to go on as is
+        """
+        self.decisions += 1
+        snake = self.game_state.snake
+        head = snake.positions[0]
+        apple = self.game_state.apple.position
+        if apple != self.target or head != self.expected_head:
+            self._search_apple(head, apple)
+        elif self.path and self._is_blocked(self.path[-1]):
+            self._repair(head)
+        if not self.path:
+            self.stuck += 1
+            self.expected_head = None
+            return self._survive(head)
+        cell = self.path.pop()
+        self.expected_head = cell
+        return DIRECTIONS[self.board.neighbours[head].index(cell)]
+
+    def _is_blocked(self, cell):
+        return self.board.cells[cell] and cell != self.target
+
+    def _first_steps(self, head):
+        """Neighbours of the head the snake can move to now."""
+        snake = self.game_state.snake
+        back = -1
+        if len(snake.positions) == 1:
+            back = OPPOSITE[DIRECTIONS.index(snake.direction)]
+        return [
+            cell
+            for number, cell in enumerate(self.board.neighbours[head])
+            if number != back and not self._is_blocked(cell)
+        ]
+
+    def _search_apple(self, head, apple):
+        """A* from the head to the apple, the path replaces the old one."""
+        self.target = apple
+        self.path = []
+        if not self.fields.reaches_apple(head):
+            return
+        self.searches += 1
+        board = self.board
+        width, height = board.width, board.height
+        apple_row, apple_column = divmod(apple, width)
+
+        def estimate(cell):
+            row, column = divmod(cell, width)
+            dx = abs(column - apple_column)
+            dy = abs(row - apple_row)
+            return min(dx, width - dx) + min(dy, height - dy)
+
+        came_from = {head: None}
+        distances = {head: 0}
+        queue = []
+        for cell in self._first_steps(head):
+            came_from[cell] = head
+            distances[cell] = 1
+            heappush(queue, (1 + estimate(cell), -1, cell))
+        neighbours = board.neighbours
+        cells = board.cells
+        while queue:
+            _, distance, cell = heappop(queue)
+            if cell == apple:
+                self.path = self._trace(came_from, cell, head)
+                return
+            if -distance != distances[cell]:
+                # Клетка уже была раскрыта с меньшим расстоянием.
+                continue
+            distance = 1 - distance
+            for neighbour in neighbours[cell]:
+                if (
+                    cells[neighbour] and neighbour != apple
+                    or distances.get(neighbour, distance + 1) <= distance
+                ):
+                    continue
+                came_from[neighbour] = cell
+                distances[neighbour] = distance
+                heappush(
+                    queue,
+                    (distance + estimate(neighbour), -distance, neighbour),
+                )
+
+    def _repair(self, head):
+        """
+        Replaces the taken start of the path with a detour to the
+        nearest free cell of the rest of the path (breadth-first).
+        Searches for a new path if there is none.
+        """
+        self.repairs += 1
+        path = self.path
+        rejoin = {
+            cell: number
+            for number, cell in enumerate(path)
+            if not self._is_blocked(cell)
+        }
+        came_from = {head: None}
+        queue = deque()
+        for cell in self._first_steps(head):
+            came_from[cell] = head
+            queue.append(cell)
+        neighbours = self.board.neighbours
+        cells = self.board.cells
+        target = self.target
+        while queue:
+            cell = queue.popleft()
+            number = rejoin.get(cell)
+            if number is not None:
+                self.path = path[:number] + self._trace(came_from, cell, head)
+                return
+            for neighbour in neighbours[cell]:
+                if neighbour not in came_from and (
+                    not cells[neighbour] or neighbour == target
+                ):
+                    came_from[neighbour] = cell
+                    queue.append(neighbour)
+        self._search_apple(head, self.target)
+
+    @staticmethod
+    def _trace(came_from, cell, head):
+        """Path from a found cell back to the head, the head excluded."""
+        path = []
+        while cell != head:
+            path.append(cell)
+            cell = came_from[cell]
+        return path
+
+    def _survive(self, head):
+        """Direction to the free neighbour with the most room around."""
+        best_direction = None
+        best_area = 0
+        neighbours = self.board.neighbours
+        for cell in self._first_steps(head):
+            area = self.fields.area(cell)
+            if area > best_area:
+                best_area = area
+                best_direction = DIRECTIONS[neighbours[head].index(cell)]
+        return best_direction
+
+
+# Автопилоты игр турнира (см. 'autopilot_policy'):
+_autopilots = WeakKeyDictionary()
+
+
+def autopilot_policy(game_state, rng):
+    """Policy of 'tournament.py': steers with an autopilot per game."""
+    autopilot = _autopilots.get(game_state)
+    if autopilot is None:
+        autopilot = _autopilots[game_state] = Autopilot(game_state)
+    return autopilot.decide()
+
+
+def benchmark(ticks, **state_kwargs):
+    """
+    Plays a headless game steered by the autopilot.
+
+    args:
+        ticks (int): amount of ticks to play
+        state_kwargs: arguments passed to GameState
+    returns:
+        dict: decisions per second and counters of the game
+    """
+    game_state = GameState(**state_kwargs)
+    autopilot = Autopilot(game_state)
+    step = game_state.step
+    apples = deaths = best_length = 0
+    thinking_ns = 0
+    started = time.perf_counter_ns()
+    for _ in range(ticks):
+        decided = time.perf_counter_ns()
+        direction = autopilot.decide()
+        thinking_ns += time.perf_counter_ns() - decided
+        event = step(direction)
+        if event == APPLE_EATEN:
+            apples += 1
+            best_length = max(best_length, game_state.snake.length)
+        elif event in GAME_OVER_EVENTS:
+            deaths += 1
+    elapsed_ns = time.perf_counter_ns() - started
+    return {
+        'decisions_per_s': ticks / thinking_ns * 1e9,
+        'ticks_per_s': ticks / elapsed_ns * 1e9,
+        'apples': apples,
+        'deaths': deaths,
+        'best_length': best_length,
+        'searches': autopilot.searches,
+        'repairs': autopilot.repairs,
+        'stuck': autopilot.stuck,
+    }
+
+
+def parse_args(argv=None):
+    """Parses command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the Snake autopilot.'
+    )
+    parser.add_argument('--ticks', type=int, default=100_000)
+    parser.add_argument('--width', type=int, default=GRID_WIDTH)
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT)
+    parser.add_argument('--rocks', type=int, default=ROCKS_GENERATED)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs the benchmark and prints its results."""
+    args = parse_args(argv)
+    result = benchmark(
+        args.ticks,
+        width=args.width,
+        height=args.height,
+        rocks=args.rocks,
+        seed=args.seed,
+    )
+    print(' '.join(
+        f'{name}={value:.0f}' if isinstance(value, float)
+        else f'{name}={value}'
+        for name, value in result.items()
+    ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Startup benchmark
+=================
+Measures how long it takes to import game modules in a fresh interpreter
+and checks that importing them does not open a window.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 20
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from time import perf_counter
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MODULES = ('snake_core', 'snake_batch', 'tournament', 'the_snake')
+
+# Код, который выполняется в отдельном интерпретаторе для каждого замера:
+PROBE = '''
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+pygame = sys.modules.get('pygame')
+display = bool(pygame and pygame.display.get_init())
+print(elapsed, display)
+'''
+
+
+def measure(module, runs):
+    """
+    Imports a module in 'runs' fresh interpreters.
+
+    args:
+        module (str): name of a module to import
+        runs (int): amount of interpreters to start
+    returns:
+        dict: import and interpreter wall times in ms, display flag
+    """
+    import_times = []
+    process_times = []
+    display_opened = False
+    for _ in range(runs):
+        started = perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module)],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        process_times.append((perf_counter() - started) * 1000)
+        import_times.append(float(output[0]) * 1000)
+        display_opened |= output[1] == 'True'
+    return {
+        'module': module,
+        'import_ms_median': statistics.median(import_times),
+        'import_ms_min': min(import_times),
+        'process_ms_median': statistics.median(process_times),
+        'display_opened': display_opened,
+    }
+
+
+def main(argv=None):
+    """Runs the benchmark and prints a table of results."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--json', type=Path, help='file to save results to')
+    args = parser.parse_args(argv)
+
+    results = [measure(module, args.runs) for module in MODULES]
+    print(f'{"module":<12} {"import, ms":>11} {"process, ms":>12}  window')
+    for result in results:
+        print(
+            f'{result["module"]:<12} {result["import_ms_median"]:>11.1f} '
+            f'{result["process_ms_median"]:>12.1f}  '
+            f'{"opened" if result["display_opened"] else "no"}'
+        )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return 1 if any(result['display_opened'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
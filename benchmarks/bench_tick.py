@@ -0,0 +1,352 @@
+"""
+Tick pipeline benchmarks
+========================
+Measures cost of every stage of a game tick for different board fills:
+snake length, amount of rocks and board size.
+
+Benchmarks:
+    move       - Snake.move
+    collision  - GameState.check_collisions
+    randomize  - randomize_position of a rock
+    life       - lifespan updates of objects due at a tick
+    draw       - drawing objects changed by a tick and updating the
+                 display (a frame), the tick itself is not timed
+    redraw     - drawing every cell in the camera`s view from scratch
+    observe    - cell tensor of a game for agents (observation.py)
+    tick       - GameState.step, the snake is steered away from obstacles
+
+Usage:
+    python benchmarks/bench_tick.py --grids 32x24,128x128 --json base.json
+    python benchmarks/bench_tick.py --grids 32x24,128x128 --compare base.json
+
+Results are saved as JSON, a previous result file can be given to
+'--compare' to print a ratio for every benchmark.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+from pathlib import Path
+from time import perf_counter_ns
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from snake_core import (  # noqa: E402
+    DIRECTIONS,
+    DOWN,
+    GAME_OVER_EVENTS,
+    RIGHT,
+    GameState,
+    Rock,
+)
+
+BENCHMARKS = (
+    'move', 'collision', 'randomize', 'life', 'draw', 'redraw', 'observe',
+    'tick',
+)
+
+# Сколько раз повторять каждый замер (берется лучший результат):
+REPEATS = 5
+
+
+def build_game(width, height, rocks, length, seed=0, **state_kwargs):
+    """
+    Creates a game with a snake of given length laid out row by row
+    and rocks placed at random empty cells.
+
+    args:
+        width, height (int): board size in cells
+        rocks (int): amount of rocks
+        length (int): length of the snake
+        seed (int): seed of the game
+        state_kwargs: classes of game objects for GameState
+    returns:
+        GameState
+    """
+    game_state = GameState(
+        width=width, height=height, rocks=0, seed=seed, **state_kwargs
+    )
+    snake = game_state.snake
+    for step in range(1, length):
+        snake.direction = DOWN if step % width == 0 else RIGHT
+        snake.move()
+        snake.grow()
+    snake.direction = RIGHT
+    game_state.apple.reset()
+    rock_cls = state_kwargs.get('rock_cls', Rock)
+    game_state.rocks = [
+        rock_cls(store=game_state.store) for _ in range(rocks)
+    ]
+    return game_state
+
+
+def avoid_obstacles(game_state):
+    """Cheap controller: turns if the next cell is taken."""
+    snake = game_state.snake
+    board = game_state.board
+    head = snake.positions[0]
+    if board.neighbour(head, snake.direction) not in board:
+        return None
+    backwards = (-snake.direction[0], -snake.direction[1])
+    for direction in DIRECTIONS:
+        if direction == backwards:
+            continue
+        cell = board.neighbour(head, direction)
+        if cell not in board or cell == game_state.apple.position:
+            return direction
+    return None
+
+
+def measure(operation, number):
+    """
+    Runs an operation 'number' times in REPEATS rounds.
+
+    args:
+        operation (callable): function without arguments
+        number (int): calls per round
+    returns:
+        float: best time of a single call in nanoseconds
+    """
+    best = None
+    for _ in range(REPEATS):
+        started = perf_counter_ns()
+        for _ in range(number):
+            operation()
+        elapsed = (perf_counter_ns() - started) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_apart(prepare, operation, number):
+    """
+    Same as 'measure', but calls 'prepare' before every call of the
+    operation and leaves it out of the time, e.g. to advance a game
+    before drawing a frame.
+
+    args:
+        prepare (callable): function without arguments, not timed
+        operation (callable): function without arguments
+        number (int): calls per round
+    returns:
+        float: best time of a single call in nanoseconds
+    """
+    best = None
+    for _ in range(REPEATS):
+        elapsed = 0
+        for _ in range(number):
+            prepare()
+            started = perf_counter_ns()
+            operation()
+            elapsed += perf_counter_ns() - started
+        elapsed /= number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_move(width, height, rocks, length, number):
+    """Snake.move on a filled board."""
+    return measure(build_game(width, height, rocks, length).snake.move,
+                   number)
+
+
+def bench_collision(width, height, rocks, length, number):
+    """Collision check of a snake`s head against all objects."""
+    return measure(
+        build_game(width, height, rocks, length).check_collisions, number
+    )
+
+
+def bench_randomize(width, height, rocks, length, number):
+    """Moving an object to a random empty cell."""
+    game_state = build_game(width, height, max(rocks, 1), length)
+    return measure(game_state.rocks[0].randomize_position, number)
+
+
+def bench_life(width, height, rocks, length, number):
+    """Lifespan updates of all objects during one tick."""
+    return measure(
+        build_game(width, height, rocks, length).scheduler.advance, number
+    )
+
+
+def build_frontend_game(width, height, rocks, length):
+    """Game drawn by the pygame frontend with camera on the snake."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import the_snake
+
+    the_snake.camera = the_snake.Camera(width, height)
+    the_snake.init_display()
+    game_state = build_game(
+        width, height, rocks, length,
+        snake_cls=the_snake.Snake,
+        apple_cls=the_snake.Apple,
+        rock_cls=the_snake.Rock,
+    )
+    the_snake.camera.center_on(game_state.snake.get_head_position())
+    the_snake.redraw_screen(game_state)
+    return the_snake, game_state
+
+
+def bench_draw(width, height, rocks, length, number):
+    """One frame of the pygame frontend after a tick of the game."""
+    the_snake, game_state = build_frontend_game(width, height, rocks, length)
+
+    def advance():
+        event = game_state.step(avoid_obstacles(game_state))
+        if (
+            the_snake.camera.follow(game_state.snake.get_head_position())
+            or event in GAME_OVER_EVENTS
+        ):
+            the_snake.redraw_screen(game_state)
+
+    def draw():
+        the_snake.draw_objects(game_state)
+        the_snake.update_display()
+
+    return measure_apart(advance, draw, number)
+
+
+def bench_redraw(width, height, rocks, length, number):
+    """Full redraw of the window, done on camera moves and game over."""
+    the_snake, game_state = build_frontend_game(width, height, rocks, length)
+    return measure(lambda: the_snake.redraw_screen(game_state), number)
+
+
+def bench_observe(width, height, rocks, length, number):
+    """Cell tensor of a game written into a preallocated array."""
+    import numpy as np
+    from observation import CHANNELS, cell_tensor
+
+    game_state = build_game(width, height, rocks, length)
+    out = np.empty((CHANNELS, height, width), dtype=np.uint8)
+    return measure(lambda: cell_tensor(game_state, out), number)
+
+
+def bench_tick(width, height, rocks, length, number):
+    """Full GameState.step with a controller avoiding obstacles."""
+    game_state = build_game(width, height, rocks, length)
+    step = game_state.step
+
+    def tick():
+        if step(avoid_obstacles(game_state)) in GAME_OVER_EVENTS:
+            tick.deaths += 1
+
+    tick.deaths = 0
+    result = measure(tick, number)
+    if tick.deaths:
+        print(f'  tick: snake died {tick.deaths} times', file=sys.stderr)
+    return result
+
+
+def parse_sizes(value):
+    """Parses '32x24,128x128' into [(32, 24), (128, 128)]."""
+    return [
+        tuple(int(side) for side in size.split('x'))
+        for size in value.split(',')
+    ]
+
+
+def parse_ints(value):
+    """Parses '1,10,100' into [1, 10, 100]."""
+    return [int(number) for number in value.split(',')]
+
+
+def run(grids, rocks_amounts, lengths, benchmarks, number):
+    """
+    Runs benchmarks for every combination of parameters.
+
+    returns:
+        list[dict]: one result per benchmark and combination
+    """
+    results = []
+    for width, height in grids:
+        for rocks in rocks_amounts:
+            for length in lengths:
+                if length + rocks + 1 > width * height:
+                    continue
+                for name in benchmarks:
+                    ns_per_op = globals()[f'bench_{name}'](
+                        width, height, rocks, length, number
+                    )
+                    if ns_per_op is None:
+                        continue
+                    result = {
+                        'benchmark': name,
+                        'width': width,
+                        'height': height,
+                        'rocks': rocks,
+                        'length': length,
+                        'ns_per_op': round(ns_per_op, 1),
+                    }
+                    results.append(result)
+                    print(format_result(result), flush=True)
+    return results
+
+
+def result_key(result):
+    """Parameters that identify a result."""
+    return (result['benchmark'], result['width'], result['height'],
+            result['rocks'], result['length'])
+
+
+def format_result(result, baseline=None):
+    """One line of the results table."""
+    line = (
+        f'{result["benchmark"]:<10} {result["width"]:>5}x'
+        f'{result["height"]:<5} rocks={result["rocks"]:<6} '
+        f'length={result["length"]:<7} {result["ns_per_op"]:>12.1f} ns'
+    )
+    if baseline:
+        line += f'  x{result["ns_per_op"] / baseline["ns_per_op"]:.2f}'
+    return line
+
+
+def main(argv=None):
+    """Runs benchmarks, saves and compares results."""
+    parser = argparse.ArgumentParser(
+        description='Benchmarks of the Snake tick pipeline.'
+    )
+    parser.add_argument('--grids', type=parse_sizes, default='32x24')
+    parser.add_argument('--rocks', type=parse_ints, default='5,50')
+    parser.add_argument('--lengths', type=parse_ints, default='1,100,500')
+    parser.add_argument(
+        '--benchmarks', type=lambda value: value.split(','),
+        default=','.join(BENCHMARKS),
+    )
+    parser.add_argument(
+        '--number', type=int, default=2000, help='calls per measurement'
+    )
+    parser.add_argument('--json', type=Path, help='file to save results to')
+    parser.add_argument(
+        '--compare', type=Path,
+        help='previous results, prints slowdown ratio for each benchmark',
+    )
+    args = parser.parse_args(argv)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(sorted(unknown))}')
+
+    results = run(
+        args.grids, args.rocks, args.lengths, args.benchmarks, args.number
+    )
+    if args.json:
+        args.json.write_text(json.dumps({
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results,
+        }, indent=2))
+    if args.compare:
+        baseline = {
+            result_key(result): result
+            for result in json.loads(args.compare.read_text())['results']
+        }
+        print(f'\nCompared to {args.compare}:')
+        for result in results:
+            print(format_result(result, baseline.get(result_key(result))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Network client
+==============
+Thin pygame client of the game server ('server.py'): sends key presses
+and draws the game from snapshots and deltas the server streams. No
+game rules run here, so it only redraws cells a delta has changed.
+
+Usage:
+    python client.py --host 127.0.0.1 --port 8765 --room lobby
+
+The first player in a room controls the snake, later ones watch.
+Controls are the same as in the local game, ESC quits.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# pygame печатает приветствие при импорте - отключаем его:
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame as pg  # noqa: E402
+
+import the_snake  # noqa: E402
+from protocol import HELLO, TURN, RemoteGame, frame, read_message  # noqa
+from server import DEFAULT_HOST, DEFAULT_PORT  # noqa: E402
+from snake_core import DIRECTIONS  # noqa: E402
+from the_snake import (  # noqa: E402
+    APPLE_COLOR,
+    BLINK_COLOR,
+    BOARD_BACKGROUND_COLOR,
+    BORDER_COLOR,
+    MOVEMENT_KEYS,
+    RENDER_FPS,
+    ROCK_COLOR,
+    SNAKE_COLOR,
+)
+
+# Цвета объектов по их виду (см. protocol.KINDS):
+KIND_COLORS = (APPLE_COLOR, ROCK_COLOR)
+
+
+def draw_cell(game, cell, snake_cells=()):
+    """
+    Queues drawing of a cell by what is in it now.
+
+    args:
+        game (RemoteGame): game to draw
+        cell (int): cell index
+        snake_cells (set): cells of the snake, the head is always known
+    returns:
+        None
+    """
+    pixels = the_snake.cell_to_pixels(cell)
+    if pixels is None:
+        return
+    obj = game.objects.get(cell)
+    if obj is not None:
+        color = KIND_COLORS[obj.kind]
+        if game.is_blinked(cell):
+            color = BLINK_COLOR
+        border_color = BORDER_COLOR
+    elif cell == game.snake[0] or cell in snake_cells:
+        color, border_color = SNAKE_COLOR, BORDER_COLOR
+    else:
+        color = border_color = BOARD_BACKGROUND_COLOR
+    the_snake.pending_blits.append(
+        (the_snake.tile_cache.get(color, border_color), pixels)
+    )
+
+
+def redraw(game):
+    """
+    Clears the screen and draws every cell in the camera`s view.
+    The whole window is updated: the cleared cells have to be pushed
+    too, not only the drawn ones.
+    """
+    the_snake.screen.fill(BOARD_BACKGROUND_COLOR)
+    snake_cells = set(game.snake)
+    for cell in the_snake.camera.visible_cells():
+        if cell in snake_cells or cell in game.objects:
+            draw_cell(game, cell, snake_cells)
+    the_snake.flush_tiles()
+    pg.display.update()
+
+
+async def receive(reader, game):
+    """Applies server messages to a game and draws what they changed."""
+    while True:
+        message_type, payload = await read_message(reader)
+        _, changed = game.apply(message_type, payload)
+        if changed is None or the_snake.camera.follow(game.snake[0]):
+            redraw(game)
+            continue
+        for cell in changed:
+            draw_cell(game, cell)
+
+
+def send_turns(writer):
+    """
+    Sends turns for pressed arrow keys.
+
+    returns:
+        bool: False if the window was closed or ESC pressed
+    """
+    for event in pg.event.get():
+        if event.type == pg.QUIT:
+            return False
+        if event.type != pg.KEYDOWN:
+            continue
+        if event.key == pg.K_ESCAPE:
+            return False
+        direction = MOVEMENT_KEYS.get(event.key)
+        if direction:
+            writer.write(frame(TURN, bytes((DIRECTIONS.index(direction),))))
+    return True
+
+
+async def run_client(host, port, room):
+    """
+    Connects to a server, joins a room and plays until quit.
+
+    args:
+        host (str): address of a server
+        port (int): port of a server
+        room (str): room to join, empty for a new one
+    returns:
+        None
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(frame(HELLO, room.encode()))
+    game = RemoteGame()
+    game.apply(*await read_message(reader))
+
+    the_snake.camera = the_snake.Camera(game.width, game.height)
+    the_snake.init_display()
+    the_snake.camera.center_on(game.snake[0])
+    redraw(game)
+    receiver = asyncio.create_task(receive(reader, game))
+    try:
+        while send_turns(writer) and not receiver.done():
+            the_snake.update_display()
+            await asyncio.sleep(1 / RENDER_FPS)
+        if receiver.done():
+            receiver.result()
+    finally:
+        receiver.cancel()
+        writer.close()
+        pg.quit()
+
+
+def main(argv=None):
+    """Parses arguments and runs the client."""
+    parser = argparse.ArgumentParser(description='Multiplayer Snake client.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        '--room', default='', help='room to join, a new one by default'
+    )
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run_client(args.host, args.port, args.room))
+    except (ConnectionError, asyncio.IncompleteReadError) as error:
+        print(f'connection lost: {error}', file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
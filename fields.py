@@ -0,0 +1,468 @@
+"""
+Board fields
+============
+Maps of a board that bots ask about every tick, kept up to date
+instead of being flood-filled again and again:
+
+- distance field: length of the shortest path from every cell to the
+  apple over the wrapping board, around rocks and the snake;
+- reachable areas: free cells split into connected areas with their
+  sizes.
+
+Both are built once and then updated only by cells that changed: the
+board logs every cell that becomes taken or empty ('changes' of
+OccupancyGrid), which is a cell the head enters and one the tail
+leaves at a usual tick, plus cells of apples and rocks that respawned.
+A freed cell shortens paths around it and joins areas; a taken one
+makes only the cells whose every shortest path went through it look
+for a new one, and splits an area only if its free neighbours are not
+connected around it; then only the smaller part is relabeled. The
+distance field is built anew after the apple moves, but only when a
+distance is asked for: areas alone tell if the apple can be reached.
+
+Queries ('distance', 'direction_to_apple', 'area', 'reaches_apple')
+cost O(1) and work for cells taken by the snake`s head too, e.g.:
+
+    fields = BoardFields(game_state)
+    fields.distance_to_apple()   # from the head, UNREACHABLE if none
+    fields.reachable_area()      # free cells the head can get to
+
+Only one BoardFields can follow a board at a time, as it owns the log.
+After a board is changed other way (e.g. 'snapshot.restore_state')
+'rebuild' has to be called.
+"""
+
+from collections import deque
+from heapq import heappop, heappush
+
+from snake_core import DIRECTIONS, DOWN, LEFT, RIGHT, UP
+
+# Расстояние от клеток, из которых до яблока не добраться:
+UNREACHABLE = -1
+
+# Номера направлений в соседях клетки (см. OccupancyGrid.neighbours):
+_LEFT, _RIGHT, _UP, _DOWN = (
+    DIRECTIONS.index(direction) for direction in (LEFT, RIGHT, UP, DOWN)
+)
+
+
+class BoardFields:
+    """
+    Distance field to the apple and reachable areas of a game`s board,
+    see the module description. Taken cells are walls, except the
+    apple`s one.
+
+    args:
+        game_state (GameState): game to follow
+    """
+
+    def __init__(self, game_state):
+        self.game_state = game_state
+        self.board = game_state.board
+        self.board.changes = []
+        self.rebuild()
+
+    def rebuild(self):
+        """Builds the areas from scratch, distances when asked for."""
+        board = self.board
+        self.apple = self.game_state.apple.position
+        # Яблоко, до которого посчитано поле расстояний:
+        self.source = None
+        self.distances = None
+        self.blocked = bytearray(board.cells)
+        self.blocked[self.apple] = 0
+        board.changes.clear()
+        self._build_areas()
+
+    def update(self, distances=True):
+        """
+        Applies cells changed since the last update, queries call it.
+
+        args:
+            distances (bool): bring the distance field up to date too
+        """
+        changes = self.board.changes
+        apple = self.game_state.apple.position
+        if apple != self.apple:
+            old_apple = self.apple
+            self.apple = apple
+            self.source = None
+            self._sync(old_apple)
+        for cell in changes:
+            self._sync(cell)
+        changes.clear()
+        if distances and self.source is None:
+            self._build_distances()
+
+    def distance(self, cell):
+        """
+        Length of the shortest path from a cell to the apple.
+
+        args:
+            cell (int): cell index, may be taken (e.g. the head)
+        returns:
+            int: amount of moves or UNREACHABLE
+        """
+        self.update()
+        if not self.blocked[cell]:
+            return self.distances[cell]
+        distances = self.distances
+        best = min(
+            (distances[neighbour]
+             for neighbour in self.board.neighbours[cell]
+             if distances[neighbour] != UNREACHABLE),
+            default=None,
+        )
+        return UNREACHABLE if best is None else best + 1
+
+    def distance_to_apple(self):
+        """Length of the shortest path from the snake`s head."""
+        return self.distance(self.game_state.snake.positions[0])
+
+    def direction_to_apple(self, cell):
+        """
+        Direction of the first move of a shortest path to the apple.
+
+        args:
+            cell (int): cell index
+        returns:
+            tuple | None: direction, None if the apple can`t be reached
+        """
+        distance = self.distance(cell)
+        if distance in (UNREACHABLE, 0):
+            return None
+        for direction, neighbour in zip(
+            DIRECTIONS, self.board.neighbours[cell]
+        ):
+            if self.distances[neighbour] == distance - 1:
+                return direction
+        return None
+
+    def area(self, cell):
+        """
+        Amount of free cells reachable from a cell.
+
+        args:
+            cell (int): cell index; for a taken cell areas of all its
+                free neighbours are counted
+        returns:
+            int
+        """
+        self.update()
+        labels = self.labels
+        if not self.blocked[cell]:
+            return self.sizes[labels[cell]]
+        return sum(
+            self.sizes[label]
+            for label in {labels[neighbour]
+                          for neighbour in self.board.neighbours[cell]}
+            if label
+        )
+
+    def reachable_area(self):
+        """Amount of free cells the snake`s head can get to."""
+        return self.area(self.game_state.snake.positions[0])
+
+    def reaches_apple(self, cell):
+        """
+        Checks if the apple can be reached from a cell, the distance
+        field is not needed for it.
+
+        args:
+            cell (int): cell index, may be taken (e.g. the head)
+        returns:
+            bool
+        """
+        self.update(distances=False)
+        labels = self.labels
+        label = labels[self.apple]
+        if not self.blocked[cell]:
+            return labels[cell] == label
+        return any(
+            labels[neighbour] == label
+            for neighbour in self.board.neighbours[cell]
+        )
+
+    def _sync(self, cell):
+        """Updates maps if a cell has become taken or free."""
+        blocked = bool(self.board.cells[cell]) and cell != self.apple
+        if blocked == bool(self.blocked[cell]):
+            return
+        self.blocked[cell] = blocked
+        if blocked:
+            self._block_area(cell)
+            if self.source is not None:
+                self._block_distance(cell)
+        else:
+            self._free_area(cell)
+            if self.source is not None:
+                self._free_distance(cell)
+
+    def _build_distances(self):
+        """Breadth-first search from the apple over free cells."""
+        neighbours = self.board.neighbours
+        blocked = self.blocked
+        self.source = self.apple
+        distances = [UNREACHABLE] * self.board.size
+        distances[self.source] = 0
+        queue = deque((self.source,))
+        while queue:
+            cell = queue.popleft()
+            distance = distances[cell] + 1
+            for neighbour in neighbours[cell]:
+                if (
+                    distances[neighbour] == UNREACHABLE
+                    and not blocked[neighbour]
+                ):
+                    distances[neighbour] = distance
+                    queue.append(neighbour)
+        self.distances = distances
+
+    def _free_distance(self, cell):
+        """Paths through a freed cell may be shorter than known ones."""
+        distances = self.distances
+        best = min(
+            (distances[neighbour]
+             for neighbour in self.board.neighbours[cell]
+             if distances[neighbour] != UNREACHABLE),
+            default=None,
+        )
+        if best is None:
+            return
+        distances[cell] = best + 1
+        self._spread([(best + 1, cell)])
+
+    def _block_distance(self, cell):
+        """
+        Forgets distances of cells whose every shortest path went
+        through a taken cell and finds new ones from their neighbours.
+        """
+        distances = self.distances
+        neighbours = self.board.neighbours
+        distance = distances[cell]
+        distances[cell] = UNREACHABLE
+        if distance == UNREACHABLE:
+            return
+        # Клетки обходятся по возрастанию расстояния, поэтому все
+        # забытые клетки уровня известны до проверки следующего уровня:
+        lost = []
+        queue = deque(((cell, distance),))
+        while queue:
+            parent, distance = queue.popleft()
+            for child in neighbours[parent]:
+                if distances[child] != distance + 1 or any(
+                    distances[other] == distance
+                    for other in neighbours[child]
+                ):
+                    continue
+                distances[child] = UNREACHABLE
+                lost.append(child)
+                queue.append((child, distance + 1))
+
+        starts = []
+        for child in lost:
+            best = min(
+                (distances[neighbour]
+                 for neighbour in neighbours[child]
+                 if distances[neighbour] != UNREACHABLE),
+                default=None,
+            )
+            if best is not None:
+                distances[child] = best + 1
+                starts.append((best + 1, child))
+        self._spread(starts)
+
+    def _spread(self, starts):
+        """Shortens distances around cells whose distance has dropped."""
+        distances = self.distances
+        neighbours = self.board.neighbours
+        blocked = self.blocked
+        queue = list(starts)
+        queue.sort()
+        while queue:
+            distance, cell = heappop(queue)
+            if distance != distances[cell]:
+                continue
+            distance += 1
+            for neighbour in neighbours[cell]:
+                if blocked[neighbour]:
+                    continue
+                known = distances[neighbour]
+                if known == UNREACHABLE or known > distance:
+                    distances[neighbour] = distance
+                    heappush(queue, (distance, neighbour))
+
+    def _build_areas(self):
+        """Labels every connected area of free cells."""
+        self.labels = [0] * self.board.size
+        self.sizes = {}
+        self.next_label = 1
+        blocked = self.blocked
+        for cell in range(self.board.size):
+            if not blocked[cell] and not self.labels[cell]:
+                self._label_area(cell, self._new_label())
+
+    def _new_label(self):
+        label = self.next_label
+        self.next_label += 1
+        self.sizes[label] = 0
+        return label
+
+    def _label_area(self, start, label):
+        """Gives a label to every free cell connected to a cell."""
+        labels = self.labels
+        neighbours = self.board.neighbours
+        blocked = self.blocked
+        old_label = labels[start]
+        labels[start] = label
+        queue = deque((start,))
+        size = 1
+        while queue:
+            for neighbour in neighbours[queue.popleft()]:
+                if labels[neighbour] == old_label and not blocked[neighbour]:
+                    labels[neighbour] = label
+                    queue.append(neighbour)
+                    size += 1
+        self.sizes[label] += size
+        if old_label:
+            self.sizes[old_label] -= size
+            if not self.sizes[old_label]:
+                del self.sizes[old_label]
+
+    def _free_area(self, cell):
+        """Adds a freed cell to the areas around it, joining them."""
+        labels = self.labels
+        neighbours = self.board.neighbours[cell]
+        found = {labels[neighbour] for neighbour in neighbours}
+        found.discard(0)
+        if not found:
+            labels[cell] = self._new_label()
+            self.sizes[labels[cell]] = 1
+            return
+        largest = max(found, key=self.sizes.get)
+        labels[cell] = largest
+        self.sizes[largest] += 1
+        for neighbour in neighbours:
+            if labels[neighbour] not in (0, largest):
+                self._label_area(neighbour, largest)
+
+    def _block_area(self, cell):
+        """Removes a taken cell from its area, splitting it if needed."""
+        labels = self.labels
+        label = labels[cell]
+        labels[cell] = 0
+        self.sizes[label] -= 1
+        if not self.sizes[label]:
+            del self.sizes[label]
+            return
+        if self._is_locally_connected(cell):
+            return
+        self._split_area(label, [
+            neighbour for neighbour in self.board.neighbours[cell]
+            if labels[neighbour] == label
+        ])
+
+    def _split_area(self, label, starts):
+        """
+        Gives new labels to parts of an area that are no longer
+        connected to each other, except the largest part.
+        Searches from all starts at once, a cell at a time: a search
+        that ends first has found a whole smaller part, searches that
+        meet go on as one. So only the smaller parts are walked through.
+        """
+        split = _AreaSplit(self.labels, label, starts)
+        while len(split.queues) > 1:
+            for number in list(split.queues):
+                queue = split.queues.get(number)
+                if queue:
+                    split.grow(number, self.board.neighbours)
+                elif queue is not None and len(split.queues) > 1:
+                    del split.queues[number]
+                    self._relabel(split.parts.pop(number), label)
+
+    def _relabel(self, cells, label):
+        """Moves cells split off an area to a new area."""
+        new_label = self._new_label()
+        labels = self.labels
+        for cell in cells:
+            labels[cell] = new_label
+        self.sizes[new_label] = len(cells)
+        self.sizes[label] -= len(cells)
+
+    def _is_locally_connected(self, cell):
+        """
+        True if free neighbours of a cell are connected through cells
+        around it, so taking the cell can`t split an area.
+        """
+        board = self.board
+        if board.width < 3 or board.height < 3:
+            return False
+        neighbours = board.neighbours
+        around = neighbours[cell]
+        up = around[_UP]
+        down = around[_DOWN]
+        # Восемь клеток вокруг по кругу, соседи по стороне - на четных
+        # местах:
+        ring = (
+            up, neighbours[up][_RIGHT], around[_RIGHT],
+            neighbours[down][_RIGHT], down, neighbours[down][_LEFT],
+            around[_LEFT], neighbours[up][_LEFT],
+        )
+        labels = self.labels
+        free = [bool(labels[ring_cell]) for ring_cell in ring]
+        if all(free):
+            return True
+        # Считаются непрерывные отрезки свободных клеток круга, в
+        # которых есть сосед по стороне. Обход начинается после занятой
+        # клетки и заканчивается на ней, так что последний отрезок тоже
+        # закрывается:
+        start = free.index(False)
+        runs = 0
+        has_side = False
+        for step in range(1, 9):
+            number = (start + step) % 8
+            if free[number]:
+                has_side = has_side or number % 2 == 0
+            else:
+                runs += has_side
+                has_side = False
+        return runs <= 1
+
+
+class _AreaSplit:
+    """Searches of parts of an area, see 'BoardFields._split_area'."""
+
+    def __init__(self, labels, label, starts):
+        self.labels = labels
+        self.label = label
+        numbers = range(len(starts))
+        self.owners = dict(zip(starts, numbers))
+        # Поиски, встретившие другой, продолжаются в нем:
+        self.merged = list(numbers)
+        self.queues = {number: deque((starts[number],)) for number in numbers}
+        self.parts = {number: [starts[number]] for number in numbers}
+
+    def find(self, number):
+        """Search a search has been merged into."""
+        merged = self.merged
+        while merged[number] != number:
+            number = merged[number]
+        return number
+
+    def grow(self, number, neighbours):
+        """Takes the next cell of a search."""
+        queue = self.queues[number]
+        for neighbour in neighbours[queue.popleft()]:
+            if self.labels[neighbour] != self.label:
+                continue
+            owner = self.owners.get(neighbour)
+            if owner is None:
+                self.owners[neighbour] = number
+                self.parts[number].append(neighbour)
+                queue.append(neighbour)
+                continue
+            owner = self.find(owner)
+            if owner != number:
+                self.merged[owner] = number
+                queue.extend(self.queues.pop(owner))
+                self.parts[number].extend(self.parts.pop(owner))
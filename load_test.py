@@ -0,0 +1,254 @@
+"""
+Server load test
+================
+Simulates many players of the game server ('server.py') over TCP:
+every simulated player joins a room, applies every message to its
+copy of the game (as a real client would) and turns at random.
+
+Prints traffic per player, size of deltas and regularity of ticks as
+players see them (interval between deltas and its jitter).
+
+Usage:
+    python server.py --port 8765
+    python load_test.py --port 8765 --players 500 --duration 30
+
+    # or start a server in a subprocess for the test
+    python load_test.py --spawn-server --players 500
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+from random import Random
+
+from profiler import FrameTimeStats
+from protocol import (
+    DELTA,
+    FRAME_HEADER,
+    HELLO,
+    TURN,
+    ProtocolError,
+    RemoteGame,
+    frame,
+    read_message,
+)
+from server import DEFAULT_HOST, DEFAULT_PORT
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Сколько игроков подключается одновременно, чтобы не переполнить
+# очередь подключений сервера:
+CONNECT_BATCH = 50
+
+
+class LoadStats:
+    """Totals collected from all simulated players."""
+
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.messages = 0
+        self.bytes = 0
+        self.deltas = 0
+        self.delta_bytes = 0
+        self.snapshots = 0
+        self.intervals = FrameTimeStats()
+
+    def add_message(self, message_type, size, last_delta):
+        """
+        Counts a received message.
+
+        args:
+            message_type (int): SNAPSHOT or DELTA
+            size (int): size of a message with its header
+            last_delta (int | None): when the previous delta of a player
+                was received, if it is followed by this message
+        returns:
+            int | None: when this message was received if it is a delta
+        """
+        self.messages += 1
+        self.bytes += size
+        if message_type != DELTA:
+            self.snapshots += 1
+            return None
+        received = time.perf_counter_ns()
+        if last_delta is not None:
+            self.intervals.add(received - last_delta)
+        self.deltas += 1
+        self.delta_bytes += size
+        return received
+
+
+async def play(host, port, room, duration, turn_interval, stats, rng):
+    """
+    One simulated player: joins a room and reads it until time is out.
+    Messages are read by one task for the whole game, so a frame is
+    never cut in two by a timeout, and turns are sent by another one.
+    A broken connection or a damaged message fails only this player.
+
+    args:
+        host, port: address of a server
+        room (str): room to join, empty for a new one
+        duration (float): seconds to play
+        turn_interval (float): mean seconds between turns
+        stats (LoadStats): totals to add to
+        rng (random.Random): source of turns
+    returns:
+        None
+    """
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.failed += 1
+        return
+    stats.connected += 1
+    writer.write(frame(HELLO, room.encode()))
+    reading = asyncio.create_task(read_room(reader, stats))
+    turning = asyncio.create_task(send_turns(writer, turn_interval, rng))
+    try:
+        done, _ = await asyncio.wait(
+            (reading, turning),
+            timeout=duration,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        for task in done:
+            task.result()
+    except (ConnectionError, asyncio.IncompleteReadError, ProtocolError):
+        stats.failed += 1
+    finally:
+        reading.cancel()
+        turning.cancel()
+        await asyncio.gather(reading, turning, return_exceptions=True)
+        writer.close()
+
+
+async def read_room(reader, stats):
+    """
+    Applies every message of a room to a copy of the game until the
+    connection is closed.
+
+    args:
+        reader (asyncio.StreamReader): connection to a server
+        stats (LoadStats): totals to add to
+    returns:
+        None
+    raises:
+        asyncio.IncompleteReadError: if the server closed the connection
+        ProtocolError: if a message is damaged
+    """
+    game = RemoteGame()
+    last_delta = None
+    while True:
+        message_type, payload = await read_message(reader)
+        game.apply(message_type, payload)
+        last_delta = stats.add_message(
+            message_type, FRAME_HEADER.size + len(payload), last_delta
+        )
+
+
+async def send_turns(writer, turn_interval, rng):
+    """
+    Turns to random directions at random intervals.
+
+    args:
+        writer (asyncio.StreamWriter): connection to a server
+        turn_interval (float): mean seconds between turns
+        rng (random.Random): source of turns
+    returns:
+        None
+    """
+    while True:
+        await asyncio.sleep(rng.expovariate(1 / turn_interval))
+        writer.write(frame(TURN, bytes((rng.randrange(4),))))
+        await writer.drain()
+
+
+async def run_load(args):
+    """
+    Starts all players in batches and waits for them.
+
+    returns:
+        LoadStats
+    """
+    stats = LoadStats()
+    rng = Random(args.seed)
+    players = []
+    for number in range(args.players):
+        room = f'load-{number % args.rooms}' if args.rooms else ''
+        players.append(asyncio.create_task(play(
+            args.host, args.port, room, args.duration, args.turn_interval,
+            stats, Random(rng.getrandbits(64)),
+        )))
+        if (number + 1) % CONNECT_BATCH == 0:
+            await asyncio.sleep(0.05)
+    await asyncio.gather(*players)
+    return stats
+
+
+def report(stats, players, duration):
+    """Formats totals of a load test."""
+    per_player = stats.bytes / max(stats.connected, 1) / duration
+    mean_delta = stats.delta_bytes / max(stats.deltas, 1)
+    return '\n'.join((
+        f'players={players} connected={stats.connected} '
+        f'failed={stats.failed}',
+        f'messages={stats.messages} ({stats.messages / duration:.0f}/s) '
+        f'snapshots={stats.snapshots}',
+        f'received={stats.bytes / duration / 1024:.1f}KB/s '
+        f'per_player={per_player:.0f}B/s mean_delta={mean_delta:.1f}B',
+        f'ticks: {stats.intervals}',
+    ))
+
+
+def parse_args(argv=None):
+    """Parses command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Load test of the multiplayer Snake server.'
+    )
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--players', type=int, default=100)
+    parser.add_argument(
+        '--rooms', type=int, default=0,
+        help='share this many rooms, every player gets its own by default',
+    )
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument(
+        '--turn-interval', type=float, default=0.5,
+        help='mean seconds between turns of a player',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--spawn-server', action='store_true',
+        help='run server.py in a subprocess for the test',
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs a load test and prints its report."""
+    args = parse_args(argv)
+    server = None
+    if args.spawn_server:
+        server = subprocess.Popen(
+            [sys.executable, str(BASE_DIR / 'server.py'),
+             '--host', args.host, '--port', str(args.port)],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        # Сервер печатает строку, когда готов принимать игроков.
+        server.stdout.readline()
+    try:
+        stats = asyncio.run(run_load(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(report(stats, args.players, args.duration))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
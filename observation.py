@@ -0,0 +1,166 @@
+"""
+Observations
+============
+Game state as NumPy arrays for agents, in two forms:
+
+- pixels: the rendered screen of the pygame frontend as a view of the
+  surface`s memory ('screen_pixels'), no pixel is copied;
+- cells: a compact tensor of CHANNELS planes of board size written
+  straight from game state, nothing is rasterized. 'cell_tensor' reads
+  a GameState, 'batch_cell_tensor' all boards of a BatchGameState.
+
+Channels of a cell tensor (uint8):
+    EMPTY - 1 where a cell is empty
+    SNAKE - 1 where the snake is, its head included
+    HEAD  - 1 in the cell of the snake`s head
+    APPLE - 1 where the apple is
+    ROCK  - 1 where rocks are
+    LIFE  - ticks an apple or a rock has left to live, up to MAX_LIFE
+
+A preallocated tensor can be passed as 'out' to reuse its memory every
+frame, e.g. a slice of one tensor of all environments.
+
+Usage:
+    tensor = cell_tensor(game_state)  # shape (CHANNELS, height, width)
+    with screen_pixels(the_snake.screen) as pixels:
+        frame = pixels.copy()  # shape (height, width, 3)
+"""
+
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+# pygame печатает приветствие при импорте - отключаем его:
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from pygame import surfarray  # noqa: E402
+
+from snake_batch import APPLE as BATCH_APPLE  # noqa: E402
+from snake_batch import EMPTY as BATCH_EMPTY  # noqa: E402
+from snake_batch import ROCK as BATCH_ROCK  # noqa: E402
+from snake_batch import SNAKE as BATCH_SNAKE  # noqa: E402
+
+# Номера каналов тензора клеток:
+EMPTY = 0
+SNAKE = 1
+HEAD = 2
+APPLE = 3
+ROCK = 4
+LIFE = 5
+CHANNELS = 6
+
+# Оставшаяся жизнь больше этой записывается как она:
+MAX_LIFE = 255
+
+
+@contextmanager
+def screen_pixels(surface):
+    """
+    Gives access to pixels of a surface without copying them.
+    While the view exists the surface is locked and can`t be drawn on,
+    so the view has to be used (or copied) inside the 'with' block.
+
+    args:
+        surface (pygame.Surface): e.g. 'the_snake.screen'
+    yields:
+        numpy.ndarray: RGB view of shape (height, width, 3)
+    """
+    pixels = surfarray.pixels3d(surface)
+    try:
+        yield pixels.transpose(1, 0, 2)
+    finally:
+        del pixels
+
+
+def _output(out, shape):
+    if out is None:
+        return np.empty(shape, dtype=np.uint8)
+    if (
+        out.shape != shape
+        or out.dtype != np.uint8
+        or not out.flags.c_contiguous
+    ):
+        raise ValueError(
+            f'Output has to be a contiguous uint8 array of shape {shape}, '
+            f'not {out.dtype} {out.shape}.'
+        )
+    return out
+
+
+def cell_tensor(game_state, out=None):
+    """
+    Writes the state of a game into a cell tensor. Costs the same for
+    any length of the snake: snake cells are the taken cells of the
+    board that are not apples or rocks.
+
+    args:
+        game_state (GameState): game after a tick
+        out (numpy.ndarray | None): uint8 array of shape
+            (CHANNELS, height, width) to write to, a new one if not given
+    returns:
+        numpy.ndarray: the tensor
+    raises:
+        ValueError: if 'out' has a wrong shape or type
+    """
+    board = game_state.board
+    store = game_state.store
+    out = _output(out, (CHANNELS, board.height, board.width))
+    planes = out.reshape(CHANNELS, board.size)
+    taken = np.frombuffer(board.cells, dtype=np.uint8)
+    positions = np.frombuffer(store.position, dtype=np.int64)
+    apple = positions[game_state.apple.index]
+
+    flags = planes.view(bool)
+    np.equal(taken, 0, out=flags[EMPTY])
+    np.not_equal(taken, 0, out=flags[SNAKE])
+    planes[SNAKE, positions] = 0
+    planes[HEAD:] = 0
+    planes[HEAD, game_state.snake.positions[0]] = 1
+    planes[ROCK, positions] = 1
+    planes[ROCK, apple] = 0
+    planes[APPLE, apple] = 1
+    expires_at = np.frombuffer(store.expires_at, dtype=np.int64)
+    planes[LIFE, positions] = np.minimum(
+        expires_at - game_state.ticks, MAX_LIFE
+    )
+    return out
+
+
+def batch_cell_tensor(batch, out=None):
+    """
+    Writes every board of a batch into one cell tensor with a few
+    vectorized operations.
+
+    args:
+        batch (BatchGameState): games after a tick
+        out (numpy.ndarray | None): uint8 array of shape
+            (boards, CHANNELS, height, width) to write to, a new one if
+            not given
+    returns:
+        numpy.ndarray: the tensor
+    raises:
+        ValueError: if 'out' has a wrong shape or type
+    """
+    boards = batch.boards
+    out = _output(out, (boards, CHANNELS, batch.height, batch.width))
+    planes = out.reshape(boards, CHANNELS, batch.size)
+    grid = batch.grid
+    indexes = batch.board_indexes
+
+    flags = planes.view(bool)
+    np.equal(grid, BATCH_EMPTY, out=flags[:, EMPTY])
+    np.equal(grid, BATCH_SNAKE, out=flags[:, SNAKE])
+    planes[:, HEAD] = 0
+    planes[indexes, HEAD, batch.heads] = 1
+    np.equal(grid, BATCH_APPLE, out=flags[:, APPLE])
+    np.equal(grid, BATCH_ROCK, out=flags[:, ROCK])
+    planes[:, LIFE] = 0
+    planes[indexes, LIFE, batch.apple_positions] = np.minimum(
+        batch.apple_life, MAX_LIFE
+    )
+    if batch.rocks:
+        planes[indexes[:, None], LIFE, batch.rock_positions] = np.minimum(
+            batch.rock_life, MAX_LIFE
+        )
+    return out
@@ -0,0 +1,321 @@
+"""
+Tick profiler
+=============
+Optional instrumentation of the game loop. Measures wall time of every
+phase of a frame, keeps a histogram per phase and counts frames whose
+work did not fit into the frame budget (1 / frame rate, the game asks
+for RENDER_FPS frames per second).
+
+Phases of a frame, in order:
+    wait        - clock.tick() sleeping until the next frame
+    input       - handling keyboard events
+    move        - applying direction and moving the snake
+    update_life - resetting apples and rocks whose lifespan is over
+    collisions  - collision checks and their consequences
+    draw        - drawing changed game objects
+    display     - pushing the frame to the window
+Frames are drawn at the display rate and game ticks run at game speed,
+so a frame has move, update_life, collisions and draw once per tick
+done in it: none, one or several times. Steering of the autopilot is
+an input phase of its tick, and drawing the snake between ticks is
+one more draw phase.
+
+Intervals between frames are collected into FrameTimeStats, which
+reports frame rate and jitter - deviation of intervals from their mean.
+Input latency is time from a key press being read to the move of the
+snake that applied the turn, turns wait in a queue for their tick.
+
+Count, mean and maximum of every phase and histograms are kept for the
+whole game in constant memory. Single measurements are kept only for
+the last MAX_EVENTS phases: percentiles of the summary and the saved
+report cover this window.
+
+Enabled with '--profile PATH' or SNAKE_PROFILE=PATH. A report is saved
+on exit: '*.csv' as one row per phase of a frame, any other name as
+a Chrome trace (open it at chrome://tracing or ui.perfetto.dev).
+When profiling is disabled the game loop uses NULL_PROFILER, which
+does nothing, and the game state skips all measurements.
+"""
+
+import csv
+import json
+from bisect import bisect_right
+from collections import deque
+from time import perf_counter_ns
+
+# Переменная окружения с путем к отчету профилировщика:
+PROFILE_ENV = 'SNAKE_PROFILE'
+
+PHASES = (
+    'wait', 'input', 'move', 'update_life', 'collisions', 'draw', 'display'
+)
+
+# Верхние границы корзин гистограммы в микросекундах (последняя - без
+# границы):
+HISTOGRAM_BOUNDS_US = tuple(2 ** power for power in range(17))
+
+# Сколько последних замеров хранить для отчета и перцентилей (около
+# полутора минут при 60 FPS, несколько мегабайт):
+MAX_EVENTS = 36_000
+
+# Название строки задержки ввода в сводке:
+INPUT_LAG = 'input lag'
+
+
+class FrameTimeStats:
+    """
+    Running statistics of intervals between frames: frame rate, mean
+    interval, jitter (standard deviation of intervals) and the longest
+    interval. Takes constant memory however long a game runs.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forgets all collected intervals."""
+        self.count = 0
+        self.total_ns = 0
+        self.total_squares = 0
+        self.worst_ns = 0
+
+    def add(self, interval_ns):
+        """
+        Adds an interval between two frames.
+
+        args:
+            interval_ns (int): time between starts of frames
+        returns:
+            None
+        """
+        self.count += 1
+        self.total_ns += interval_ns
+        self.total_squares += interval_ns * interval_ns
+        if interval_ns > self.worst_ns:
+            self.worst_ns = interval_ns
+
+    @property
+    def mean_ms(self):
+        """Mean interval between frames in milliseconds."""
+        return self.total_ns / self.count / 1e6 if self.count else 0.0
+
+    @property
+    def fps(self):
+        """Frames per second."""
+        return 1e9 * self.count / self.total_ns if self.total_ns else 0.0
+
+    @property
+    def jitter_ms(self):
+        """Standard deviation of intervals in milliseconds."""
+        if not self.count:
+            return 0.0
+        mean = self.total_ns / self.count
+        variance = self.total_squares / self.count - mean * mean
+        return max(variance, 0) ** 0.5 / 1e6
+
+    @property
+    def worst_ms(self):
+        """Longest interval between frames in milliseconds."""
+        return self.worst_ns / 1e6
+
+    def __str__(self):
+        """One line report of collected intervals."""
+        return (
+            f'fps={self.fps:.1f} frame={self.mean_ms:.2f}ms '
+            f'jitter={self.jitter_ms:.2f}ms max={self.worst_ms:.2f}ms'
+        )
+
+
+class TickProfiler:
+    """
+    Collects durations of frame phases.
+
+    A frame is opened with 'start_frame', every phase is closed with
+    'lap', which measures time since the previous lap, and the frame is
+    closed with 'end_frame'.
+    """
+
+    def __init__(self):
+        self.origin = perf_counter_ns()
+        self.mark = self.origin
+        self.frame_start = self.origin
+        self.budget_ns = 0
+        self.wait_ns = 0
+        self.frames = 0
+        self.overruns = 0
+        self.frame_times = FrameTimeStats()
+        self.input_latencies = deque(maxlen=MAX_EVENTS)
+        # (frame, phase, start_ns, duration_ns) - for trace and CSV:
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.histograms = {
+            phase: [0] * (len(HISTOGRAM_BOUNDS_US) + 1) for phase in PHASES
+        }
+        # Количество, сумма и максимум длительностей за всю игру:
+        self.totals = {phase: [0, 0, 0] for phase in (*PHASES, INPUT_LAG)}
+
+    def start_frame(self, fps):
+        """
+        Opens a frame.
+
+        args:
+            fps (int): frames per second, sets the budget
+        returns:
+            None
+        """
+        self.budget_ns = 1_000_000_000 // fps if fps else 0
+        now = perf_counter_ns()
+        if self.frames:
+            self.frame_times.add(now - self.frame_start)
+        self.frame_start = self.mark = now
+        self.wait_ns = 0
+
+    def lap(self, phase):
+        """Closes a phase that started at the previous lap."""
+        now = perf_counter_ns()
+        duration = now - self.mark
+        self.events.append((self.frames, phase, self.mark, duration))
+        self.histograms[phase][
+            bisect_right(HISTOGRAM_BOUNDS_US, duration // 1000)
+        ] += 1
+        _add_total(self.totals[phase], duration)
+        if phase == 'wait':
+            self.wait_ns += duration
+        self.mark = now
+
+    def input_applied(self, made_at):
+        """
+        Records latency of a turn applied by the current move.
+
+        args:
+            made_at (int): perf_counter_ns() when the turn was made
+        returns:
+            None
+        """
+        latency = perf_counter_ns() - made_at
+        self.input_latencies.append(latency)
+        _add_total(self.totals[INPUT_LAG], latency)
+
+    def end_frame(self):
+        """Closes a frame, counts it as overrun if work exceeded budget."""
+        work = perf_counter_ns() - self.frame_start - self.wait_ns
+        if self.budget_ns and work > self.budget_ns:
+            self.overruns += 1
+        self.frames += 1
+
+    def summary(self):
+        """
+        Text report: count, mean and maximum of every phase over the
+        whole game, its percentiles over the stored events, overrun
+        count, frame rate, jitter and input latency.
+
+        returns:
+            str
+        """
+        durations = {phase: [] for phase in PHASES}
+        for _, phase, _, duration in self.events:
+            durations[phase].append(duration)
+        durations[INPUT_LAG] = list(self.input_latencies)
+        lines = [
+            f'frames={self.frames} overruns={self.overruns}',
+            str(self.frame_times),
+            f'{"phase":<12}{"count":>8}{"mean us":>10}'
+            f'{"p50 us":>10}{"p99 us":>10}{"max us":>10}',
+        ]
+        for phase, (count, total, worst) in self.totals.items():
+            if not count:
+                continue
+            # Фаза могла не попасть в окно последних замеров:
+            values = sorted(durations[phase]) or [float('nan')]
+            lines.append(
+                f'{phase:<12}{count:>8}'
+                f'{total / count / 1000:>10.1f}'
+                f'{values[len(values) // 2] / 1000:>10.1f}'
+                f'{values[len(values) * 99 // 100] / 1000:>10.1f}'
+                f'{worst / 1000:>10.1f}'
+            )
+        return '\n'.join(lines)
+
+    def dump(self, path):
+        """
+        Saves collected events: CSV for '*.csv' files, Chrome trace
+        otherwise.
+
+        args:
+            path (str): file to write
+        returns:
+            None
+        """
+        if str(path).endswith('.csv'):
+            self._dump_csv(path)
+        else:
+            self._dump_trace(path)
+
+    def _dump_csv(self, path):
+        with open(path, 'w', newline='') as report:
+            writer = csv.writer(report)
+            writer.writerow(('frame', 'phase', 'start_us', 'duration_us'))
+            for frame, phase, start, duration in self.events:
+                writer.writerow((
+                    frame,
+                    phase,
+                    round((start - self.origin) / 1000, 1),
+                    round(duration / 1000, 1),
+                ))
+
+    def _dump_trace(self, path):
+        trace_events = [
+            {
+                'name': phase,
+                'cat': 'frame',
+                'ph': 'X',
+                'ts': (start - self.origin) / 1000,
+                'dur': duration / 1000,
+                'pid': 0,
+                'tid': 0,
+                'args': {'frame': frame},
+            }
+            for frame, phase, start, duration in self.events
+        ]
+        with open(path, 'w') as report:
+            json.dump({
+                'traceEvents': trace_events,
+                'otherData': {
+                    'frames': self.frames,
+                    'overruns': self.overruns,
+                    'frame_time': {
+                        'fps': self.frame_times.fps,
+                        'mean_ms': self.frame_times.mean_ms,
+                        'jitter_ms': self.frame_times.jitter_ms,
+                        'max_ms': self.frame_times.worst_ms,
+                    },
+                    'input_latencies_us': [
+                        latency / 1000 for latency in self.input_latencies
+                    ],
+                    'histogram_bounds_us': HISTOGRAM_BOUNDS_US,
+                    'histograms': self.histograms,
+                },
+            }, report)
+
+
+def _add_total(totals, duration):
+    """Adds a duration to [count, sum, maximum] of a phase."""
+    totals[0] += 1
+    totals[1] += duration
+    if duration > totals[2]:
+        totals[2] = duration
+
+
+class NullProfiler:
+    """Profiler that does nothing. Used when profiling is disabled."""
+
+    def start_frame(self, fps):
+        """Does nothing."""
+
+    def lap(self, phase):
+        """Does nothing."""
+
+    def end_frame(self):
+        """Does nothing."""
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,270 @@
+"""
+Network protocol
+================
+Binary messages exchanged by the game server ('server.py') and its
+clients ('client.py', 'load_test.py') over TCP.
+
+Every message is framed (little-endian):
+    header:  payload length (u32), message type (u8)
+    payload: depends on the type, integers are varints (see replay.py)
+
+Client messages:
+    HELLO    - room name (utf-8), an empty name asks for a new room
+    TURN     - direction (u8) - index in snake_core.DIRECTIONS
+
+Server messages:
+    SNAPSHOT - whole state of a room: sent on joining and after a game
+               is over, as the game starts anew
+    DELTA    - changes made by one tick: the new head cell, whether the
+               tail cell was freed, and apples and rocks that moved
+
+Both server messages start with event (u8) - index in EVENTS, and
+tick (varint). Apples and rocks are sent as:
+    kind (u8) - index in KINDS, cell, tick its low life starts from and
+    position in the blink cycle (varints)
+so a client knows when an object blinks without further messages.
+
+A delta does not depend on the snake`s length: it carries one head
+cell and a flag for the tail. Its size only grows with the amount of
+objects that moved at a tick.
+"""
+
+import struct
+from collections import deque, namedtuple
+
+import snake_core as core
+from replay import decode_varint, encode_varint
+
+FRAME_HEADER = struct.Struct('<IB')
+
+# Типы сообщений:
+HELLO = 1
+TURN = 2
+SNAPSHOT = 16
+DELTA = 17
+
+# Самое большое допустимое сообщение (снимок огромного поля):
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+# События тика в порядке их номеров в сообщениях:
+EVENTS = (
+    None, core.APPLE_EATEN, core.HIT_ROCK, core.HIT_SELF, core.BOARD_FILLED
+)
+
+# Виды объектов в порядке их номеров в сообщениях:
+KINDS = (core.Apple, core.Rock)
+KIND_BY_EVENT = {cls.collision_event: kind for kind, cls in enumerate(KINDS)}
+
+# Флаги сообщения DELTA:
+TAIL_REMOVED = 1
+
+RemoteObject = namedtuple(
+    'RemoteObject', ('kind', 'low_life_from', 'blink_tick_count')
+)
+
+
+class ProtocolError(Exception):
+    """Raised when a message is damaged or not expected."""
+
+
+def frame(message_type, payload=b''):
+    """
+    Frames a message to be written to a stream.
+
+    args:
+        message_type (int): one of HELLO, TURN, SNAPSHOT, DELTA
+        payload (bytes): body of the message
+    returns:
+        bytes
+    """
+    return FRAME_HEADER.pack(len(payload), message_type) + payload
+
+
+async def read_message(reader):
+    """
+    Reads one framed message from a stream.
+
+    args:
+        reader (asyncio.StreamReader): stream to read
+    returns:
+        tuple: (message type, payload)
+    raises:
+        asyncio.IncompleteReadError: if the stream is closed
+        ProtocolError: if a message is too large
+    """
+    header = await reader.readexactly(FRAME_HEADER.size)
+    size, message_type = FRAME_HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f'message of {size} bytes is too large')
+    return message_type, await reader.readexactly(size)
+
+
+def _encode_object(data, obj):
+    data.append(KIND_BY_EVENT[obj.collision_event])
+    data += encode_varint(obj.position)
+    data += encode_varint(obj.low_life_from)
+    data += encode_varint(obj.blink_tick_count)
+
+
+def encode_snapshot(game_state, event=None):
+    """
+    Encodes the whole state of a game.
+
+    args:
+        game_state (GameState): game to send
+        event (str | None): event of the last tick
+    returns:
+        bytes: framed SNAPSHOT message
+    """
+    snake = game_state.snake
+    board = game_state.board
+    data = bytearray((EVENTS.index(event),))
+    data += encode_varint(game_state.ticks)
+    data += encode_varint(board.width)
+    data += encode_varint(board.height)
+    data += encode_varint(len(snake.positions))
+    for position in snake.positions:
+        data += encode_varint(position)
+    objects = game_state.objects[1:]
+    data += encode_varint(len(objects))
+    for obj in objects:
+        _encode_object(data, obj)
+    return frame(SNAPSHOT, bytes(data))
+
+
+def encode_delta(game_state, event, moves):
+    """
+    Encodes changes made by the last tick.
+
+    args:
+        game_state (GameState): game after the tick
+        event (str | None): event of the tick, not a game over one
+        moves (list): (object, old position) pairs, see ObjectStore.moves
+    returns:
+        bytes: framed DELTA message
+    """
+    snake = game_state.snake
+    data = bytearray((EVENTS.index(event),))
+    data += encode_varint(game_state.ticks)
+    data += encode_varint(snake.positions[0])
+    data.append(TAIL_REMOVED if snake.last is not None else 0)
+    data += encode_varint(len(moves))
+    for obj, old_position in moves:
+        data += encode_varint(old_position)
+        _encode_object(data, obj)
+    return frame(DELTA, bytes(data))
+
+
+class RemoteGame:
+    """
+    State of a game as a client sees it, built from SNAPSHOT and DELTA
+    messages: snake cells, apples and rocks by cell and the tick.
+    Knows which objects blink without being told every tick.
+    """
+
+    def __init__(self):
+        self.tick = 0
+        self.width = self.height = 0
+        self.snake = deque()
+        self.objects = {}
+        # Клетки объектов, которые уже мигают, и тик -> клетки объектов,
+        # которые начнут мигать на этом тике:
+        self.low_life = set()
+        self.low_life_starts = {}
+
+    def apply(self, message_type, payload):
+        """
+        Applies a server message.
+
+        args:
+            message_type (int): SNAPSHOT or DELTA
+            payload (bytes): body of the message
+        returns:
+            tuple: (event, cells that have to be redrawn); all cells
+                are None after a snapshot, the whole view is redrawn
+        raises:
+            ProtocolError: on unknown or damaged messages
+        """
+        try:
+            if message_type == SNAPSHOT:
+                return self._apply_snapshot(payload), None
+            if message_type == DELTA:
+                return self._apply_delta(payload)
+        except (IndexError, KeyError, ValueError) as error:
+            raise ProtocolError(f'damaged message: {error}') from error
+        raise ProtocolError(f'unexpected message type {message_type}')
+
+    def is_blinked(self, cell):
+        """True if an object in a cell is drawn blinked at this tick."""
+        obj = self.objects[cell]
+        return core.is_blink_tick(
+            obj.blink_tick_count,
+            self.tick - obj.low_life_from + 1,
+            KINDS[obj.kind].low_life_blink_speed,
+        )
+
+    def _apply_snapshot(self, payload):
+        event, offset = self._read_header(payload)
+        self.width, offset = decode_varint(payload, offset)
+        self.height, offset = decode_varint(payload, offset)
+        length, offset = decode_varint(payload, offset)
+        self.snake = deque()
+        for _ in range(length):
+            cell, offset = decode_varint(payload, offset)
+            self.snake.append(cell)
+        self.objects = {}
+        self.low_life = set()
+        self.low_life_starts = {}
+        count, offset = decode_varint(payload, offset)
+        for _ in range(count):
+            offset = self._read_object(payload, offset)
+        return event
+
+    def _apply_delta(self, payload):
+        event, offset = self._read_header(payload)
+        changed = set()
+        head, offset = decode_varint(payload, offset)
+        flags = payload[offset]
+        if flags & TAIL_REMOVED:
+            changed.add(self.snake.pop())
+        self.snake.appendleft(head)
+        changed.add(head)
+        count, offset = decode_varint(payload, offset + 1)
+        for _ in range(count):
+            old_cell, offset = decode_varint(payload, offset)
+            self._remove_object(old_cell)
+            changed.add(old_cell)
+            cell = decode_varint(payload, offset + 1)[0]
+            offset = self._read_object(payload, offset)
+            changed.add(cell)
+        self.low_life.update(self.low_life_starts.pop(self.tick, ()))
+        changed.update(self.low_life)
+        return event, changed
+
+    def _read_header(self, payload):
+        event = EVENTS[payload[0]]
+        self.tick, offset = decode_varint(payload, 1)
+        return event, offset
+
+    def _read_object(self, payload, offset):
+        kind = payload[offset]
+        if kind >= len(KINDS):
+            raise ProtocolError(f'unknown object kind {kind}')
+        cell, offset = decode_varint(payload, offset + 1)
+        low_life_from, offset = decode_varint(payload, offset)
+        blink_tick_count, offset = decode_varint(payload, offset)
+        self.objects[cell] = RemoteObject(
+            kind, low_life_from, blink_tick_count
+        )
+        if low_life_from <= self.tick:
+            self.low_life.add(cell)
+        else:
+            self.low_life_starts.setdefault(low_life_from, []).append(cell)
+        return offset
+
+    def _remove_object(self, cell):
+        obj = self.objects.pop(cell)
+        self.low_life.discard(cell)
+        starts = self.low_life_starts.get(obj.low_life_from)
+        if starts is not None:
+            starts.remove(cell)
@@ -0,0 +1,227 @@
+"""
+Replays
+=======
+Records direction changes of a game into a compact binary log and
+re-simulates logged games headlessly at full speed.
+
+A game is fully defined by its seed, board size, amount of rocks and
+the ticks at which the snake changed direction, so nothing else is stored.
+
+Log format (little-endian):
+    header: magic b'SNKR', version (u8), seed (u64),
+            width (u16), height (u16), rocks (u16)
+    record: ticks since previous record (varint), direction (u8) -
+            index in snake_core.DIRECTIONS
+    end:    ticks since previous record (varint), END_MARKER (u8)
+
+The end record holds the total length of a game. A log cut short
+(e.g. by a crash) is replayed up to its last record.
+
+Usage:
+    python the_snake.py --record game.snkr
+    python replay.py game.snkr
+"""
+
+import argparse
+import struct
+import sys
+import time
+
+from snake_core import DIRECTIONS, GameState
+
+LOG_MAGIC = b'SNKR'
+LOG_VERSION = 1
+HEADER = struct.Struct('<4sBQHHH')
+END_MARKER = 0xFF
+
+
+class ReplayFormatError(Exception):
+    """Raised when a file is not a replay log or is damaged."""
+
+
+class InputRecorder:
+    """
+    Writes direction changes of a game into a binary log.
+    Is attached to a game with GameState.recorder, see 'record_game'.
+
+    args:
+        stream: binary file-like object to write to
+        game_state (GameState): game to take seed and settings from
+    """
+
+    def __init__(self, stream, game_state):
+        self.stream = stream
+        self.game_state = game_state
+        self.last_tick = 0
+        stream.write(HEADER.pack(
+            LOG_MAGIC,
+            LOG_VERSION,
+            game_state.seed,
+            game_state.board.width,
+            game_state.board.height,
+            len(game_state.rocks),
+        ))
+
+    def record(self, tick, direction):
+        """
+        Adds a direction change applied at a tick.
+
+        args:
+            tick (int): amount of ticks played before the change
+            direction (tuple): new direction of the snake
+        returns:
+            None
+        """
+        self._write_record(tick, DIRECTIONS.index(direction))
+
+    def close(self):
+        """Writes the end record with total length of a game."""
+        self._write_record(self.game_state.ticks, END_MARKER)
+        self.stream.flush()
+
+    def _write_record(self, tick, code):
+        self.stream.write(encode_varint(tick - self.last_tick))
+        self.stream.write(bytes((code,)))
+        self.last_tick = tick
+
+
+def record_game(game_state, stream):
+    """
+    Starts recording of a game into a stream.
+
+    args:
+        game_state (GameState): game that has not been played yet
+        stream: binary file-like object to write to
+    returns:
+        InputRecorder
+    """
+    recorder = InputRecorder(stream, game_state)
+    game_state.recorder = recorder
+    return recorder
+
+
+def encode_varint(value):
+    """Encodes a non-negative integer with 7 bits per byte."""
+    data = bytearray()
+    while value > 0x7F:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+
+def decode_varint(data, offset):
+    """
+    Decodes an integer written by 'encode_varint'.
+
+    args:
+        data (bytes): encoded data
+        offset (int): position of the first byte
+    returns:
+        tuple: (value, offset of the next byte)
+    raises:
+        IndexError: if data ends in the middle of a number
+    """
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, offset
+
+
+def read_log(data):
+    """
+    Parses a replay log.
+
+    args:
+        data (bytes): log contents
+    returns:
+        tuple: (settings, changes, total_ticks)
+            settings (dict): seed, width, height, rocks for GameState
+            changes (list[tuple]): (tick, direction) pairs
+            total_ticks (int | None): None if a log has no end record
+    raises:
+        ReplayFormatError: if data is not a replay log of known version
+    """
+    if len(data) < HEADER.size:
+        raise ReplayFormatError('Replay log is too short.')
+    magic, version, seed, width, height, rocks = HEADER.unpack_from(data)
+    if magic != LOG_MAGIC:
+        raise ReplayFormatError('Not a replay log.')
+    if version != LOG_VERSION:
+        raise ReplayFormatError(f'Unsupported replay version: {version}.')
+    settings = {'seed': seed, 'width': width, 'height': height,
+                'rocks': rocks}
+
+    changes = []
+    tick = 0
+    offset = HEADER.size
+    while offset < len(data):
+        try:
+            delta, offset = decode_varint(data, offset)
+            code = data[offset]
+        except IndexError:
+            # Log was cut short: replay everything before the break.
+            break
+        offset += 1
+        tick += delta
+        if code == END_MARKER:
+            return settings, changes, tick
+        if code >= len(DIRECTIONS):
+            raise ReplayFormatError(f'Unknown direction code: {code}.')
+        changes.append((tick, DIRECTIONS[code]))
+    return settings, changes, None
+
+
+def replay(data, **state_kwargs):
+    """
+    Re-simulates a logged game headlessly.
+
+    args:
+        data (bytes): log contents
+        state_kwargs: extra arguments passed to GameState
+    returns:
+        GameState: state after the last logged tick
+    """
+    settings, changes, total_ticks = read_log(data)
+    game_state = GameState(**settings, **state_kwargs)
+    step = game_state.step
+    for tick, direction in changes:
+        for _ in range(tick - game_state.ticks):
+            step()
+        step(direction)
+    if total_ticks is not None:
+        for _ in range(total_ticks - game_state.ticks):
+            step()
+    return game_state
+
+
+def main(argv=None):
+    """Replays a log and prints the final state and replay speed."""
+    parser = argparse.ArgumentParser(
+        description='Re-simulates a recorded Snake game.'
+    )
+    parser.add_argument('log', help='path to a replay log')
+    args = parser.parse_args(argv)
+
+    with open(args.log, 'rb') as log:
+        data = log.read()
+    started = time.perf_counter()
+    game_state = replay(data)
+    elapsed = time.perf_counter() - started
+    print(
+        f'seed={game_state.seed} ticks={game_state.ticks} '
+        f'length={game_state.snake.length} '
+        f'head={game_state.snake.get_head_position()}'
+    )
+    print(
+        f'replayed in {elapsed:.3f}s '
+        f'({game_state.ticks / max(elapsed, 1e-9):.0f} ticks/sec)'
+    )
+
+
+if __name__ == '__main__':
+    sys.exit(main())
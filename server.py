@@ -0,0 +1,345 @@
+"""
+Game server
+===========
+Authoritative multiplayer server: runs games of many rooms in one
+asyncio event loop and streams them to clients over TCP (see
+'protocol.py' for messages).
+
+A room is one game. The first client to join a room controls its
+snake, the others watch; when the player leaves, the next client in
+the room takes over. A client joining a room gets a snapshot of the
+game, after that every tick is sent as a delta: the new head cell,
+a flag for the freed tail cell and apples and rocks that moved. After
+a game over the game starts anew and a snapshot is sent again.
+
+Every room ticks at the speed of its game on its own timer, so a slow
+room does not hold others back. Clients that do not read their data
+are disconnected once MAX_WRITE_BUFFER bytes are waiting for them.
+
+Usage:
+    python server.py --port 8765
+    python client.py --port 8765 --room lobby
+    python load_test.py --port 8765 --players 500
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from random import Random
+
+from protocol import (
+    HELLO,
+    TURN,
+    ProtocolError,
+    encode_delta,
+    encode_snapshot,
+    read_message,
+)
+from snake_core import (
+    DIRECTIONS,
+    GAME_OVER_EVENTS,
+    GRID_HEIGHT,
+    GRID_WIDTH,
+    ROCKS_GENERATED,
+    GameState,
+)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Сколько байт может ждать отправки клиенту, прежде чем его отключат:
+MAX_WRITE_BUFFER = 1024 * 1024
+
+# Если комната отстала от своего расписания больше, чем на столько
+# секунд, пропущенные тики не догоняются:
+MAX_TICK_LAG = 1.0
+
+# Очередь подключений, которые еще не приняты сервером:
+LISTEN_BACKLOG = 1024
+
+# Как часто печатать статистику сервера (секунды):
+STATS_INTERVAL = 5.0
+
+
+class Room:
+    """
+    One game and clients connected to it.
+
+    args:
+        name (str): name clients join a room by
+        game_state (GameState): game of a room
+        tick_rate (float | None): ticks per second, the game`s speed
+            if not given
+    """
+
+    def __init__(self, name, game_state, tick_rate=None):
+        self.name = name
+        self.game_state = game_state
+        game_state.store.moves = []
+        self.tick_rate = tick_rate
+        self.clients = []
+        self.player = None
+        self.task = None
+        self.bytes_sent = 0
+
+    def join(self, writer):
+        """
+        Adds a client and sends it a snapshot of the game.
+
+        args:
+            writer (asyncio.StreamWriter): stream of a client
+        returns:
+            None
+        """
+        self.clients.append(writer)
+        if self.player is None:
+            self.player = writer
+        self.send(writer, encode_snapshot(self.game_state))
+
+    def leave(self, writer):
+        """Removes a client, passes control to the next one if needed."""
+        if writer in self.clients:
+            self.clients.remove(writer)
+        if self.player is writer:
+            self.player = self.clients[0] if self.clients else None
+
+    def turn(self, writer, direction):
+        """Queues a turn of the snake if a client controls it."""
+        if writer is self.player:
+            self.game_state.snake.turn(direction)
+
+    def tick(self):
+        """
+        Advances the game by one tick and sends changes to all clients.
+
+        args:
+            None
+        returns:
+            str | None: event of the tick
+        """
+        game_state = self.game_state
+        moves = game_state.store.moves
+        event = game_state.step()
+        if event in GAME_OVER_EVENTS:
+            message = encode_snapshot(game_state, event)
+        else:
+            message = encode_delta(game_state, event, moves)
+        moves.clear()
+        for writer in list(self.clients):
+            self.send(writer, message)
+        return event
+
+    def send(self, writer, message):
+        """Writes a message to a client or drops a client that lags."""
+        if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.leave(writer)
+            writer.close()
+            return
+        writer.write(message)
+        self.bytes_sent += len(message)
+
+    async def run(self):
+        """
+        Ticks the game on schedule until cancelled.
+
+        args:
+            None
+        returns:
+            None
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            deadline += 1 / (self.tick_rate or self.game_state.speed)
+            delay = deadline - loop.time()
+            if delay < -MAX_TICK_LAG:
+                deadline -= delay
+            await asyncio.sleep(max(delay, 0))
+            self.tick()
+
+
+class GameServer:
+    """
+    Rooms of a server and handling of client connections.
+
+    args:
+        width, height (int): board size of new rooms in cells
+        rocks (int): amount of rocks in new rooms
+        tick_rate (float | None): ticks per second of all rooms, speed
+            of their games if not given
+        seed (int | None): seed of seeds of new rooms` games
+    """
+
+    def __init__(
+        self,
+        width=GRID_WIDTH,
+        height=GRID_HEIGHT,
+        rocks=ROCKS_GENERATED,
+        tick_rate=None,
+        seed=None,
+    ):
+        self.width = width
+        self.height = height
+        self.rocks = rocks
+        self.tick_rate = tick_rate
+        self.rng = Random(seed)
+        self.rooms = {}
+        self.rooms_created = 0
+        self.bytes_sent_by_closed = 0
+
+    def join(self, name, writer):
+        """
+        Adds a client to a room, creates and starts the room if needed.
+
+        args:
+            name (str): name of a room, empty for a new private room
+            writer (asyncio.StreamWriter): stream of a client
+        returns:
+            Room
+        """
+        if not name:
+            name = self._private_room_name()
+        room = self.rooms.get(name)
+        if room is None:
+            game_state = GameState(
+                width=self.width,
+                height=self.height,
+                rocks=self.rocks,
+                seed=self.rng.getrandbits(64),
+            )
+            room = Room(name, game_state, self.tick_rate)
+            self.rooms[name] = room
+            self.rooms_created += 1
+            room.task = asyncio.create_task(room.run())
+        room.join(writer)
+        return room
+
+    def _private_room_name(self):
+        number = self.rooms_created
+        while f'#{number}' in self.rooms:
+            number += 1
+        return f'#{number}'
+
+    def leave(self, room, writer):
+        """Removes a client from a room, closes the room if it is empty."""
+        room.leave(writer)
+        if not room.clients and self.rooms.get(room.name) is room:
+            room.task.cancel()
+            del self.rooms[room.name]
+            self.bytes_sent_by_closed += room.bytes_sent
+
+    async def handle_client(self, reader, writer):
+        """
+        Serves a client connection: HELLO, then any amount of TURN.
+
+        args:
+            reader (asyncio.StreamReader): stream from a client
+            writer (asyncio.StreamWriter): stream to a client
+        returns:
+            None
+        """
+        room = None
+        try:
+            message_type, payload = await read_message(reader)
+            if message_type != HELLO:
+                raise ProtocolError('HELLO expected')
+            room = self.join(payload.decode(), writer)
+            while True:
+                message_type, payload = await read_message(reader)
+                if message_type != TURN or len(payload) != 1:
+                    raise ProtocolError('TURN expected')
+                if payload[0] >= len(DIRECTIONS):
+                    raise ProtocolError(f'unknown direction {payload[0]}')
+                room.turn(writer, DIRECTIONS[payload[0]])
+        except (
+            asyncio.IncompleteReadError,
+            ConnectionError,
+            ProtocolError,
+            UnicodeDecodeError,
+        ):
+            pass
+        finally:
+            if room is not None:
+                self.leave(room, writer)
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts listening for clients.
+
+        args:
+            host (str): address to listen on
+            port (int): port to listen on, 0 for any free one
+        returns:
+            asyncio.Server
+        """
+        return await asyncio.start_server(
+            self.handle_client, host, port, backlog=LISTEN_BACKLOG
+        )
+
+    def stats(self):
+        """Amount of open rooms, connected clients and bytes sent."""
+        rooms = self.rooms.values()
+        return (
+            len(self.rooms),
+            sum(len(room.clients) for room in rooms),
+            self.bytes_sent_by_closed + sum(room.bytes_sent for room in rooms),
+        )
+
+
+async def serve(args):
+    """Runs a server until interrupted, printing its statistics."""
+    server = GameServer(
+        width=args.width,
+        height=args.height,
+        rocks=args.rocks,
+        tick_rate=args.tick_rate,
+        seed=args.seed,
+    )
+    listener = await server.start(args.host, args.port)
+    print(f'listening on {args.host}:{args.port}', flush=True)
+    async with listener:
+        previous_sent = 0
+        previous_time = time.perf_counter()
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            rooms, clients, sent = server.stats()
+            now = time.perf_counter()
+            rate = (sent - previous_sent) / (now - previous_time)
+            print(
+                f'rooms={rooms} clients={clients} '
+                f'sent={rate / 1024:.1f}KB/s',
+                flush=True,
+            )
+            previous_sent, previous_time = sent, now
+
+
+def parse_args(argv=None):
+    """Parses command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Multiplayer Snake server.'
+    )
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--width', type=int, default=GRID_WIDTH)
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT)
+    parser.add_argument('--rocks', type=int, default=ROCKS_GENERATED)
+    parser.add_argument(
+        '--tick-rate', type=float, default=None,
+        help='ticks per second of every room, game speed by default',
+    )
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs the server."""
+    try:
+        asyncio.run(serve(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
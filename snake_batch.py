@@ -0,0 +1,347 @@
+"""
+Batched Snake simulator
+=======================
+Advances many independent games at once with NumPy.
+
+Rules are the same as in 'snake_core': the snake moves one cell per tick
+over a wrapping board, apples and rocks live a random amount of ticks,
+blink before vanishing and respawn at a random empty cell. Eating an apple
+grows the snake, hitting a rock or itself resets the board.
+
+All state is kept in arrays with one row per board:
+- grid: kind of object in every cell (EMPTY, SNAKE, APPLE, ROCK)
+- body: ring buffer of snake segments, 'head_slots' points to the head
+- apple/rock positions, life and blink counters
+- speed, direction and length of every snake
+
+Usage:
+    batch = BatchGameState(boards=4096, seed=1)
+    events = batch.step(actions)  # actions: indexes in DIRECTIONS or -1
+"""
+
+import numpy as np
+
+from snake_core import (
+    APPLE_BLINK_SPEED_IN_TICKS,
+    APPLE_EATEN,
+    APPLE_LIFE_IN_TICKS,
+    BOARD_FILLED,
+    DIRECTIONS,
+    GRID_HEIGHT,
+    GRID_WIDTH,
+    HIT_ROCK,
+    HIT_SELF,
+    LOW_LIFE_IN_TICKS,
+    RIGHT,
+    ROCK_BLINK_SPEED_IN_TICKS,
+    ROCK_LIFE_IN_TICKS,
+    ROCKS_GENERATED,
+    SPEED_STEP,
+    START_SPEED,
+)
+
+# Содержимое ячеек игрового поля:
+EMPTY = 0
+SNAKE = 1
+APPLE = 2
+ROCK = 3
+
+# Коды событий, которые возвращает BatchGameState.step():
+NO_EVENT = 0
+EVENTS = (None, APPLE_EATEN, HIT_ROCK, HIT_SELF, BOARD_FILLED)
+EVENT_CODES = {event: code for code, event in enumerate(EVENTS)}
+
+# Действие "не менять направление":
+NO_ACTION = -1
+
+# Смещения по осям для направлений из DIRECTIONS:
+DIRECTION_X = np.array([dx for dx, _ in DIRECTIONS], dtype=np.int64)
+DIRECTION_Y = np.array([dy for _, dy in DIRECTIONS], dtype=np.int64)
+OPPOSITE_DIRECTIONS = np.array(
+    [DIRECTIONS.index((-dx, -dy)) for dx, dy in DIRECTIONS], dtype=np.int8
+)
+
+# Сколько раз выбирать случайную ячейку, прежде чем искать пустые явно:
+PLACEMENT_ATTEMPTS = 8
+
+
+class BatchGameState:
+    """
+    State of many independent games advanced by one vectorized call.
+
+    args:
+        boards (int): amount of games
+        width, height (int): board size in cells
+        rocks (int): amount of rocks on every board
+        seed: seed of the batch random generator
+    """
+
+    def __init__(
+        self,
+        boards,
+        width=GRID_WIDTH,
+        height=GRID_HEIGHT,
+        rocks=ROCKS_GENERATED,
+        seed=None,
+    ):
+        self.boards = boards
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.rocks = rocks
+        self.rng = np.random.default_rng(seed)
+        self.board_indexes = np.arange(boards)
+        self.center = height // 2 * width + width // 2
+
+        self.grid = np.zeros((boards, self.size), dtype=np.uint8)
+        self.body = np.zeros((boards, self.size), dtype=np.int32)
+        self.head_slots = np.zeros(boards, dtype=np.int64)
+        self.lengths = np.ones(boards, dtype=np.int64)
+        self.directions = np.zeros(boards, dtype=np.int8)
+        self.speeds = np.zeros(boards, dtype=np.int64)
+
+        self.apple_positions = np.zeros(boards, dtype=np.int64)
+        self.apple_life = np.zeros(boards, dtype=np.int64)
+        self.apple_blink_counts = np.zeros(boards, dtype=np.int64)
+        self.apple_blinked = np.zeros(boards, dtype=bool)
+
+        self.rock_positions = np.zeros((boards, rocks), dtype=np.int64)
+        self.rock_life = np.zeros((boards, rocks), dtype=np.int64)
+        self.rock_blink_counts = np.zeros((boards, rocks), dtype=np.int64)
+        self.rock_blinked = np.zeros((boards, rocks), dtype=bool)
+
+        self.ticks = 0
+        self.reset()
+
+    @property
+    def heads(self):
+        """Cell index of every snake`s head."""
+        return self.body[self.board_indexes, self.head_slots]
+
+    def snake_positions(self, board):
+        """
+        Returns cells of a single snake, head first.
+
+        args:
+            board (int): index of a board
+        returns:
+            numpy.ndarray: cell indexes
+        """
+        slots = (
+            self.head_slots[board] - np.arange(self.lengths[board])
+        ) % self.size
+        return self.body[board, slots]
+
+    def reset(self, boards=None):
+        """
+        Resets given boards (all by default) to starting state.
+
+        args:
+            boards (numpy.ndarray | None): indexes of boards to reset
+        returns:
+            None
+        """
+        if boards is None:
+            boards = self.board_indexes
+        if not len(boards):
+            return
+        self.grid[boards] = EMPTY
+        self.grid[boards, self.center] = SNAKE
+        self.body[boards, 0] = self.center
+        self.head_slots[boards] = 0
+        self.lengths[boards] = 1
+        self.directions[boards] = DIRECTIONS.index(RIGHT)
+        self.speeds[boards] = START_SPEED
+
+        self.apple_positions[boards] = self._place(boards, APPLE)
+        self.apple_life[boards] = self._roll_life(len(boards), APPLE)
+        self.apple_blinked[boards] = False
+
+        if self.rocks:
+            rock_boards = np.repeat(boards, self.rocks)
+            self.rock_positions[boards] = self._place(
+                rock_boards, ROCK
+            ).reshape(-1, self.rocks)
+            self.rock_life[boards] = self._roll_life(
+                len(rock_boards), ROCK
+            ).reshape(-1, self.rocks)
+            self.rock_blinked[boards] = False
+
+    def step(self, actions=None):
+        """
+        Advances every board by one tick:
+        1. applies direction changes, turning back is ignored
+        2. moves snakes
+        3. updates lifespan of apples and rocks
+        4. resolves collisions and resets boards where snake died
+
+        args:
+            actions (array-like | None): index in DIRECTIONS for every
+                board or NO_ACTION to keep current direction
+        returns:
+            numpy.ndarray: event code for every board, see EVENTS
+        """
+        boards = self.board_indexes
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int8)
+            turning = (
+                (actions != NO_ACTION)
+                & (actions != OPPOSITE_DIRECTIONS[self.directions])
+            )
+            self.directions[turning] = actions[turning]
+
+        heads = self.heads
+        rows, columns = np.divmod(heads, self.width)
+        new_heads = (
+            (rows + DIRECTION_Y[self.directions]) % self.height * self.width
+            + (columns + DIRECTION_X[self.directions]) % self.width
+        )
+        tail_slots = (self.head_slots - self.lengths + 1) % self.size
+        tails = self.body[boards, tail_slots]
+
+        # Tail is left in place until growth is known, so its cell
+        # does not count as a hit and can`t be taken by a respawn.
+        hit_self = (
+            (self.grid[boards, new_heads] == SNAKE) & (new_heads != tails)
+        )
+        self.head_slots = (self.head_slots + 1) % self.size
+        self.body[boards, self.head_slots] = new_heads
+        self.grid[boards, new_heads] = SNAKE
+        self.ticks += 1
+
+        self._update_life(new_heads)
+
+        events = np.zeros(self.boards, dtype=np.uint8)
+        ate = ~hit_self & (self.apple_positions == new_heads)
+        hit_rock = ~hit_self & ~ate & (
+            self.rock_positions == new_heads[:, None]
+        ).any(axis=1)
+
+        cut_tails = ~ate & (tails != new_heads)
+        self.grid[boards[cut_tails], tails[cut_tails]] = EMPTY
+        self.lengths[ate] += 1
+
+        events[ate] = EVENT_CODES[APPLE_EATEN]
+        filled = self._eat_apples(np.flatnonzero(ate))
+        events[filled] = EVENT_CODES[BOARD_FILLED]
+        events[hit_rock] = EVENT_CODES[HIT_ROCK]
+        events[hit_self] = EVENT_CODES[HIT_SELF]
+
+        self.reset(np.flatnonzero(hit_rock | hit_self | filled))
+        self_hit_boards = np.flatnonzero(hit_self)
+        self.directions[self_hit_boards] = self.rng.integers(
+            len(DIRECTIONS), size=len(self_hit_boards)
+        )
+        return events
+
+    def _eat_apples(self, boards):
+        """Grows snakes, respawns apples. Returns mask of filled boards."""
+        filled = np.zeros(self.boards, dtype=bool)
+        if not len(boards):
+            return filled
+        self.speeds[boards] += SPEED_STEP
+        cells = self._place(boards, APPLE)
+        placed = cells >= 0
+        filled[boards[~placed]] = True
+        boards = boards[placed]
+        self.apple_positions[boards] = cells[placed]
+        self.apple_life[boards] = self._roll_life(len(boards), APPLE)
+        self.apple_blinked[boards] = False
+        return filled
+
+    def _update_life(self, heads):
+        """Decreases life counters, blinks and respawns expired objects."""
+        self.apple_life -= 1
+        self._blink(
+            self.apple_life,
+            self.apple_blink_counts,
+            self.apple_blinked,
+            APPLE_BLINK_SPEED_IN_TICKS,
+        )
+        expired = np.flatnonzero(self.apple_life <= 0)
+        if len(expired):
+            self._free_cells(expired, self.apple_positions[expired], heads)
+            self.apple_positions[expired] = self._place(expired, APPLE)
+            self.apple_life[expired] = self._roll_life(len(expired), APPLE)
+            self.apple_blinked[expired] = False
+
+        if not self.rocks:
+            return
+        self.rock_life -= 1
+        self._blink(
+            self.rock_life,
+            self.rock_blink_counts,
+            self.rock_blinked,
+            ROCK_BLINK_SPEED_IN_TICKS,
+        )
+        expired_boards, expired_slots = np.nonzero(self.rock_life <= 0)
+        if len(expired_boards):
+            old_cells = self.rock_positions[expired_boards, expired_slots]
+            self._free_cells(expired_boards, old_cells, heads)
+            self.rock_positions[expired_boards, expired_slots] = self._place(
+                expired_boards, ROCK
+            )
+            self.rock_life[expired_boards, expired_slots] = self._roll_life(
+                len(expired_boards), ROCK
+            )
+            self.rock_blinked[expired_boards, expired_slots] = False
+
+    def _free_cells(self, boards, positions, heads):
+        """Frees cells of expired objects unless a snake has entered it."""
+        free = positions != heads[boards]
+        self.grid[boards[free], positions[free]] = EMPTY
+
+    @staticmethod
+    def _blink(life, blink_counts, blinked, blink_speed):
+        """Same blinking pattern as 'snake_core.BlinkableMixin'."""
+        low = (life > 0) & (life <= LOW_LIFE_IN_TICKS)
+        restart = low & (blink_counts == blink_speed)
+        even = low & ~restart & (blink_counts % 2 == 0)
+        odd = low & ~restart & ~even
+        blink_counts[restart] = 0
+        blink_counts[even | odd] += 1
+        blinked[restart | even] = False
+        blinked[odd] = True
+
+    def _roll_life(self, amount, kind):
+        """Random lifespans for new apples or rocks."""
+        low, high = (
+            APPLE_LIFE_IN_TICKS if kind == APPLE else ROCK_LIFE_IN_TICKS
+        )
+        return self.rng.integers(low, high + 1, size=amount)
+
+    def _place(self, boards, kind):
+        """
+        Puts objects of a kind at random empty cells. Boards may repeat.
+        Cells are sampled at random first, boards where that keeps
+        failing are searched for empty cells explicitly.
+
+        args:
+            boards (numpy.ndarray): board index for every object
+            kind (int): APPLE or ROCK
+        returns:
+            numpy.ndarray: cell index for every object, -1 if board is full
+        """
+        grid = self.grid.reshape(-1)
+        cells = np.full(len(boards), -1, dtype=np.int64)
+        pending = np.arange(len(boards))
+        for _ in range(PLACEMENT_ATTEMPTS):
+            if not len(pending):
+                return cells
+            candidates = self.rng.integers(self.size, size=len(pending))
+            keys = boards[pending] * self.size + candidates
+            accepted = grid[keys] == EMPTY
+            _, first = np.unique(keys, return_index=True)
+            is_first = np.zeros(len(keys), dtype=bool)
+            is_first[first] = True
+            accepted &= is_first
+            grid[keys[accepted]] = kind
+            cells[pending[accepted]] = candidates[accepted]
+            pending = pending[~accepted]
+
+        for index in pending:
+            empty = np.flatnonzero(self.grid[boards[index]] == EMPTY)
+            if len(empty):
+                cells[index] = empty[self.rng.integers(len(empty))]
+                self.grid[boards[index], cells[index]] = kind
+        return cells
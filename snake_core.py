@@ -0,0 +1,1019 @@
+"""
+The Snake Game core
+===================
+Game rules without rendering, input handling or pygame dependency.
+
+Board is a torus of GRID_WIDTH x GRID_HEIGHT cells. Every position is
+a flat cell index: index = row * width + column.
+
+Main entry point is GameState - it owns the board, the snake, an apple,
+rocks, the game speed and a seedable random generator. Each call to
+GameState.step() advances the game by exactly one tick, so the same seed
+and the same actions always produce the same game.
+"""
+
+from array import array
+from collections import deque
+from random import Random
+
+# Параметры яблок(а)
+APPLE_LIFE_IN_TICKS = [25, 70]
+APPLE_BLINK_SPEED_IN_TICKS = 3
+
+# Параметры камня(ей)
+ROCKS_GENERATED = 5
+ROCK_LIFE_IN_TICKS = [40, 150]
+ROCK_BLINK_SPEED_IN_TICKS = 3
+
+# Объект начинает мигать, когда ему осталось жить столько тиков:
+LOW_LIFE_IN_TICKS = 20
+
+# Количество ячеек колеса таймеров (степень двойки). Объекты, которые
+# должны проснуться позже, чем через оборот колеса, ждут в своей ячейке:
+TIMER_WHEEL_SIZE = 256
+
+# Размер игрового поля в ячейках:
+GRID_WIDTH, GRID_HEIGHT = 32, 24
+
+# Тип массивов пустых клеток поля (см. модуль array):
+BOARD_ARRAY_TYPECODE = 'i'
+
+# Направления движения:
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+DIRECTIONS = (LEFT, RIGHT, UP, DOWN)
+
+# Номер противоположного направления для каждого из DIRECTIONS:
+OPPOSITE = tuple(DIRECTIONS.index((-dx, -dy)) for dx, dy in DIRECTIONS)
+
+# Зерна игр хранятся в снимках и логах как u64:
+MAX_SEED = 2**64 - 1
+
+# Скорость движения змейки:
+START_SPEED = 6
+SPEED_STEP = 0
+
+# Сколько поворотов можно нажать заранее. Каждый тик выполняется один
+# поворот из очереди, так быстрые повороты подряд не теряются:
+TURN_QUEUE_SIZE = 3
+
+# События, которые возвращает GameState.step():
+APPLE_EATEN = 'apple'
+HIT_ROCK = 'rock'
+HIT_SELF = 'self'
+HIT_SNAKE = 'snake'
+BOARD_FILLED = 'win'
+GAME_OVER_EVENTS = (HIT_ROCK, HIT_SELF, HIT_SNAKE, BOARD_FILLED)
+
+
+class BoardIsFullError(Exception):
+    """Raised when there is no empty cell left to place an object in."""
+
+
+class OccupancyGrid:
+    """
+    Persistent map of taken cells on a game field.
+
+    Stores an occupancy counter per grid cell in a flat bytearray, so objects
+    only touch the cells they enter and leave instead of rebuilding a list of
+    every taken cell on each move.
+    A counter is used rather than a flag: snake head may briefly share a cell
+    with an apple, a rock or its own body before collision is resolved.
+
+    Empty cells are also kept in a swap-remove array ('empty_cells') with
+    a reverse map of their slots ('empty_slots'), so a random empty cell is
+    picked in O(1) however full the board is. Both are typed arrays, so
+    a board can be saved and restored as a block of memory.
+
+    Apples and rocks are also registered in 'items' by their cell, so
+    finding out what the snake`s head has entered is a single lookup
+    however many objects there are.
+
+    If 'changes' is set to a list, every cell that becomes taken or
+    empty is appended to it, e.g. to update maps of a board that are
+    costly to rebuild (see 'fields.py').
+    """
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.cells = bytearray(self.size)
+        self.empty_cells = array(BOARD_ARRAY_TYPECODE, range(self.size))
+        self.empty_slots = array(BOARD_ARRAY_TYPECODE, range(self.size))
+        self.items = {}
+        self._neighbours = None
+        # Журнал клеток, которые заняли или освободили, если он нужен:
+        self.changes = None
+
+    @property
+    def center(self):
+        """Index of a cell in the middle of a board."""
+        return self.height // 2 * self.width + self.width // 2
+
+    def neighbour(self, index, direction):
+        """
+        Returns index of an adjacent cell. Warps over board edges.
+
+        args:
+            index (int): cell index
+            direction (tuple): one of UP, DOWN, LEFT, RIGHT
+        returns:
+            int: cell index
+        """
+        row, column = divmod(index, self.width)
+        return (
+            (row + direction[1]) % self.height * self.width
+            + (column + direction[0]) % self.width
+        )
+
+    @property
+    def neighbours(self):
+        """
+        Adjacent cells of every cell in order of DIRECTIONS: a list of
+        tuples built on first use, so path searches over a board do not
+        compute 'neighbour' again and again.
+        """
+        if self._neighbours is None:
+            self._neighbours = [
+                tuple(self.neighbour(index, direction)
+                      for direction in DIRECTIONS)
+                for index in range(self.size)
+            ]
+        return self._neighbours
+
+    def occupy(self, index):
+        """Marks a cell as taken by one more object."""
+        if not self.cells[index]:
+            self._remove_empty(index)
+        if self.cells[index] < 255:
+            self.cells[index] += 1
+
+    def release(self, index):
+        """Marks a cell as left by one object."""
+        if self.cells[index]:
+            self.cells[index] -= 1
+            if not self.cells[index]:
+                self._add_empty(index)
+
+    def put(self, index, item):
+        """
+        Places an item (apple, rock) in a cell and marks the cell taken.
+
+        args:
+            index (int): cell index
+            item: object to find by the cell with 'item_at'
+        returns:
+            None
+        """
+        self.occupy(index)
+        self.items[index] = item
+
+    def take(self, index):
+        """Removes an item placed with 'put' from a cell."""
+        self.release(index)
+        self.items.pop(index, None)
+
+    def item_at(self, index):
+        """Returns an item placed in a cell or None."""
+        return self.items.get(index)
+
+    def is_empty(self, index):
+        """Returns True if nothing is placed in a cell."""
+        return not self.cells[index]
+
+    def random_empty_cell(self, rng):
+        """
+        Picks a random empty cell in constant time.
+
+        args:
+            rng (random.Random): random generator to pick with
+        returns:
+            int: cell index
+        raises:
+            BoardIsFullError: if every cell is taken
+        """
+        if not self.empty_cells:
+            raise BoardIsFullError('There is no empty cell on a game field.')
+        return self.empty_cells[rng.randrange(len(self.empty_cells))]
+
+    def _remove_empty(self, index):
+        if self.changes is not None:
+            self.changes.append(index)
+        slot = self.empty_slots[index]
+        last_index = self.empty_cells.pop()
+        if last_index != index:
+            self.empty_cells[slot] = last_index
+            self.empty_slots[last_index] = slot
+        self.empty_slots[index] = -1
+
+    def _add_empty(self, index):
+        if self.changes is not None:
+            self.changes.append(index)
+        self.empty_slots[index] = len(self.empty_cells)
+        self.empty_cells.append(index)
+
+    def __contains__(self, index):
+        """Allows 'index in grid' checks for taken cells."""
+        return bool(self.cells[index])
+
+
+def greedy_direction(board, head, direction, target):
+    """
+    Direction of a greedy step towards a target over the shortest
+    wrapped distance. Steps into cells taken right now (the target
+    aside) and back are avoided. Costs O(1).
+
+    args:
+        board (OccupancyGrid): board of a snake
+        head (int): cell of the snake`s head
+        direction (tuple): current direction of the snake
+        target (int): cell to head for
+    returns:
+        tuple | None: direction to turn to, None if every step is taken
+    """
+    width, height = board.width, board.height
+    half_width, half_height = width // 2, height // 2
+    row, column = divmod(head, width)
+    target_row, target_column = divmod(target, width)
+    # Смещения до цели по осям с учетом перехода через края поля:
+    dx = (target_column - column + half_width) % width - half_width
+    dy = (target_row - row + half_height) % height - half_height
+    cells = board.cells
+    neighbours = board.neighbours[head]
+    back = OPPOSITE[DIRECTIONS.index(direction)]
+    best_direction = None
+    best_distance = None
+    for index, step in enumerate(DIRECTIONS):
+        cell = neighbours[index]
+        if index == back or cells[cell] and cell != target:
+            continue
+        column_distance = abs(dx - step[0])
+        if column_distance > half_width:
+            column_distance = width - column_distance
+        row_distance = abs(dy - step[1])
+        if row_distance > half_height:
+            row_distance = height - row_distance
+        distance = column_distance + row_distance
+        if best_distance is None or distance < best_distance:
+            best_direction, best_distance = step, distance
+    return best_direction
+
+
+class TickScheduler:
+    """
+    Timing wheel of game ticks. Objects ask to be woken up at a tick
+    and only objects due at a tick are touched when time advances,
+    so apples and rocks that are not expiring cost nothing.
+
+    A woken object gets its 'update_life' called. Objects due at the
+    same tick are woken in order of registration, which keeps games
+    reproducible: an apple first, then rocks in order of creation.
+    Every object keeps the tick it expects in 'wake_tick' (-1 if none)
+    and has at most one entry in the wheel, in the slot of that tick:
+    rescheduling removes the previous entry.
+    """
+
+    def __init__(self, size=TIMER_WHEEL_SIZE):
+        self.tick = 0
+        self.slots = [[] for _ in range(size)]
+        self.mask = size - 1
+        self.registered = 0
+
+    def register(self, obj):
+        """Gives an object its place in the waking order."""
+        obj.wake_order = self.registered
+        obj.wake_tick = -1
+        self.registered += 1
+
+    def schedule(self, obj, tick):
+        """
+        Asks to wake an object up at a tick, replaces a previous request.
+
+        args:
+            obj: registered object with 'update_life' method
+            tick (int): tick in the future
+        returns:
+            None
+        """
+        if obj.wake_tick >= 0:
+            self.slots[obj.wake_tick & self.mask].remove(obj)
+        obj.wake_tick = tick
+        self.slots[tick & self.mask].append(obj)
+
+    def clear(self):
+        """Forgets all requests, no object is woken up until scheduled."""
+        for slot in self.slots:
+            for obj in slot:
+                obj.wake_tick = -1
+            slot.clear()
+
+    def advance(self):
+        """
+        Moves time one tick forward and wakes up due objects.
+
+        args:
+            None
+        returns:
+            None
+        """
+        self.tick += 1
+        tick = self.tick
+        slot = self.slots[tick & self.mask]
+        if not slot:
+            return
+        due = []
+        waiting = []
+        for obj in slot:
+            if obj.wake_tick == tick:
+                obj.wake_tick = -1
+                due.append(obj)
+            else:
+                waiting.append(obj)
+        slot[:] = waiting
+        if len(due) > 1:
+            due.sort(key=lambda obj: obj.wake_order)
+        for obj in due:
+            obj.update_life()
+
+    def waking_within(self, ticks):
+        """
+        Objects to be woken up during the next ticks, looked up in the
+        wheel only, without visiting other objects. Entries of the
+        scanned slots due at later rounds of the wheel are skipped, so
+        a call costs the objects waking up in those slots, not the time
+        a game has been played.
+
+        args:
+            ticks (int): amount of ticks, less than the size of the wheel
+        returns:
+            list: objects in order of their wake-ups
+        """
+        slots = self.slots
+        mask = self.mask
+        waking = []
+        for tick in range(self.tick + 1, self.tick + ticks + 1):
+            waking += [
+                obj for obj in slots[tick & mask] if obj.wake_tick == tick
+            ]
+        return waking
+
+
+class LifeUpdatableMixin:
+    """
+    Mixin that adds lifespan to a class.
+    Life is not counted down every tick: an object asks 'scheduler' to
+    wake it up when it expires, 'life' is counted from the current tick.
+    Expects attributes 'store', 'index', 'scheduler', 'rng',
+    'life_in_ticks' and method 'reset' to be defined. Methods called
+    by the scheduler read and write the arrays of 'store' directly,
+    not through properties of a view.
+    """
+
+    __slots__ = ()
+
+    @property
+    def life(self):
+        """Ticks left until an object expires."""
+        return self.expires_at - self.scheduler.tick
+
+    def start_life(self):
+        """
+        Rolls a random lifespan starting from the current tick and
+        schedules its end.
+
+        args:
+            None
+        returns:
+            None
+        """
+        scheduler = self.scheduler
+        now = scheduler.tick
+        expires_at = now + self.rng.randint(*self.life_in_ticks)
+        low_life_from = max(now + 1, expires_at - LOW_LIFE_IN_TICKS)
+        store = self.store
+        index = self.index
+        store.expires_at[index] = expires_at
+        store.low_life_from[index] = low_life_from
+        scheduler.schedule(self, expires_at)
+
+    def update_life(self):
+        """
+        Method is called by a scheduler when lifespan is over.
+        Triggers method 'reset'.
+
+        args:
+            None
+        returns:
+            None
+        """
+        self.reset()
+
+    def low_life_ticks(self):
+        """Amount of low life ticks passed in the current lifespan."""
+        store = self.store
+        index = self.index
+        last = min(self.scheduler.tick, store.expires_at[index] - 1)
+        return max(0, last - store.low_life_from[index] + 1)
+
+
+class RandomizibleCoordsMixin:
+    """
+    Mixin that forces initialized object to appear at random location.
+    Used for Apple and Rock classes, expects 'store', 'index', 'board'
+    and 'rng' attributes.
+    """
+
+    __slots__ = ()
+
+    def randomize_position(self):
+        """
+        Assigns a random empty position for an object.
+        Coords stays withing the game field.
+        Cell taken by an object itself is freed before picking a new one.
+
+        args:
+            None
+        returns:
+            None
+        raises:
+            BoardIsFullError: if there is no empty cell to move to
+        """
+        board = self.board
+        store = self.store
+        index = self.index
+        positions = store.position
+        is_placed = store.is_placed[index]
+        if is_placed:
+            board.take(positions[index])
+        try:
+            position = board.random_empty_cell(self.rng)
+        except BoardIsFullError:
+            if is_placed:
+                board.put(positions[index], self)
+            raise
+        positions[index] = position
+        board.put(position, self)
+        if not is_placed:
+            store.is_placed[index] = True
+
+
+def is_blink_tick(blink_tick_count, low_life_ticks, blink_speed):
+    """
+    Tells if an object is blinked at a tick, see BlinkableMixin.
+    Also used by clients that only know when low life of an object
+    starts.
+
+    args:
+        blink_tick_count (int): position in the blink cycle at the start
+            of a lifespan
+        low_life_ticks (int): low life ticks passed, the current included
+        blink_speed (int): 'low_life_blink_speed' of an object
+    returns:
+        bool
+    """
+    if low_life_ticks <= 0:
+        return False
+    count = (blink_tick_count + low_life_ticks - 1) % (blink_speed + 1)
+    return count % 2 == 1 and count != blink_speed
+
+
+class BlinkableMixin:
+    """
+    Mixin that allows blinking behaviour.
+    Applies to Apple and Rock classes.
+
+    Out of every blink cycle of 'low_life_blink_speed' + 1 low life
+    ticks the object is blinked once. The cycle goes on from where it
+    stopped in a previous lifespan, 'blink_tick_count' holds its position
+    at the start of the current one.
+    Expects 'store' and 'index' attributes and 'low_life_ticks' method
+    to be defined.
+    """
+
+    __slots__ = ()
+
+    @property
+    def is_blinked(self):
+        """True if the object has to be drawn blinked at this tick."""
+        return is_blink_tick(
+            self.blink_tick_count,
+            self.low_life_ticks(),
+            self.low_life_blink_speed,
+        )
+
+    def finish_blinking(self):
+        """Saves position in the blink cycle reached by the current tick."""
+        counts = self.store.blink_tick_count
+        index = self.index
+        counts[index] = (
+            (counts[index] + self.low_life_ticks())
+            % (self.low_life_blink_speed + 1)
+        )
+
+
+class ObjectStore:
+    """
+    Struct of arrays with the state of apples and rocks of one game.
+    Every field is a typed array with an entry per object, so numbers
+    are kept unboxed. Objects themselves are thin views with '__slots__'
+    holding an index and references shared by the whole game.
+    Board, random generator and scheduler are shared by all objects.
+    'low_life' holds objects that are blinking now, so a frontend can
+    redraw them without visiting every object. If 'moves' is set to
+    a list, every reset object is appended to it together with its
+    position before the reset, e.g. to send changes over network.
+
+    args:
+        board (OccupancyGrid | None): board to place objects on
+        rng (random.Random | None): random generator of a game
+        scheduler (TickScheduler | None): scheduler of lifespans
+    """
+
+    # Поля объектов: имя массива и его тип (см. модуль array):
+    FIELDS = (
+        ('position', 'q'),
+        ('expires_at', 'q'),
+        ('low_life_from', 'q'),
+        ('blink_tick_count', 'H'),
+        ('is_placed', 'b'),
+    )
+
+    def __init__(self, board=None, rng=None, scheduler=None):
+        self.board = board or OccupancyGrid()
+        self.rng = rng or Random()
+        self.scheduler = scheduler or TickScheduler()
+        for name, typecode in self.FIELDS:
+            setattr(self, name, array(typecode))
+        # Журнал перемещений (объект, старая позиция), если он нужен:
+        self.moves = None
+
+    def __len__(self):
+        """Amount of objects in a store."""
+        return len(self.position)
+
+    @property
+    def low_life(self):
+        """
+        Objects in the last ticks of their lifespans, the only ones that
+        can blink. Not kept up to date by ticks: they are the objects due
+        to expire within LOW_LIFE_IN_TICKS ticks, found in the wheel of
+        the scheduler when asked for.
+        """
+        tick = self.scheduler.tick
+        low_life_from = self.low_life_from
+        return {
+            obj
+            for obj in self.scheduler.waking_within(LOW_LIFE_IN_TICKS)
+            if obj.store is self and low_life_from[obj.index] <= tick
+        }
+
+    def add(self):
+        """
+        Adds an entry for a new object, all fields are zero.
+
+        returns:
+            int: index of the entry
+        """
+        for name, _ in self.FIELDS:
+            getattr(self, name).append(0)
+        return len(self) - 1
+
+
+def _stored(name):
+    """Property of a view that reads and writes its entry in a store."""
+
+    def get(self):
+        return getattr(self.store, name)[self.index]
+
+    def set(self, value):
+        getattr(self.store, name)[self.index] = value
+
+    return property(get, set, doc=f'Entry of the object in store.{name}.')
+
+
+class LifeLimitedObject(
+    LifeUpdatableMixin,
+    RandomizibleCoordsMixin,
+    BlinkableMixin,
+):
+    """
+    Base class for objects that appear at a random location, live
+    a random amount of ticks, blink and move elsewhere.
+    Is a view of an entry in ObjectStore, which is created for an object
+    if not given.
+
+    Subclasses:
+        Apple, Rock
+    """
+
+    # Общие ссылки и очередь в планировщике читаются при каждом сбросе,
+    # поэтому хранятся в самом объекте, а не в массивах хранилища:
+    __slots__ = (
+        'store', 'index', 'board', 'rng', 'scheduler',
+        'wake_tick', 'wake_order',
+    )
+
+    position = _stored('position')
+    expires_at = _stored('expires_at')
+    low_life_from = _stored('low_life_from')
+    blink_tick_count = _stored('blink_tick_count')
+    is_placed = _stored('is_placed')
+
+    def __init__(self, board=None, rng=None, scheduler=None, store=None):
+        if store is None:
+            store = ObjectStore(board, rng, scheduler)
+        self.store = store
+        self.index = store.add()
+        self.board = store.board
+        self.rng = store.rng
+        self.scheduler = store.scheduler
+        self.scheduler.register(self)
+        self.randomize_position()
+        self.start_life()
+
+    def reset(self):
+        """Moves an object to a new location with a new lifespan."""
+        store = self.store
+        if store.moves is not None:
+            store.moves.append((self, store.position[self.index]))
+        self.finish_blinking()
+        self.randomize_position()
+        self.start_life()
+
+
+class Apple(LifeLimitedObject):
+    """
+    Apple rules.
+    - Apple has a random lifetime and disappears if hasn`t been picked up.
+    - Blinks on final lifespan phase.
+
+    Picking up:
+    - increases the snake`s length by 1 segment.
+    - increases the snake`s speed by fixed amount.
+    - generates a new apple at a random location.
+    """
+
+    __slots__ = ()
+
+    life_in_ticks = APPLE_LIFE_IN_TICKS
+    low_life_blink_speed = APPLE_BLINK_SPEED_IN_TICKS
+    collision_event = APPLE_EATEN
+
+
+class Rock(LifeLimitedObject):
+    """
+    Rock rules.
+    - Rock has a random lifetime and disappears over time.
+    - Blinks on final lifespan phase.
+
+    Hitting rock:
+    - kills your snake instantly.
+    - decreases snake`s length to 1.
+    - decreases snake`s speed to default speed.
+    """
+
+    __slots__ = ()
+
+    life_in_ticks = ROCK_LIFE_IN_TICKS
+    low_life_blink_speed = ROCK_BLINK_SPEED_IN_TICKS
+    collision_event = HIT_ROCK
+
+
+class Snake:
+    """
+    Snake rules.
+    -  Starting direction: right.
+    -  Starting length: 1.
+    -  Moves in discrete steps on grid.
+    -  Grows by consuming apples.
+    -  Dies upon hitting itself or any rock.
+
+    Body is kept in a deque (head first) together with a map of segments
+    per cell, so moving, growing and self-hit checks cost O(1) regardless
+    of the snake`s length.
+
+    Turns are queued: every tick applies one of them, so two quick turns
+    made within one tick take effect on two ticks in a row. Every turn
+    may carry a timestamp of when it was made, which is handed back when
+    the turn is applied to measure input latency.
+    """
+
+    def __init__(self, board=None, rng=None, position=None):
+        self.board = board or OccupancyGrid()
+        self.rng = rng or Random()
+        self.position = self.board.center if position is None else position
+        self.direction = RIGHT
+        # Очередь поворотов: пары (направление, время нажатия):
+        self.turns = deque()
+        self.length = 1
+        self.positions = deque()
+        self.segment_counts = {}
+        self.last = None
+        self.add_head(self.position)
+
+    def get_head_position(self):
+        """
+        Returns position of the snake`s head.
+
+        args:
+            None
+        returns:
+            int: cell index
+        """
+        return self.positions[0]
+
+    def reset(self):
+        """
+        Returns the snake to its starting cell with length of 1.
+
+        args:
+            None
+        returns:
+            None
+        """
+        for position in self.positions:
+            self.board.release(position)
+        self.length = 1
+        self.turns.clear()
+        self.positions = deque()
+        self.segment_counts = {}
+        self.last = None
+        self.add_head(self.position)
+
+    def add_head(self, position):
+        """
+        Adds a segment in front of the snake`s head.
+
+        args:
+            position (int): cell index
+        returns:
+            None
+        """
+        self.positions.appendleft(position)
+        self.segment_counts[position] = (
+            self.segment_counts.get(position, 0) + 1
+        )
+        self.board.occupy(position)
+
+    def remove_tail(self):
+        """
+        Cuts the last segment of the snake`s body.
+
+        args:
+            None
+        returns:
+            int: cell index of removed segment
+        """
+        position = self.positions.pop()
+        count = self.segment_counts[position] - 1
+        if count:
+            self.segment_counts[position] = count
+        else:
+            del self.segment_counts[position]
+        self.board.release(position)
+        return position
+
+    def is_hitting_itself(self):
+        """
+        Checks if the snake`s head shares a cell with its body.
+
+        args:
+            None
+        returns:
+            bool
+        """
+        return self.segment_counts[self.positions[0]] > 1
+
+    def move(self):
+        """
+        Implementation of 'movement' of a snake:
+        1. add head to heading direction
+        2. cut the tail segment if haven`t recently eaten an apple
+
+        Warping over game field edges.
+
+        args:
+            None
+        returns:
+            None
+        """
+        self.add_head(
+            self.board.neighbour(self.positions[0], self.direction)
+        )
+        self.last = self.remove_tail()
+
+    def grow(self):
+        """Method allows growing behavior on call."""
+        self.positions.append(self.last)
+        self.segment_counts[self.last] = (
+            self.segment_counts.get(self.last, 0) + 1
+        )
+        self.board.occupy(self.last)
+        self.last = None
+        self.length += 1
+
+    @property
+    def next_direction(self):
+        """Direction of the next move if a turn is queued, else None."""
+        return self.turns[0][0] if self.turns else None
+
+    def turn(self, direction, made_at=None):
+        """
+        Queues a turn. Turning back or to the same direction as the one
+        queued before (or the current one if the queue is empty) is
+        ignored, as well as turns beyond TURN_QUEUE_SIZE.
+
+        args:
+            direction (tuple): one of UP, DOWN, LEFT, RIGHT
+            made_at (int | None): when the turn was made, any clock
+        returns:
+            None
+        """
+        turns = self.turns
+        previous = turns[-1][0] if turns else self.direction
+        if (
+            len(turns) < TURN_QUEUE_SIZE
+            and direction != previous
+            and (direction[0] + previous[0], direction[1] + previous[1])
+            != (0, 0)
+        ):
+            turns.append((direction, made_at))
+
+    def update_direction(self):
+        """
+        Applies the first queued turn if there is one.
+
+        args:
+            None
+        returns:
+            int | None: 'made_at' of the applied turn
+        """
+        if not self.turns:
+            return None
+        self.direction, made_at = self.turns.popleft()
+        return made_at
+
+
+class GameState:
+    """
+    Complete state of a single game with deterministic tick function.
+
+    args:
+        width, height (int): board size in cells
+        rocks (int): amount of rocks on a board simultaneously
+        seed (int | None): seed of the game`s random generator,
+            a random one is chosen and kept in 'seed' if not given
+        snake_cls, apple_cls, rock_cls: classes to create game objects
+            with. Allows a frontend to attach rendering to game objects.
+    raises:
+        ValueError: if the seed is not from 0 to MAX_SEED
+    """
+
+    def __init__(
+        self,
+        width=GRID_WIDTH,
+        height=GRID_HEIGHT,
+        rocks=ROCKS_GENERATED,
+        seed=None,
+        snake_cls=Snake,
+        apple_cls=Apple,
+        rock_cls=Rock,
+    ):
+        if seed is None:
+            seed = Random().getrandbits(64)
+        elif not 0 <= seed <= MAX_SEED:
+            raise ValueError(
+                f'Seed has to be from 0 to {MAX_SEED}, not {seed}.'
+            )
+        self.seed = seed
+        self.rng = Random(seed)
+        self.board = OccupancyGrid(width, height)
+        self.speed = START_SPEED
+        self.scheduler = TickScheduler()
+        self.recorder = None
+        self.profiler = None
+        self.snake = snake_cls(
+            board=self.board, rng=self.rng, position=self.board.center
+        )
+        self.store = ObjectStore(self.board, self.rng, self.scheduler)
+        self.apple = apple_cls(store=self.store)
+        self.rocks = [rock_cls(store=self.store) for _ in range(rocks)]
+        # Обработчики столкновения головы змейки с предметом на доске:
+        self.collision_handlers = {
+            APPLE_EATEN: self._eat_apple,
+            HIT_ROCK: self._hit_rock,
+        }
+
+    @property
+    def ticks(self):
+        """Amount of ticks played."""
+        return self.scheduler.tick
+
+    @property
+    def objects(self):
+        """All game objects: snake, apple and rocks."""
+        return [self.snake, self.apple, *self.rocks]
+
+    @property
+    def snakes(self):
+        """Snakes of the game, the same as of an arena (see 'arena.py')."""
+        return [self.snake]
+
+    def step(self, action=None):
+        """
+        Advances game by one tick:
+        1. applies direction change (action or the first queued turn),
+           applied change is passed to 'recorder' if there is one
+        2. moves the snake
+        3. resets an apple and rocks whose lifespan is over
+        4. resolves collisions
+        Every phase is measured if 'profiler' is set, as well as time
+        from a queued turn being made to the move that applied it.
+
+        args:
+            action (tuple | None): direction to turn to
+        returns:
+            str | None: one of APPLE_EATEN, HIT_ROCK, HIT_SELF,
+                BOARD_FILLED or None if nothing happened
+        """
+        snake = self.snake
+        if action is not None:
+            snake.turn(action)
+        if self.recorder is None:
+            made_at = snake.update_direction()
+        else:
+            direction = snake.direction
+            made_at = snake.update_direction()
+            if snake.direction != direction:
+                self.recorder.record(self.ticks, snake.direction)
+        snake.move()
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.lap('move')
+            if made_at is not None:
+                profiler.input_applied(made_at)
+
+        self.scheduler.advance()
+        if profiler is not None:
+            profiler.lap('update_life')
+
+        event = self.check_collisions()
+        if profiler is not None:
+            profiler.lap('collisions')
+        return event
+
+    def check_collisions(self):
+        """
+        Check collisions of a snake`s head with game objects:
+        - Snake: (hit yourself) triggers death
+        - Apple: triggers growth
+        - Rock: triggers death
+        An object in the head`s cell is found with a single lookup in
+        the board and handled by its 'collision_event' handler.
+
+        args:
+            None
+        returns:
+            str | None: event that happened
+        """
+        snake = self.snake
+        if snake.is_hitting_itself():
+            return self._hit_self()
+        item = self.board.item_at(snake.get_head_position())
+        if item is None:
+            return None
+        return self.collision_handlers[item.collision_event](item)
+
+    def _hit_self(self):
+        self.reset()
+        self.snake.direction = self.rng.choice(DIRECTIONS)
+        return HIT_SELF
+
+    def _eat_apple(self, apple):
+        self.snake.grow()
+        self.increase_speed()
+        try:
+            apple.reset()
+        except BoardIsFullError:
+            # Snake has filled the whole field - game is won.
+            self.reset()
+            return BOARD_FILLED
+        return APPLE_EATEN
+
+    def _hit_rock(self, rock):
+        self.reset()
+        self.snake.direction = RIGHT
+        return HIT_ROCK
+
+    def increase_speed(self):
+        """Increases speed on call. Used in eating an apple condition."""
+        self.speed += SPEED_STEP
+
+    def reset(self):
+        """Resets all game objects and speed."""
+        for obj in self.objects:
+            obj.reset()
+        self.speed = START_SPEED
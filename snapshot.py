@@ -0,0 +1,327 @@
+"""
+State snapshots
+===============
+Saves the complete state of a game into a compact binary snapshot and
+restores it, e.g. to save and resume a game, to dump a game that has
+crashed or to fork simulations from a mid-game state.
+
+Unlike a replay log ('replay.py') a snapshot does not re-simulate the
+game: numbers are packed with struct and typed arrays are copied as
+is, so a board is restored in microseconds. Everything else (items on
+a board, segments of the snake, the timing wheel) is rebuilt from what
+is stored.
+
+Snapshot format (little-endian):
+    header:  magic b'SNKS', version (u8), seed (u64), width (u16),
+             height (u16), objects (u32), tick (i64), speed (u32),
+             direction (u8), start cell (u32), length (u32),
+             last tail cell (i32, -1 if none), snake cells (u32),
+             queued turns (u8)
+    turns:   direction of every queued turn (u8) - index in
+             snake_core.DIRECTIONS
+    random:  state of the game`s random generator: version (u8),
+             624 words and position (u32), gauss_next flag (u8) and
+             value (f64)
+    snake:   cells of the snake, head first (u32)
+    objects: every ObjectStore field of apples and rocks in order of
+             ObjectStore.FIELDS, an array at a time
+    board:   occupancy counter of every cell (u8)
+    empty:   empty cells in the order random cells are picked from (i32)
+    slots:   place of every cell in the empty cells, -1 if taken (i32)
+
+Timestamps of queued turns are not saved: they are only meaningful for
+the clock of the process that made them.
+"""
+
+import struct
+import sys
+from array import array
+from collections import deque, namedtuple
+from random import Random
+
+from snake_core import BOARD_ARRAY_TYPECODE, DIRECTIONS, GameState
+
+SNAPSHOT_MAGIC = b'SNKS'
+SNAPSHOT_VERSION = 2
+HEADER = struct.Struct('<4sBQHHIqIBIIiIB')
+RANDOM_STATE = struct.Struct('<B625IBd')
+
+# Массивы в снимке хранятся в little-endian, на машинах с обратным
+# порядком байт их приходится переворачивать:
+SWAP_BYTES = sys.byteorder != 'little'
+
+# Тип массива клеток змейки (см. модуль array):
+CELL_TYPECODE = 'I'
+
+# Змейка и все, что записано о ней и об игре до массивов объектов:
+_SnakeState = namedtuple('_SnakeState', (
+    'seed', 'tick', 'speed', 'direction', 'turns', 'random_state',
+    'start', 'length', 'last', 'positions',
+))
+
+
+class SnapshotFormatError(Exception):
+    """Raised when data is not a snapshot or does not fit a game."""
+
+
+def _array_bytes(values):
+    if SWAP_BYTES:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_array(view, offset, typecode, length):
+    values = array(typecode)
+    end = offset + length * values.itemsize
+    if end > len(view):
+        raise SnapshotFormatError('Snapshot is too short.')
+    values.frombytes(view[offset:end])
+    if SWAP_BYTES:
+        values.byteswap()
+    return values, end
+
+
+def save_state(game_state):
+    """
+    Packs the complete state of a game into a snapshot.
+
+    args:
+        game_state (GameState): game to save
+    returns:
+        bytes
+    """
+    snake = game_state.snake
+    board = game_state.board
+    store = game_state.store
+    turns = bytes(DIRECTIONS.index(direction) for direction, _ in snake.turns)
+    version, words, gauss_next = game_state.rng.getstate()
+    return b''.join((
+        HEADER.pack(
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_VERSION,
+            game_state.seed,
+            board.width,
+            board.height,
+            len(store),
+            game_state.ticks,
+            game_state.speed,
+            DIRECTIONS.index(snake.direction),
+            snake.position,
+            snake.length,
+            -1 if snake.last is None else snake.last,
+            len(snake.positions),
+            len(turns),
+        ),
+        turns,
+        RANDOM_STATE.pack(
+            version, *words, gauss_next is not None, gauss_next or 0.0
+        ),
+        _array_bytes(array(CELL_TYPECODE, snake.positions)),
+        *(_array_bytes(getattr(store, name)) for name, _ in store.FIELDS),
+        board.cells,
+        _array_bytes(board.empty_cells),
+        _array_bytes(board.empty_slots),
+    ))
+
+
+def read_header(data):
+    """
+    Parses the header of a snapshot.
+
+    args:
+        data (bytes): snapshot
+    returns:
+        dict: seed, width, height, rocks for GameState
+    raises:
+        SnapshotFormatError: if data is not a snapshot of known version
+    """
+    if len(data) < HEADER.size:
+        raise SnapshotFormatError('Snapshot is too short.')
+    magic, version, seed, width, height, objects = (
+        HEADER.unpack_from(data)[:6]
+    )
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotFormatError('Not a snapshot.')
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotFormatError(f'Unsupported snapshot version: {version}.')
+    return {'seed': seed, 'width': width, 'height': height,
+            'rocks': objects - 1}
+
+
+def load_state(data, **state_kwargs):
+    """
+    Creates a game from a snapshot.
+
+    args:
+        data (bytes): snapshot
+        state_kwargs: extra arguments passed to GameState, e.g. classes
+            of a frontend
+    returns:
+        GameState
+    raises:
+        SnapshotFormatError: if data is not a snapshot or is damaged
+    """
+    game_state = GameState(**read_header(data), **state_kwargs)
+    restore_state(game_state, data)
+    return game_state
+
+
+def restore_state(game_state, data):
+    """
+    Overwrites the state of a game with a snapshot in place. The game
+    has to have the same board size and amount of rocks, e.g. be the
+    one the snapshot was taken of: this is how a game is reset to
+    a saved point over and over again without creating objects.
+    The whole snapshot is read and checked before anything is
+    overwritten, so a damaged one leaves the game as it was.
+
+    args:
+        game_state (GameState): game to overwrite
+        data (bytes): snapshot
+    returns:
+        None
+    raises:
+        SnapshotFormatError: if data is not a snapshot, is damaged or
+            does not fit the game
+    """
+    settings = read_header(data)
+    board = game_state.board
+    if (
+        (settings['width'], settings['height'], settings['rocks'])
+        != (board.width, board.height, len(game_state.rocks))
+    ):
+        raise SnapshotFormatError(
+            'Snapshot of a {width}x{height} board with {rocks} rocks '
+            'does not fit the game.'.format(**settings)
+        )
+    view = memoryview(data)
+    try:
+        snake, offset = _read_snake(view, board.size)
+        objects, offset = _read_objects(
+            view, offset, game_state.store, board.size
+        )
+        cells, empty_cells, empty_slots = _read_board(
+            view, offset, board.size
+        )
+    except (IndexError, struct.error, TypeError, ValueError) as error:
+        raise SnapshotFormatError(f'Damaged snapshot: {error}') from error
+    _restore_snake(game_state, snake)
+    _restore_objects(game_state, objects)
+    board.cells[:] = cells
+    board.empty_cells = empty_cells
+    board.empty_slots = empty_slots
+
+
+def _check_cells(cells, size, what):
+    """Raises ValueError if any of the cells is off a board."""
+    if cells and not 0 <= min(cells) <= max(cells) < size:
+        raise ValueError(f'{what} are off the board')
+
+
+def _read_snake(view, size):
+    """Reads the header, queued turns, random state and the snake."""
+    (
+        _, _, seed, _, _, _, tick, speed, direction, start, length, last,
+        cells, turns,
+    ) = HEADER.unpack_from(view)
+    offset = HEADER.size
+    codes = bytes(view[offset:offset + turns])
+    if len(codes) != turns:
+        raise SnapshotFormatError('Snapshot is too short.')
+    offset += turns
+    if any(code >= len(DIRECTIONS) for code in (direction, *codes)):
+        raise ValueError('unknown direction')
+
+    version, *words, has_gauss, gauss_next = RANDOM_STATE.unpack_from(
+        view, offset
+    )
+    random_state = (version, tuple(words), gauss_next if has_gauss else None)
+    # Состояние проверяется на отдельном генераторе, а не на игровом:
+    Random().setstate(random_state)
+    offset += RANDOM_STATE.size
+
+    if cells < 1 or length < 1:
+        raise ValueError('the snake has no cells')
+    positions, offset = _read_array(view, offset, CELL_TYPECODE, cells)
+    _check_cells(positions, size, 'snake cells')
+    _check_cells([start] if last < 0 else [start, last], size, 'snake cells')
+    return _SnakeState(
+        seed=seed,
+        tick=tick,
+        speed=speed,
+        direction=DIRECTIONS[direction],
+        turns=[DIRECTIONS[code] for code in codes],
+        random_state=random_state,
+        start=start,
+        length=length,
+        last=None if last < 0 else last,
+        positions=positions,
+    ), offset
+
+
+def _read_objects(view, offset, store, size):
+    """Reads every field of apples and rocks."""
+    fields = {}
+    for name, typecode in store.FIELDS:
+        fields[name], offset = _read_array(
+            view, offset, typecode, len(store)
+        )
+    _check_cells(fields['position'], size, 'apples and rocks')
+    if len(set(fields['position'])) != len(store):
+        raise ValueError('apples and rocks share cells')
+    return fields, offset
+
+
+def _read_board(view, offset, size):
+    """Reads occupancy counters and empty cells of a board."""
+    end = offset + size
+    if end > len(view):
+        raise SnapshotFormatError('Snapshot is too short.')
+    cells = bytes(view[offset:end])
+    empty = cells.count(0)
+    empty_cells, end = _read_array(view, end, BOARD_ARRAY_TYPECODE, empty)
+    empty_slots, end = _read_array(view, end, BOARD_ARRAY_TYPECODE, size)
+    if end != len(view):
+        raise SnapshotFormatError('Snapshot is too long.')
+    # Каждая пустая клетка стоит на своем месте, остальные места -1:
+    _check_cells(empty_cells, size, 'empty cells')
+    if empty_slots.count(-1) != size - empty or any(
+        cells[cell] or empty_slots[cell] != slot
+        for slot, cell in enumerate(empty_cells)
+    ):
+        raise ValueError('empty cells do not match the board')
+    return cells, empty_cells, empty_slots
+
+
+def _restore_snake(game_state, state):
+    game_state.seed = state.seed
+    game_state.speed = state.speed
+    game_state.scheduler.tick = state.tick
+    game_state.rng.setstate(state.random_state)
+    snake = game_state.snake
+    snake.direction = state.direction
+    snake.turns = deque((direction, None) for direction in state.turns)
+    snake.position = state.start
+    snake.length = state.length
+    snake.last = state.last
+    snake.positions = deque(state.positions)
+    segment_counts = {}
+    for position in state.positions:
+        segment_counts[position] = segment_counts.get(position, 0) + 1
+    snake.segment_counts = segment_counts
+
+
+def _restore_objects(game_state, fields):
+    store = game_state.store
+    for name, values in fields.items():
+        setattr(store, name, values)
+
+    # Планировщик восстанавливается по срокам жизни, мигающие объекты
+    # он находит сам:
+    scheduler = game_state.scheduler
+    scheduler.clear()
+    objects = game_state.objects[1:]
+    game_state.board.items = dict(zip(store.position, objects))
+    for obj, expires_at in zip(objects, store.expires_at):
+        scheduler.schedule(obj, expires_at)
@@ -0,0 +1,327 @@
+"""
+Game statistics
+===============
+Every game over is kept in a local SQLite database: length of the
+snake, apples eaten, ticks played, cause of death and speed. Totals
+(games played, apples eaten, best length) and a leaderboard are read
+from it.
+
+Writes never block the game loop: 'StatsStore.record' only puts a
+death into a queue, a background thread writes queued deaths with its
+own connection, many in one transaction. A batch is collected for up
+to STATS_FLUSH_SECONDS after its first death or until it has
+STATS_BATCH_SIZE of them. Totals are kept up to date by a trigger in
+the database, so they are read in O(1) however many games are stored,
+and the leaderboard is read by an index on length.
+
+Usage:
+    python the_snake.py --stats snake_stats.sqlite3
+
+    # leaderboard of a database
+    python stats.py snake_stats.sqlite3 --top 10
+"""
+
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from queue import Empty, Queue
+
+from snake_core import APPLE_EATEN, GAME_OVER_EVENTS
+
+# Сколько смертей записывать одной транзакцией не больше:
+STATS_BATCH_SIZE = 256
+
+# Сколько секунд копить смерти для транзакции после первой из них:
+STATS_FLUSH_SECONDS = 0.5
+
+# Сколько строк в таблице лидеров по умолчанию:
+LEADERBOARD_SIZE = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deaths (
+    id INTEGER PRIMARY KEY,
+    died_at REAL NOT NULL,
+    length INTEGER NOT NULL,
+    apples INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    cause TEXT NOT NULL,
+    speed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deaths_by_length ON deaths (length DESC, ticks);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    games INTEGER NOT NULL,
+    apples INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    best_length INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS deaths_totals AFTER INSERT ON deaths
+BEGIN
+    UPDATE totals SET
+        games = games + 1,
+        apples = apples + NEW.apples,
+        ticks = ticks + NEW.ticks,
+        best_length = max(best_length, NEW.length)
+    WHERE id = 0;
+END;
+"""
+
+Death = namedtuple(
+    'Death', ('died_at', 'length', 'apples', 'ticks', 'cause', 'speed')
+)
+Totals = namedtuple('Totals', ('games', 'apples', 'ticks', 'best_length'))
+
+# Метка конца очереди записи:
+_CLOSE = object()
+
+
+class StatsWriteError(Exception):
+    """Raised when deaths could not be written to a database."""
+
+
+class StatsStore:
+    """
+    Database of game overs, see the module description.
+
+    args:
+        path (str): SQLite database file, created if there is none
+        batch_size (int): most deaths written in one transaction
+        flush_seconds (float): how long a batch is collected
+    """
+
+    def __init__(
+        self,
+        path,
+        batch_size=STATS_BATCH_SIZE,
+        flush_seconds=STATS_FLUSH_SECONDS,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.connection = self._connect()
+        self.connection.executescript(SCHEMA)
+        self.totals = Totals(*self.connection.execute(
+            'SELECT games, apples, ticks, best_length FROM totals'
+        ).fetchone())
+        self.error = None
+        self.queue = Queue()
+        self.writer = threading.Thread(
+            target=self._write_deaths, name='stats-writer', daemon=True
+        )
+        self.writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def record(self, death):
+        """
+        Queues a death to be written and adds it to 'totals' at once.
+        Never waits for the disk.
+
+        args:
+            death (Death): game over to keep
+        returns:
+            None
+        """
+        totals = self.totals
+        self.totals = Totals(
+            totals.games + 1,
+            totals.apples + death.apples,
+            totals.ticks + death.ticks,
+            max(totals.best_length, death.length),
+        )
+        self.queue.put(death)
+
+    def flush(self):
+        """Waits until every queued death is written."""
+        self.queue.join()
+        self._raise_error()
+
+    def close(self):
+        """
+        Writes queued deaths and stops the writer.
+
+        raises:
+            StatsWriteError: if some deaths could not be written
+        """
+        if self.writer.is_alive():
+            self.queue.put(_CLOSE)
+            self.writer.join()
+        self.connection.close()
+        self._raise_error()
+
+    def leaderboard(self, limit=LEADERBOARD_SIZE):
+        """
+        Longest snakes, shorter games first among equal lengths.
+
+        args:
+            limit (int): amount of deaths to return
+        returns:
+            list[Death]
+        """
+        rows = self.connection.execute(
+            'SELECT died_at, length, apples, ticks, cause, speed '
+            'FROM deaths ORDER BY length DESC, ticks LIMIT ?',
+            (limit,),
+        )
+        return [Death(*row) for row in rows]
+
+    def causes(self):
+        """
+        Games, best and average length per cause of death.
+
+        returns:
+            dict: cause -> (games, best length, average length)
+        """
+        rows = self.connection.execute(
+            'SELECT cause, COUNT(*), MAX(length), AVG(length) '
+            'FROM deaths GROUP BY cause'
+        )
+        return {cause: tuple(values) for cause, *values in rows}
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise StatsWriteError(
+                f'Could not write statistics to {self.path}.'
+            ) from self.error
+
+    def _write_deaths(self):
+        connection = self._connect()
+        try:
+            while True:
+                batch = self._next_batch()
+                closing = batch and batch[-1] is _CLOSE
+                if closing:
+                    batch.pop()
+                if batch:
+                    self._write_batch(connection, batch)
+                for _ in range(len(batch) + closing):
+                    self.queue.task_done()
+                if closing:
+                    return
+        finally:
+            connection.close()
+
+    def _next_batch(self):
+        """Waits for a death, then collects more for a while."""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_seconds
+        while batch[-1] is not _CLOSE and len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    batch.append(self.queue.get(timeout=timeout))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except Empty:
+                break
+        return batch
+
+    def _write_batch(self, connection, batch):
+        if self.error is not None:
+            return
+        try:
+            with connection:
+                connection.execute('BEGIN')
+                connection.executemany(
+                    'INSERT INTO deaths '
+                    '(died_at, length, apples, ticks, cause, speed) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    batch,
+                )
+        except sqlite3.Error as error:
+            self.error = error
+
+
+class DeathTracker:
+    """
+    Turns game over events of a game into Death records. The snake is
+    reset by the tick it dies at, so its length and speed are taken
+    from the tick before.
+
+    args:
+        game_state (GameState | Arena): game to follow, deaths of its
+            'snake' are tracked
+    """
+
+    def __init__(self, game_state):
+        self.game_state = game_state
+        self.games = 0
+        self._start_game()
+
+    def _start_game(self):
+        self.started_at = self.game_state.ticks
+        self.length = self.game_state.snake.length
+        self.start_length = self.length
+        self.speed = self.game_state.speed
+
+    def update(self, event):
+        """
+        Follows a tick of the game.
+
+        args:
+            event (str | None): what 'step' returned
+        returns:
+            Death | None: the death if the game is over
+        """
+        if event not in GAME_OVER_EVENTS:
+            if event == APPLE_EATEN:
+                self.length = self.game_state.snake.length
+                self.speed = self.game_state.speed
+            return None
+        death = Death(
+            died_at=time.time(),
+            length=self.length,
+            apples=self.length - self.start_length,
+            ticks=self.game_state.ticks - self.started_at,
+            cause=event,
+            speed=self.speed,
+        )
+        self.games += 1
+        self._start_game()
+        return death
+
+
+def parse_args(argv=None):
+    """Parses command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Leaderboard of the Snake statistics.'
+    )
+    parser.add_argument('path', help='SQLite database of statistics')
+    parser.add_argument('--top', type=int, default=LEADERBOARD_SIZE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Prints totals, the leaderboard and deaths by cause."""
+    args = parse_args(argv)
+    store = StatsStore(args.path)
+    try:
+        totals = store.totals
+        print(
+            f'games={totals.games} apples={totals.apples} '
+            f'ticks={totals.ticks} best_length={totals.best_length}'
+        )
+        for place, death in enumerate(store.leaderboard(args.top), 1):
+            died_at = time.strftime(
+                '%Y-%m-%d %H:%M', time.localtime(death.died_at)
+            )
+            print(
+                f'{place:>3}. length={death.length} ticks={death.ticks} '
+                f'cause={death.cause} speed={death.speed} at {died_at}'
+            )
+        for cause, (games, best, average) in sorted(store.causes().items()):
+            print(f'{cause}: games={games} best={best} average={average:.1f}')
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
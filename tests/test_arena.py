@@ -0,0 +1,183 @@
+import pytest
+
+import arena as arena_module
+import snake_core as core
+
+
+def _arena(snakes=2, **kwargs):
+    kwargs = {'apples': 0, 'rocks': 0, 'seed': 1, **kwargs}
+    return arena_module.Arena(
+        width=20, height=20, snakes=snakes, players=snakes, **kwargs
+    )
+
+
+def _place(arena, number, cells, direction):
+    """Puts a snake with its head in cells[0] and body in the rest."""
+    snake = arena.snakes[number]
+    snake.position = cells[-1]
+    snake.reset()
+    for cell in reversed(cells[:-1]):
+        snake.add_head(cell)
+    snake.length = len(cells)
+    snake.direction = direction
+
+
+def test_arena_board_is_consistent_with_objects():
+    arena = arena_module.Arena(
+        width=40, height=30, snakes=60, players=0, apples=20, rocks=10,
+        seed=2,
+    )
+    events = set()
+    for _ in range(500):
+        arena.step()
+        events.update(arena.events)
+    counts = bytearray(arena.board.size)
+    for snake in arena.snakes:
+        for position in snake.positions:
+            counts[position] += 1
+    for obj in arena.apples + arena.rocks:
+        counts[obj.position] += 1
+    assert counts == arena.board.cells
+    assert core.APPLE_EATEN in events
+    assert core.HIT_SNAKE in events
+
+
+
+def test_arena_wheel_keeps_one_entry_per_object():
+    arena = arena_module.Arena(
+        width=12, height=10, snakes=20, players=0, apples=10, rocks=10,
+        seed=3,
+    )
+    for _ in range(3000):
+        arena.step()
+    entries = [obj for slot in arena.scheduler.slots for obj in slot]
+    assert len(entries) == len(set(entries)) == 20
+
+
+def test_heads_meeting_in_one_cell_both_die():
+    arena = _arena()
+    _place(arena, 0, [42], core.RIGHT)
+    _place(arena, 1, [44], core.LEFT)
+    arena.step()
+    assert arena.events == [core.HIT_SNAKE, core.HIT_SNAKE]
+
+
+def test_head_in_body_of_another_snake_kills_only_it():
+    arena = _arena()
+    _place(arena, 0, [61, 41, 21], core.DOWN)
+    _place(arena, 1, [40], core.RIGHT)
+    assert arena.step() is None
+    assert arena.events == [None, core.HIT_SNAKE]
+    assert arena.snakes[1].length == 1
+    assert list(arena.snakes[0].positions) == [81, 61, 41]
+
+
+def test_cell_left_by_a_tail_may_be_entered():
+    arena = _arena()
+    _place(arena, 0, [61, 41, 21], core.DOWN)
+    _place(arena, 1, [22], core.LEFT)
+    arena.step()
+    assert arena.events == [None, None]
+    assert arena.board.cells[21] == 1
+
+
+def test_apple_is_eaten_only_by_a_single_head():
+    arena = _arena(apples=1)
+    apple = arena.apples[0]
+    board = arena.board
+    board.take(apple.position)
+    apple.position = 43
+    board.put(43, apple)
+    _place(arena, 0, [42], core.RIGHT)
+    _place(arena, 1, [63], core.UP)
+    arena.step()
+    assert arena.events == [core.HIT_SNAKE, core.HIT_SNAKE]
+    assert apple.position == 43
+
+    _place(arena, 0, [42], core.RIGHT)
+    _place(arena, 1, [0], core.RIGHT)
+    arena.step()
+    assert arena.events == [core.APPLE_EATEN, None]
+    assert arena.snakes[0].length == 2
+    assert apple.position != 43
+
+
+def test_arena_is_deterministic_for_same_seed():
+    def play(seed):
+        arena = arena_module.Arena(snakes=30, players=0, seed=seed)
+        events = []
+        for _ in range(200):
+            arena.step()
+            events.append(tuple(arena.events))
+        return events
+
+    assert play(5) == play(5)
+
+
+def test_arena_rejects_more_players_than_snakes():
+    with pytest.raises(ValueError):
+        arena_module.Arena(snakes=2, players=3)
+
+
+def test_arena_needs_an_empty_cell():
+    with pytest.raises(ValueError):
+        arena_module.Arena(
+            width=3, height=2, snakes=2, apples=2, rocks=2, seed=1
+        )
+
+
+def _assert_board_matches_objects(arena):
+    counts = bytearray(arena.board.size)
+    for snake in arena.snakes:
+        for position in snake.positions:
+            counts[position] += 1
+    for obj in arena.apples + arena.rocks:
+        counts[obj.position] += 1
+    assert counts == arena.board.cells
+
+
+def test_apple_eaten_on_full_board_ends_the_round():
+    arena = arena_module.Arena(
+        width=3, height=1, snakes=1, players=1, apples=1, rocks=0, seed=1
+    )
+    apple = arena.apples[0]
+    arena.board.take(apple.position)
+    apple.position = 2
+    arena.board.put(2, apple)
+    _place(arena, 0, [1, 0], core.RIGHT)
+
+    assert arena.step() == core.BOARD_FILLED
+    assert arena.events == [core.BOARD_FILLED]
+    assert arena.snakes[0].length == 1
+    _assert_board_matches_objects(arena)
+    arena.step()
+    _assert_board_matches_objects(arena)
+
+
+def test_snake_without_cell_to_respawn_ends_the_round():
+    arena = arena_module.Arena(
+        width=4, height=1, snakes=2, players=2, apples=1, rocks=0, seed=1
+    )
+    apple = arena.apples[0]
+    arena.board.take(apple.position)
+    apple.position = 2
+    arena.board.put(2, apple)
+    # Первая змейка съедает яблоко, оно занимает последнюю пустую
+    # клетку, а вторая врезается в хвост первой:
+    _place(arena, 0, [1, 0], core.RIGHT)
+    _place(arena, 1, [3], core.RIGHT)
+
+    assert arena.step() == core.BOARD_FILLED
+    assert arena.events == [core.BOARD_FILLED, core.BOARD_FILLED]
+    assert [snake.length for snake in arena.snakes] == [1, 1]
+    _assert_board_matches_objects(arena)
+
+
+@pytest.mark.parametrize('length', [1, 3])
+def test_heads_that_swap_cells_both_die(length):
+    arena = _arena()
+    _place(arena, 0, [11], core.RIGHT)
+    _place(arena, 1, [12, 13, 14][:length], core.LEFT)
+    arena.step()
+    assert arena.events == [core.HIT_SNAKE, core.HIT_SNAKE]
+    assert [snake.length for snake in arena.snakes] == [1, 1]
@@ -0,0 +1,70 @@
+import autopilot
+import snake_core as core
+import tournament
+
+
+def _move_apple(game_state, cell):
+    board = game_state.board
+    apple = game_state.apple
+    board.take(apple.position)
+    apple.position = cell
+    board.put(cell, apple)
+
+
+def test_autopilot_reaches_apple_by_shortest_path():
+    game_state = core.GameState(rocks=0, seed=1)
+    pilot = autopilot.Autopilot(game_state)
+    board = game_state.board
+    head = game_state.snake.get_head_position()
+    row, column = divmod(head, board.width)
+    # Яблоко в той же колонке, змейка ползет вправо и развернуться
+    # вверх или вниз может сразу:
+    _move_apple(game_state, board.width + column)
+
+    ticks = 1
+    while game_state.step(pilot.decide()) != core.APPLE_EATEN:
+        ticks += 1
+        assert ticks < 100
+    assert ticks == min(row - 1, board.height - row + 1)
+    assert pilot.searches == 1
+
+
+def test_autopilot_repairs_blocked_path():
+    game_state = core.GameState(width=20, height=20, rocks=1, seed=3)
+    pilot = autopilot.Autopilot(game_state)
+    game_state.step(pilot.decide())
+    assert len(pilot.path) > 3
+    # Камень появился на пути змейки через одну клетку.
+    rock = game_state.rocks[0]
+    board = game_state.board
+    board.take(rock.position)
+    rock.position = pilot.path[-2]
+    board.put(rock.position, rock)
+
+    game_state.step(pilot.decide())
+    game_state.step(pilot.decide())
+    assert pilot.repairs == 1
+    assert rock.position not in pilot.path
+    assert pilot.searches == 1
+
+
+def test_autopilot_plans_once_per_apple():
+    game_state = core.GameState(seed=5)
+    pilot = autopilot.Autopilot(game_state)
+    apples = 0
+    for _ in range(3000):
+        event = game_state.step(pilot.decide())
+        apples += event == core.APPLE_EATEN
+    assert apples > 50
+    assert pilot.searches < pilot.decisions / 5
+
+
+def test_autopilot_outscores_greedy_policy():
+    scores = {
+        policy: sum(
+            tournament.play_game(seed, policy, max_ticks=3000).score
+            for seed in range(5)
+        )
+        for policy in ('greedy', 'autopilot')
+    }
+    assert scores['autopilot'] > scores['greedy']
@@ -0,0 +1,62 @@
+import pytest
+
+import snake_core as core
+
+
+@pytest.fixture
+def the_snake(_the_snake, monkeypatch):
+    monkeypatch.setattr(_the_snake, 'camera', _the_snake.Camera(2000, 2000))
+    _the_snake.init_display()
+    yield _the_snake
+    _the_snake.pending_blits.clear()
+
+
+def test_default_camera_shows_whole_board(_the_snake):
+    camera = _the_snake.Camera()
+    assert camera.screen_size == (
+        _the_snake.SCREEN_WIDTH, _the_snake.SCREEN_HEIGHT
+    )
+    assert len(list(camera.visible_cells())) == core.GRID_WIDTH * (
+        core.GRID_HEIGHT
+    )
+    assert not camera.follow(0)
+
+
+def test_camera_follows_head_over_wrapped_edge(the_snake):
+    camera = the_snake.camera
+    camera.center_on(0)
+    assert camera.to_screen(0) == (
+        camera.view_width // 2 * the_snake.GRID_SIZE,
+        camera.view_height // 2 * the_snake.GRID_SIZE,
+    )
+    assert camera.to_screen(1000 * 2000 + 1000) is None
+
+    position = 0
+    moves = 0
+    for _ in range(camera.view_width // 2):
+        position = (position + 1) % 2000
+        moves += camera.follow(position)
+        assert camera.to_screen(position) is not None
+    assert moves == 1
+
+
+def test_redraw_visits_only_visible_cells(the_snake, monkeypatch):
+    game_state = core.GameState(
+        width=2000, height=2000, seed=0,
+        snake_cls=the_snake.Snake,
+        apple_cls=the_snake.Apple,
+        rock_cls=the_snake.Rock,
+    )
+    snake = game_state.snake
+    for _ in range(1000):
+        snake.move()
+        snake.grow()
+    the_snake.camera.center_on(snake.get_head_position())
+
+    drawn = []
+    monkeypatch.setattr(
+        the_snake, 'flush_tiles',
+        lambda: drawn.extend(the_snake.pending_blits),
+    )
+    the_snake.redraw_screen(game_state)
+    assert len(drawn) == the_snake.camera.view_width // 2 + 1
@@ -0,0 +1,94 @@
+from collections import deque
+from random import Random
+
+import fields
+import snake_core as core
+import tournament
+
+
+def _expected_distances(game_state):
+    board = game_state.board
+    apple = game_state.apple.position
+    distances = [fields.UNREACHABLE] * board.size
+    distances[apple] = 0
+    queue = deque((apple,))
+    while queue:
+        cell = queue.popleft()
+        for neighbour in board.neighbours[cell]:
+            if (
+                distances[neighbour] == fields.UNREACHABLE
+                and not board.cells[neighbour]
+            ):
+                distances[neighbour] = distances[cell] + 1
+                queue.append(neighbour)
+    return distances
+
+
+def _expected_area(game_state, cell):
+    board = game_state.board
+    apple = game_state.apple.position
+    seen = {cell}
+    queue = deque((cell,))
+    while queue:
+        for neighbour in board.neighbours[queue.popleft()]:
+            if neighbour not in seen and (
+                not board.cells[neighbour] or neighbour == apple
+            ):
+                seen.add(neighbour)
+                queue.append(neighbour)
+    return len(seen)
+
+
+def test_fields_match_flood_fill_during_game():
+    game_state = core.GameState(width=16, height=12, rocks=15, seed=6)
+    board_fields = fields.BoardFields(game_state)
+    board = game_state.board
+    rng = Random(6)
+    for _ in range(1500):
+        game_state.step(tournament.greedy_policy(game_state, rng))
+        board_fields.update()
+        assert board_fields.distances == _expected_distances(game_state)
+        for cell in range(0, board.size, 7):
+            if not board_fields.blocked[cell]:
+                assert board_fields.area(cell) == (
+                    _expected_area(game_state, cell)
+                )
+
+
+def test_queries_from_the_head():
+    game_state = core.GameState(rocks=0, seed=1)
+    board = game_state.board
+    board_fields = fields.BoardFields(game_state)
+    head = game_state.snake.get_head_position()
+    row, column = divmod(head, board.width)
+    apple = game_state.apple
+    board.take(apple.position)
+    apple.position = row * board.width + (column + 3) % board.width
+    board.put(apple.position, apple)
+
+    assert board_fields.distance_to_apple() == 3
+    assert board_fields.direction_to_apple(head) == core.RIGHT
+    assert board_fields.reachable_area() == board.size - 1
+    assert board_fields.reaches_apple(head)
+
+
+def test_wall_splits_and_joins_areas():
+    game_state = core.GameState(width=10, height=10, rocks=0, seed=2)
+    board = game_state.board
+    board_fields = fields.BoardFields(game_state)
+    # Две стены из камней во всю высоту делят поле на две полосы.
+    walls = [
+        row * board.width + column
+        for column in (2, 7) for row in range(board.height)
+    ]
+    walls = [cell for cell in walls if not board.cells[cell]]
+    for cell in walls:
+        board.put(cell, object())
+    free = [cell for cell in range(board.size) if not board.cells[cell]]
+    for cell in free:
+        assert board_fields.area(cell) == _expected_area(game_state, cell)
+
+    # Брешь в стене снова соединяет полосы.
+    board.take(walls[0])
+    for cell in free:
+        assert board_fields.area(cell) == _expected_area(game_state, cell)
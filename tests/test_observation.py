@@ -0,0 +1,79 @@
+from random import Random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import observation as obs  # noqa: E402
+import snake_batch as batch  # noqa: E402
+import snake_core as core  # noqa: E402
+import tournament  # noqa: E402
+
+
+def _expected_tensor(game_state):
+    board = game_state.board
+    tensor = np.zeros((obs.CHANNELS, board.size), dtype=np.uint8)
+    tensor[obs.EMPTY] = 1
+    for cell in game_state.snake.positions:
+        tensor[obs.SNAKE, cell] = 1
+        tensor[obs.EMPTY, cell] = 0
+    tensor[obs.HEAD, game_state.snake.get_head_position()] = 1
+    for obj in game_state.objects[1:]:
+        channel = obs.APPLE if obj is game_state.apple else obs.ROCK
+        tensor[channel, obj.position] = 1
+        tensor[obs.EMPTY, obj.position] = 0
+        tensor[obs.LIFE, obj.position] = min(obj.life, obs.MAX_LIFE)
+    return tensor.reshape(obs.CHANNELS, board.height, board.width)
+
+
+def test_cell_tensor_matches_game():
+    game_state = core.GameState(width=20, height=15, rocks=20, seed=4)
+    out = np.empty((obs.CHANNELS, 15, 20), dtype=np.uint8)
+    rng = Random(4)
+    for _ in range(2000):
+        game_state.step(tournament.greedy_policy(game_state, rng))
+        assert obs.cell_tensor(game_state, out) is out
+        assert (out == _expected_tensor(game_state)).all()
+
+
+def test_cell_tensor_rejects_wrong_output():
+    game_state = core.GameState(seed=1)
+    with pytest.raises(ValueError):
+        obs.cell_tensor(game_state, np.empty((obs.CHANNELS, 2, 2)))
+
+
+def test_batch_cell_tensor_matches_grid():
+    game = batch.BatchGameState(boards=16, width=12, height=10, seed=2)
+    rng = np.random.default_rng(2)
+    for _ in range(300):
+        game.step(rng.integers(-1, 4, size=game.boards))
+    tensor = obs.batch_cell_tensor(game).reshape(16, obs.CHANNELS, -1)
+    for board in range(game.boards):
+        planes = tensor[board]
+        for channel, kind in (
+            (obs.EMPTY, batch.EMPTY),
+            (obs.SNAKE, batch.SNAKE),
+            (obs.APPLE, batch.APPLE),
+            (obs.ROCK, batch.ROCK),
+        ):
+            assert (planes[channel] == (game.grid[board] == kind)).all()
+        assert np.flatnonzero(planes[obs.HEAD]) == [game.heads[board]]
+        assert planes[obs.LIFE, game.apple_positions[board]] == (
+            game.apple_life[board]
+        )
+        assert (
+            planes[obs.LIFE, game.rock_positions[board]]
+            == game.rock_life[board]
+        ).all()
+
+
+def test_screen_pixels_is_a_view(_the_snake):
+    surface = _the_snake.pg.Surface((4, 3))
+    surface.fill((10, 20, 30))
+    with obs.screen_pixels(surface) as pixels:
+        assert pixels.shape == (3, 4, 3)
+        assert (pixels == (10, 20, 30)).all()
+        pixels[1, 2] = (1, 2, 3)
+        del pixels
+    assert tuple(surface.get_at((2, 1)))[:3] == (1, 2, 3)
+    surface.blit(_the_snake.pg.Surface((1, 1)), (0, 0))
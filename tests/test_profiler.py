@@ -0,0 +1,101 @@
+import csv
+import json
+from time import perf_counter_ns
+
+import pytest
+
+import profiler
+import snake_core as core
+
+
+def test_game_state_step_is_measured_by_phases():
+    game_state = core.GameState(seed=1)
+    tick_profiler = profiler.TickProfiler()
+    game_state.profiler = tick_profiler
+    for _ in range(10):
+        tick_profiler.start_frame(game_state.speed)
+        game_state.step()
+        tick_profiler.end_frame()
+
+    phases = [phase for _, phase, _, _ in tick_profiler.events]
+    assert phases == ['move', 'update_life', 'collisions'] * 10
+    assert tick_profiler.frames == 10
+    assert tick_profiler.overruns == 0
+    for phase in ('move', 'update_life', 'collisions'):
+        assert sum(tick_profiler.histograms[phase]) == 10
+
+
+def test_input_latency_is_measured_to_the_move():
+    game_state = core.GameState(seed=1)
+    tick_profiler = profiler.TickProfiler()
+    game_state.profiler = tick_profiler
+    game_state.snake.turn(core.UP, made_at=perf_counter_ns())
+    game_state.snake.turn(core.LEFT, made_at=perf_counter_ns())
+    for _ in range(3):
+        game_state.step()
+    assert len(tick_profiler.input_latencies) == 2
+    assert all(latency > 0 for latency in tick_profiler.input_latencies)
+    assert 'input lag' in tick_profiler.summary()
+
+
+def test_overrun_is_counted_when_work_exceeds_budget():
+    tick_profiler = profiler.TickProfiler()
+    tick_profiler.start_frame(fps=1_000_000_000)
+    tick_profiler.lap('draw')
+    tick_profiler.end_frame()
+    assert tick_profiler.overruns == 1
+
+
+def test_dump_writes_csv_and_chrome_trace(tmp_path):
+    tick_profiler = profiler.TickProfiler()
+    for _ in range(3):
+        tick_profiler.start_frame(fps=10)
+        for phase in profiler.PHASES:
+            tick_profiler.lap(phase)
+        tick_profiler.end_frame()
+
+    tick_profiler.dump(tmp_path / 'profile.csv')
+    with open(tmp_path / 'profile.csv') as report:
+        rows = list(csv.DictReader(report))
+    assert len(rows) == 3 * len(profiler.PHASES)
+    assert rows[-1]['frame'] == '2' and rows[-1]['phase'] == 'display'
+
+    tick_profiler.dump(tmp_path / 'profile.json')
+    with open(tmp_path / 'profile.json') as report:
+        trace = json.load(report)
+    assert len(trace['traceEvents']) == 3 * len(profiler.PHASES)
+    assert trace['otherData']['frames'] == 3
+    assert 'display' in tick_profiler.summary()
+
+
+def test_frame_time_stats_report_jitter():
+    stats = profiler.FrameTimeStats()
+    for interval_ms in (15, 17, 15, 17):
+        stats.add(interval_ms * 1_000_000)
+    assert stats.mean_ms == 16
+    assert stats.fps == 62.5
+    assert stats.jitter_ms == pytest.approx(1)
+    assert stats.worst_ms == 17
+    assert 'jitter=1.00ms' in str(stats)
+    stats.reset()
+    assert stats.count == 0 and stats.jitter_ms == 0
+
+
+def test_events_are_bounded_but_totals_cover_every_frame(monkeypatch):
+    monkeypatch.setattr(profiler, 'MAX_EVENTS', 10)
+    tick_profiler = profiler.TickProfiler()
+    for frame in range(100):
+        tick_profiler.start_frame(fps=60)
+        for phase in profiler.PHASES:
+            if phase != 'move' or frame < 50:
+                tick_profiler.lap(phase)
+        tick_profiler.end_frame()
+
+    assert len(tick_profiler.events) == 10
+    assert tick_profiler.totals['draw'][0] == 100
+    draw_row = next(
+        line for line in tick_profiler.summary().splitlines()
+        if line.startswith('draw')
+    )
+    assert draw_row.split()[1] == '100'
+    assert 'move' in tick_profiler.summary()
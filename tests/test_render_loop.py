@@ -0,0 +1,246 @@
+from random import Random
+
+import pygame as pg
+import pytest
+
+import snake_core as core
+import tournament
+
+
+class StopGame(Exception):
+    pass
+
+
+class FakeClock:
+    """Clock that reports fixed frame times and stops after some frames."""
+
+    def __init__(self, frame_ms, frames):
+        self.frame_ms = frame_ms
+        self.frames = frames
+
+    def tick(self, fps):
+        if not self.frames:
+            raise StopGame
+        self.frames -= 1
+        return self.frame_ms
+
+
+@pytest.fixture
+def the_snake(_the_snake, monkeypatch):
+    monkeypatch.setattr(_the_snake, 'camera', _the_snake.Camera(60, 40))
+    monkeypatch.setattr(_the_snake, 'render_mode', _the_snake.RENDER_DIRTY)
+    _the_snake.init_display()
+    yield _the_snake
+    _the_snake.pending_blits.clear()
+    _the_snake.moved_objects.clear()
+
+
+def _run(the_snake, game_state, frame_ms, frames, monkeypatch):
+    monkeypatch.setattr(the_snake, 'clock', FakeClock(frame_ms, frames))
+    with pytest.raises(StopGame):
+        the_snake.run_game(game_state)
+
+
+def test_ticks_follow_game_speed_not_frame_rate(the_snake, monkeypatch):
+    game_state = the_snake.GameState(
+        60, 40, rocks=0, seed=1, snake_cls=the_snake.Snake,
+        apple_cls=the_snake.Apple, rock_cls=the_snake.Rock,
+    )
+    _run(the_snake, game_state, 10, 300, monkeypatch)
+    # 3 seconds at START_SPEED ticks per second.
+    assert game_state.ticks == 3 * core.START_SPEED
+
+    _run(the_snake, game_state, 5000, 1, monkeypatch)
+    assert game_state.ticks == 3 * core.START_SPEED + (
+        the_snake.MAX_TICKS_PER_FRAME
+    )
+
+
+def test_interpolation_leaves_no_trail(the_snake, monkeypatch):
+    game_state = the_snake.GameState(
+        60, 40, rocks=30, seed=4, snake_cls=the_snake.Snake,
+        apple_cls=the_snake.Apple, rock_cls=the_snake.Rock,
+    )
+    step = game_state.step
+
+    def growing_step(action=None):
+        event = step(action)
+        snake = game_state.snake
+        if event is None and game_state.ticks % 3 and snake.last is not None:
+            snake.grow()
+        return event
+
+    game_state.step = growing_step
+    _run(the_snake, game_state, 7, 2000, monkeypatch)
+    assert game_state.snake.length > 1
+
+    game_state.snake.draw_interpolated(1.0)
+    the_snake.update_display()
+    interpolated = pg.image.tobytes(pg.display.get_surface(), 'RGB')
+    the_snake.redraw_screen(game_state)
+    assert interpolated == pg.image.tobytes(pg.display.get_surface(), 'RGB')
+
+
+def test_cell_edge_is_along_given_side(_the_snake):
+    size = _the_snake.GRID_SIZE
+    assert _the_snake.cell_edge(core.RIGHT, 5) == pg.Rect(size - 5, 0, 5, size)
+    assert _the_snake.cell_edge(core.LEFT, 5) == pg.Rect(0, 0, 5, size)
+    assert _the_snake.cell_edge(core.DOWN, 5) == pg.Rect(0, size - 5, size, 5)
+    assert _the_snake.cell_edge(core.UP, 5) == pg.Rect(0, 0, size, 5)
+
+
+def test_arena_dirty_frames_match_full_redraw(the_snake, monkeypatch):
+    arena = the_snake.create_game(the_snake.parse_args(
+        ['--snakes', '40', '--width', '60', '--height', '40', '--seed', '3']
+    ))
+    assert arena.snakes[1].body_color == the_snake.BOT_SNAKE_COLOR
+    the_snake.redraw_screen(arena)
+    for _ in range(300):
+        the_snake.run_tick(arena)
+        the_snake.update_display()
+    dirty = pg.image.tobytes(pg.display.get_surface(), 'RGB')
+    the_snake.redraw_screen(arena)
+    assert dirty == pg.image.tobytes(pg.display.get_surface(), 'RGB')
+
+
+def _count_differences(frame, other):
+    return sum(first != second for first, second in zip(frame, other))
+
+
+class FrameSequenceClock:
+    """Clock that reports given frame times one after another."""
+
+    def __init__(self, frame_times):
+        self.frame_times = list(frame_times)
+
+    def tick(self, fps):
+        if not self.frame_times:
+            raise StopGame
+        return self.frame_times.pop(0)
+
+
+@pytest.mark.parametrize('render_mode', ['dirty', 'full'])
+def test_catch_up_ticks_leave_no_partly_drawn_head(
+    the_snake, monkeypatch, render_mode
+):
+    monkeypatch.setattr(the_snake, 'render_mode', render_mode)
+    game_state = the_snake.GameState(
+        60, 40, rocks=0, seed=1, snake_cls=the_snake.Snake,
+        apple_cls=the_snake.Apple, rock_cls=the_snake.Rock,
+    )
+    for _ in range(3):
+        game_state.step()
+        game_state.snake.grow()
+    monkeypatch.setattr(
+        the_snake, 'clock', FrameSequenceClock([100] * 5 + [400, 400])
+    )
+    with pytest.raises(StopGame):
+        the_snake.run_game(game_state)
+
+    game_state.snake.draw_interpolated(1.0)
+    the_snake.update_display()
+    interpolated = pg.image.tobytes(pg.display.get_surface(), 'RGB')
+    the_snake.redraw_screen(game_state)
+    full = pg.image.tobytes(pg.display.get_surface(), 'RGB')
+    assert _count_differences(interpolated, full) == 0
+
+
+def _frames_after_ticks(the_snake, monkeypatch, render_mode, ticks):
+    monkeypatch.setattr(the_snake, 'render_mode', render_mode)
+    game_state = the_snake.GameState(
+        60, 40, rocks=40, seed=12, snake_cls=the_snake.Snake,
+        apple_cls=the_snake.Apple, rock_cls=the_snake.Rock,
+    )
+    the_snake.redraw_screen(game_state)
+    rng = Random(12)
+    frames = []
+    for _ in range(ticks):
+        direction = tournament.greedy_policy(game_state, rng)
+        if direction is not None:
+            game_state.snake.turn(direction)
+        the_snake.run_tick(game_state)
+        the_snake.update_display()
+        frames.append(pg.image.tobytes(pg.display.get_surface(), 'RGB'))
+    assert game_state.snake.length > 3
+    the_snake.redraw_screen(game_state)
+    return frames, pg.image.tobytes(pg.display.get_surface(), 'RGB')
+
+
+def test_dirty_frames_match_full_frames_tick_by_tick(the_snake, monkeypatch):
+    dirty, redrawn = _frames_after_ticks(the_snake, monkeypatch, 'dirty', 60)
+    full, _ = _frames_after_ticks(the_snake, monkeypatch, 'full', 60)
+    for tick, (dirty_frame, full_frame) in enumerate(zip(dirty, full)):
+        same = dirty_frame == full_frame
+        assert same, f'tick {tick}'
+    same = dirty[-1] == redrawn
+    assert same
+
+
+def test_tiles_are_rendered_again_for_new_colors_and_grid_size(
+    the_snake, monkeypatch
+):
+    color = [10, 20, 30]
+    tile = the_snake.tile_cache.get(color, (0, 0, 0))
+    assert tile.get_size() == (the_snake.GRID_SIZE, the_snake.GRID_SIZE)
+    assert tuple(tile.get_at((5, 5)))[:3] == (10, 20, 30)
+
+    color[0] = 200
+    tile = the_snake.tile_cache.get(color, (0, 0, 0))
+    assert tuple(tile.get_at((5, 5)))[:3] == (200, 20, 30)
+    tile = the_snake.tile_cache.get(pg.Color(1, 2, 3), pg.Color(4, 5, 6))
+    assert tuple(tile.get_at((0, 0)))[:3] == (4, 5, 6)
+
+    monkeypatch.setattr(the_snake, 'GRID_SIZE', 8)
+    tile = the_snake.tile_cache.get((10, 20, 30), (0, 0, 0))
+    assert tile.get_size() == (8, 8)
+    assert tuple(tile.get_at((7, 7)))[:3] == (0, 0, 0)
+    assert tuple(tile.get_at((6, 6)))[:3] == (10, 20, 30)
+
+
+def test_dirty_frames_match_full_frames_on_smaller_grid(
+    the_snake, monkeypatch
+):
+    monkeypatch.setattr(the_snake, 'GRID_SIZE', 8)
+    monkeypatch.setattr(the_snake, 'BOARD_BACKGROUND_COLOR', (30, 30, 30))
+    monkeypatch.setattr(the_snake, 'BLINK_COLOR', [90, 90, 0])
+    the_snake.init_display()
+    assert pg.display.get_surface().get_size() == (
+        the_snake.camera.view_width * 8, the_snake.camera.view_height * 8
+    )
+    dirty, redrawn = _frames_after_ticks(the_snake, monkeypatch, 'dirty', 60)
+    full, _ = _frames_after_ticks(the_snake, monkeypatch, 'full', 60)
+    for tick, (dirty_frame, full_frame) in enumerate(zip(dirty, full)):
+        same = dirty_frame == full_frame
+        assert same, f'tick {tick}'
+    same = dirty[-1] == redrawn
+    assert same
+    assert bytes((30, 30, 30)) in redrawn
+
+
+@pytest.mark.parametrize('steered', [False, True])
+def test_every_tick_of_a_frame_is_profiled_by_phases(
+    the_snake, monkeypatch, steered
+):
+    import autopilot
+    import profiler
+
+    game_state = the_snake.GameState(
+        60, 40, rocks=10, seed=2, snake_cls=the_snake.Snake,
+        apple_cls=the_snake.Apple, rock_cls=the_snake.Rock,
+    )
+    game_state.profiler = profiler.TickProfiler()
+    if steered:
+        monkeypatch.setattr(
+            the_snake, 'autopilot', autopilot.Autopilot(game_state)
+        )
+    tick_ms = 1000 / game_state.speed
+    monkeypatch.setattr(
+        the_snake, 'clock', FrameSequenceClock([tick_ms * 2.5])
+    )
+    with pytest.raises(StopGame):
+        the_snake.run_game(game_state)
+
+    tick = ['input'] * steered + ['move', 'update_life', 'collisions', 'draw']
+    phases = [phase for frame, phase, _, _ in game_state.profiler.events
+              if frame == 0]
+    assert phases == ['wait', 'input', *tick, *tick, 'draw', 'display']
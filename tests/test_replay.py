@@ -0,0 +1,54 @@
+import io
+from random import Random
+
+import pytest
+
+import replay
+import snake_core as core
+import tournament
+
+
+def _record(seed, ticks):
+    game_state = core.GameState(seed=seed)
+    log = io.BytesIO()
+    recorder = replay.record_game(game_state, log)
+    rng = Random(seed)
+    for _ in range(ticks):
+        game_state.step(tournament.greedy_policy(game_state, rng))
+    recorder.close()
+    return game_state, log.getvalue()
+
+
+def _snapshot(game_state):
+    return (
+        game_state.ticks,
+        list(game_state.snake.positions),
+        game_state.snake.direction,
+        [(obj.position, obj.life) for obj in game_state.objects[1:]],
+    )
+
+
+def test_replay_reproduces_game():
+    game_state, log = _record(seed=11, ticks=50_000)
+    assert _snapshot(replay.replay(log)) == _snapshot(game_state)
+    assert len(log) < 3 * game_state.ticks
+
+
+def test_replay_of_cut_log_stops_at_last_change():
+    _, log = _record(seed=3, ticks=2000)
+    settings, changes, total_ticks = replay.read_log(log[:-5])
+    assert total_ticks is None
+    assert replay.replay(log[:-5]).ticks == changes[-1][0] + 1
+
+
+def test_read_log_rejects_other_files():
+    with pytest.raises(replay.ReplayFormatError):
+        replay.read_log(b'PK\x03\x04' + bytes(20))
+
+
+def test_varint_round_trip():
+    for value in (0, 1, 127, 128, 300, 2 ** 40):
+        encoded = replay.encode_varint(value)
+        assert replay.decode_varint(encoded + b'\x00', 0) == (
+            value, len(encoded)
+        )
@@ -0,0 +1,163 @@
+import asyncio
+
+import protocol
+import server
+import snake_core as core
+
+
+def _feed(remote_game, message):
+    _, message_type = protocol.FRAME_HEADER.unpack_from(message)
+    return remote_game.apply(
+        message_type, message[protocol.FRAME_HEADER.size:]
+    )
+
+
+def test_client_game_follows_server_game():
+    game_state = core.GameState(40, 30, rocks=60, seed=2)
+    game_state.store.moves = moves = []
+    remote_game = protocol.RemoteGame()
+    _feed(remote_game, protocol.encode_snapshot(game_state))
+    for tick in range(3000):
+        event = game_state.step(
+            core.DIRECTIONS[tick % 4] if tick % 7 == 0 else None
+        )
+        if event in core.GAME_OVER_EVENTS:
+            message = protocol.encode_snapshot(game_state, event)
+        else:
+            message = protocol.encode_delta(game_state, event, moves)
+        moves.clear()
+        assert _feed(remote_game, message)[0] == event
+        assert remote_game.tick == game_state.ticks
+        assert list(remote_game.snake) == list(game_state.snake.positions)
+        objects = game_state.objects[1:]
+        assert set(remote_game.objects) == {obj.position for obj in objects}
+        for obj in objects:
+            assert remote_game.is_blinked(obj.position) == obj.is_blinked
+
+
+def test_delta_size_does_not_depend_on_snake_length():
+    game_state = core.GameState(100, 100, rocks=0, seed=1)
+    snake = game_state.snake
+    sizes = []
+    for tick in range(2000):
+        game_state.step(core.DOWN if tick % 100 == 99 else core.RIGHT)
+        if game_state.snake.last is not None:
+            snake.grow()
+        sizes.append(len(protocol.encode_delta(game_state, None, [])))
+    assert snake.length > 1000
+    assert max(sizes) <= 16
+
+
+def test_server_streams_rooms_to_clients():
+    async def scenario():
+        game_server = server.GameServer(rocks=3, tick_rate=200, seed=1)
+        listener = await game_server.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+
+        async def connect(room):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(protocol.frame(protocol.HELLO, room.encode()))
+            remote_game = protocol.RemoteGame()
+            remote_game.apply(*await protocol.read_message(reader))
+            return reader, writer, remote_game
+
+        clients = [await connect(room) for room in ('lobby', 'lobby', '')]
+        assert game_server.stats()[:2] == (2, 3)
+
+        reader, writer, remote_game = clients[0]
+        writer.write(protocol.frame(
+            protocol.TURN, bytes((core.DIRECTIONS.index(core.DOWN),))
+        ))
+        board = core.OccupancyGrid(remote_game.width, remote_game.height)
+        moves = set()
+        for _ in range(20):
+            message_type, payload = await protocol.read_message(reader)
+            ticks_before = remote_game.tick
+            head = remote_game.snake[0]
+            remote_game.apply(message_type, payload)
+            if message_type == protocol.DELTA:
+                assert remote_game.tick == ticks_before + 1
+                moves.update(
+                    direction for direction in core.DIRECTIONS
+                    if board.neighbour(head, direction)
+                    == remote_game.snake[0]
+                )
+        assert core.DOWN in moves
+
+        for _, writer, _ in clients:
+            writer.close()
+        for _ in range(100):
+            if not game_server.rooms:
+                break
+            await asyncio.sleep(0.01)
+        assert game_server.rooms == {}
+        listener.close()
+        await listener.wait_closed()
+
+    asyncio.run(scenario())
+
+
+def test_client_redraw_updates_whole_window(_the_snake, monkeypatch):
+    import client
+
+    game_state = core.GameState(40, 30, rocks=10, seed=3)
+    remote_game = protocol.RemoteGame()
+    _feed(remote_game, protocol.encode_snapshot(game_state))
+    monkeypatch.setattr(_the_snake, 'camera', _the_snake.Camera(40, 30))
+    monkeypatch.setattr(_the_snake, 'render_mode', _the_snake.RENDER_DIRTY)
+    _the_snake.init_display()
+    updates = []
+    monkeypatch.setattr(
+        client.pg.display, 'update', lambda *rects: updates.append(rects)
+    )
+
+    client.redraw(remote_game)
+    _the_snake.update_display()
+    # Весь экран выводится, иначе стертые клетки остались бы в окне.
+    assert () in updates
+    assert not _the_snake.pending_blits
+
+
+def test_load_test_players_survive_split_and_damaged_frames():
+    import load_test
+
+    async def scenario():
+        game_server = server.GameServer(rocks=3, tick_rate=100, seed=1)
+        listener = await game_server.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+
+        snapshot = protocol.encode_snapshot(core.GameState(seed=1))
+        header_size = protocol.FRAME_HEADER.size
+
+        async def damaging_server(reader, writer):
+            # Заголовок и тело кадра приходят с паузой, затем битый кадр:
+            writer.write(snapshot[:header_size])
+            await asyncio.sleep(0.1)
+            writer.write(snapshot[header_size:])
+            writer.write(protocol.frame(protocol.DELTA, b'\xff'))
+            await reader.read()
+
+        damaging = await asyncio.start_server(
+            damaging_server, '127.0.0.1', 0
+        )
+        damaging_port = damaging.sockets[0].getsockname()[1]
+
+        stats = load_test.LoadStats()
+        rng = load_test.Random(1)
+        await asyncio.gather(
+            load_test.play('127.0.0.1', port, '', 0.3, 0.01, stats, rng),
+            load_test.play('127.0.0.1', port, '', 0.3, 0.01, stats, rng),
+            load_test.play(
+                '127.0.0.1', damaging_port, '', 0.3, 0.01, stats, rng
+            ),
+        )
+        assert stats.connected == 3
+        assert stats.failed == 1
+        assert stats.snapshots == 3
+        assert stats.deltas > 10
+
+        for listening in (listener, damaging):
+            listening.close()
+            await listening.wait_closed()
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import snake_batch as batch  # noqa: E402
+import snake_core as core  # noqa: E402
+
+
+def _expected_grid(game, board):
+    grid = np.zeros(game.size, dtype=np.uint8)
+    grid[game.snake_positions(board)] = batch.SNAKE
+    grid[game.apple_positions[board]] = batch.APPLE
+    grid[game.rock_positions[board]] = batch.ROCK
+    return grid
+
+
+def test_grid_matches_objects():
+    game = batch.BatchGameState(boards=32, seed=3)
+    rng = np.random.default_rng(0)
+    for _ in range(1500):
+        actions = rng.integers(-1, 4, size=game.boards)
+        game.step(actions)
+    for board in range(game.boards):
+        assert (game.grid[board] == _expected_grid(game, board)).all()
+
+
+def test_step_is_deterministic_for_same_seed():
+    games = [batch.BatchGameState(boards=8, seed=7) for _ in range(2)]
+    for tick in range(500):
+        actions = np.full(8, tick % 4 if tick % 3 == 0 else -1)
+        first, second = (game.step(actions) for game in games)
+        assert (first == second).all()
+    assert (games[0].grid == games[1].grid).all()
+
+
+def test_snake_eats_apple_and_hits_itself():
+    game = batch.BatchGameState(boards=1, rocks=0, seed=0)
+    right = core.DIRECTIONS.index(core.RIGHT)
+    for _ in range(4):
+        cell = game.center + game.lengths[0]
+        game.grid[0, game.apple_positions[0]] = batch.EMPTY
+        game.apple_positions[0] = cell
+        game.grid[0, cell] = batch.APPLE
+        event = game.step([right])
+        assert batch.EVENTS[event[0]] == core.APPLE_EATEN
+    assert game.lengths[0] == 5
+
+    events = [
+        game.step([core.DIRECTIONS.index(direction)])[0]
+        for direction in (core.DOWN, core.LEFT, core.UP)
+    ]
+    assert batch.EVENTS[events[-1]] == core.HIT_SELF
+    assert game.lengths[0] == 1
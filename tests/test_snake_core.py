@@ -0,0 +1,281 @@
+from collections import Counter
+from random import Random
+
+import pytest
+
+import snake_core as core
+
+
+def _play(seed, ticks=2000):
+    game_state = core.GameState(seed=seed)
+    events = []
+    for tick in range(ticks):
+        action = core.DIRECTIONS[tick % 4] if tick % 7 == 0 else None
+        events.append(game_state.step(action))
+    return events, list(game_state.snake.positions)
+
+
+def test_step_is_deterministic_for_same_seed():
+    assert _play(seed=42) == _play(seed=42)
+
+
+def test_board_is_consistent_with_objects():
+    game_state = core.GameState(seed=1)
+    for tick in range(3000):
+        game_state.step(core.DIRECTIONS[tick % 4] if tick % 5 == 0 else None)
+    expected = Counter(game_state.snake.positions)
+    expected.update(obj.position for obj in game_state.objects[1:])
+    board = game_state.board
+    assert {
+        index: count for index, count in enumerate(board.cells) if count
+    } == dict(expected)
+    assert sorted(board.empty_cells) == [
+        index for index, count in enumerate(board.cells) if not count
+    ]
+    assert board.items == {
+        obj.position: obj for obj in game_state.objects[1:]
+    }
+
+
+def test_snake_eats_apple():
+    game_state = core.GameState(rocks=0, seed=0)
+    snake = game_state.snake
+    game_state.board.take(game_state.apple.position)
+    game_state.apple.position = game_state.board.neighbour(
+        snake.get_head_position(), core.RIGHT
+    )
+    game_state.board.put(game_state.apple.position, game_state.apple)
+
+    assert game_state.step() == core.APPLE_EATEN
+    assert snake.length == len(snake.positions) == 2
+
+
+def test_rock_in_head_cell_is_found_among_many():
+    game_state = core.GameState(width=300, height=300, rocks=50_000, seed=0)
+    snake = game_state.snake
+    cell = game_state.board.neighbour(snake.get_head_position(), core.RIGHT)
+    if game_state.board.item_at(cell) is None:
+        rock = game_state.rocks[0]
+        game_state.board.take(rock.position)
+        rock.position = cell
+        game_state.board.put(cell, rock)
+
+    assert game_state.step() == core.HIT_ROCK
+    assert len(game_state.board.items) == 50_001
+
+
+def test_snake_dies_on_hitting_itself():
+    game_state = core.GameState(rocks=0, seed=0)
+    snake = game_state.snake
+    for _ in range(4):
+        snake.move()
+        snake.grow()
+    events = [game_state.step(direction) for direction in (
+        core.DOWN, core.LEFT, core.UP
+    )]
+    assert events[-1] == core.HIT_SELF
+    assert len(snake.positions) == 1
+
+
+def test_snake_does_not_turn_back():
+    snake = core.Snake()
+    snake.turn(core.LEFT)
+    assert snake.next_direction is None
+    snake.turn(core.UP)
+    assert snake.next_direction == core.UP
+
+
+def test_quick_turns_are_applied_on_next_ticks():
+    game_state = core.GameState(seed=1, rocks=0)
+    snake = game_state.snake
+    snake.turn(core.UP)
+    # Going down right after up would be turning back.
+    snake.turn(core.DOWN)
+    snake.turn(core.LEFT)
+    snake.turn(core.LEFT)
+    assert [direction for direction, _ in snake.turns] == [
+        core.UP, core.LEFT
+    ]
+    game_state.step()
+    assert snake.direction == core.UP
+    game_state.step()
+    assert snake.direction == core.LEFT
+    game_state.step()
+    assert snake.direction == core.LEFT
+
+    for direction in (core.UP, core.RIGHT, core.DOWN, core.LEFT):
+        snake.turn(direction)
+    assert len(snake.turns) == core.TURN_QUEUE_SIZE
+
+
+def test_full_board_is_reported():
+    board = core.OccupancyGrid(2, 1)
+    board.occupy(0)
+    board.occupy(1)
+    with pytest.raises(core.BoardIsFullError):
+        core.Rock(board=board)
+
+
+def test_empty_cells_follow_occupy_and_release():
+    board = core.OccupancyGrid(6, 5)
+    rng = Random(2)
+    for _ in range(3000):
+        index = rng.randrange(board.size)
+        if rng.random() < 0.5:
+            board.occupy(index)
+        else:
+            board.release(index)
+        empty = [index for index, count in enumerate(board.cells) if not count]
+        assert sorted(board.empty_cells) == empty
+        for slot, index in enumerate(board.empty_cells):
+            assert board.empty_slots[index] == slot
+        assert board.empty_slots.count(-1) == board.size - len(empty)
+
+
+def test_eating_last_apple_on_full_board_wins_the_game():
+    game_state = core.GameState(width=3, height=1, rocks=0, seed=0)
+    board = game_state.board
+    snake = game_state.snake
+    apple = game_state.apple
+    board.take(apple.position)
+    apple.position = 2
+    board.put(2, apple)
+    snake.position = 0
+    snake.reset()
+    snake.add_head(1)
+    snake.length = 2
+    snake.direction = core.RIGHT
+
+    assert game_state.step() == core.BOARD_FILLED
+    assert snake.length == len(snake.positions) == 1
+    assert sorted(board.empty_cells) == [
+        index for index, count in enumerate(board.cells) if not count
+    ]
+    assert len(board.empty_cells) == 1
+
+
+def test_scheduler_wakes_due_objects_in_registration_order():
+    class Sleeper:
+        def update_life(self):
+            woken.append(self)
+
+    woken = []
+    scheduler = core.TickScheduler(size=4)
+    first, second, moved = Sleeper(), Sleeper(), Sleeper()
+    for sleeper in (first, second, moved):
+        scheduler.register(sleeper)
+    scheduler.schedule(second, 3)
+    scheduler.schedule(first, 3)
+    scheduler.schedule(moved, 3)
+    scheduler.schedule(moved, 7)
+    for _ in range(3):
+        scheduler.advance()
+    assert woken == [first, second]
+    for _ in range(4):
+        scheduler.advance()
+    assert woken == [first, second, moved]
+
+
+
+def _wheel_entries(scheduler):
+    entries = [obj for slot in scheduler.slots for obj in slot]
+    for index, slot in enumerate(scheduler.slots):
+        assert all(
+            obj.wake_tick & scheduler.mask == index for obj in slot
+        )
+    return entries
+
+
+def test_early_resets_leave_no_stale_entries_in_wheel():
+    game_state = core.GameState(width=10, height=10, rocks=20, seed=4)
+    objects = game_state.objects[1:]
+    events = Counter()
+    for tick in range(20000):
+        action = core.DIRECTIONS[tick % 4] if tick % 3 == 0 else None
+        events[game_state.step(action)] += 1
+        if tick % 1000 == 0:
+            entries = _wheel_entries(game_state.scheduler)
+            assert sorted(map(id, entries)) == sorted(map(id, objects))
+    assert events[core.APPLE_EATEN] > 100
+    assert events[core.HIT_ROCK] + events[core.HIT_SELF] > 100
+
+
+
+def test_low_life_lookup_visits_only_objects_waking_soon():
+    game_state = core.GameState(width=60, height=60, rocks=1000, seed=6)
+    scheduler = game_state.scheduler
+    rng = Random(6)
+    for _ in range(3000):
+        scheduler.advance()
+        for _ in range(5):
+            game_state.rocks[rng.randrange(1000)].reset()
+    tick = scheduler.tick
+    window = range(tick + 1, tick + core.LOW_LIFE_IN_TICKS + 1)
+    scanned = [
+        obj for wake_tick in window
+        for obj in scheduler.slots[wake_tick & scheduler.mask]
+    ]
+    waking = scheduler.waking_within(core.LOW_LIFE_IN_TICKS)
+    assert waking
+    assert sorted(map(id, scanned)) == sorted(map(id, waking))
+    assert [obj.wake_tick for obj in waking] == sorted(
+        obj.wake_tick for obj in waking
+    )
+    assert all(obj.wake_tick in window for obj in waking)
+    assert game_state.store.low_life == set(waking)
+
+
+def test_blinking_follows_low_life_cycle():
+    scheduler = core.TickScheduler()
+    apple = core.Apple(rng=Random(5), scheduler=scheduler)
+    blink_count = 0
+    for _ in range(1000):
+        expires_at = apple.expires_at
+        scheduler.advance()
+        if scheduler.tick == expires_at:
+            assert not apple.is_blinked
+            continue
+        if apple.life > core.LOW_LIFE_IN_TICKS:
+            assert not apple.is_blinked
+            continue
+        # Reference cycle of a counter polled every low life tick.
+        if blink_count == apple.low_life_blink_speed:
+            expected, blink_count = False, 0
+        else:
+            expected = blink_count % 2 == 1
+            blink_count += 1
+        assert apple.is_blinked == expected
+
+
+def test_objects_are_views_of_shared_store():
+    game_state = core.GameState(seed=3, rocks=50)
+    store = game_state.store
+    objects = game_state.objects[1:]
+    assert len(store) == len(objects)
+    assert not hasattr(game_state.rocks[0], '__dict__')
+    for tick in range(1000):
+        game_state.step(core.DIRECTIONS[tick % 4] if tick % 5 == 0 else None)
+        now = game_state.ticks
+        assert list(store.position) == [obj.position for obj in objects]
+        assert store.low_life == {
+            obj for obj in objects if obj.low_life_from <= now
+        }
+        assert all(obj in store.low_life for obj in objects if obj.is_blinked)
+
+
+def test_greedy_direction_takes_shortest_wrapped_free_step():
+    board = core.OccupancyGrid(10, 6)
+    head, target = 31, 38
+    # Цель за левым краем поля ближе, чем напрямую:
+    assert core.greedy_direction(board, head, core.UP, target) == core.LEFT
+    # Назад змейка не поворачивает, из равных шагов берется первый:
+    assert core.greedy_direction(board, head, core.RIGHT, target) == (
+        core.RIGHT
+    )
+    board.occupy(board.neighbour(head, core.LEFT))
+    assert core.greedy_direction(board, head, core.UP, target) == core.RIGHT
+    board.occupy(target)
+    assert core.greedy_direction(board, 39, core.UP, target) == core.LEFT
+    assert [core.DIRECTIONS[index] for index in core.OPPOSITE] == [
+        core.RIGHT, core.LEFT, core.DOWN, core.UP
+    ]
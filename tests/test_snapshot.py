@@ -0,0 +1,136 @@
+from random import Random
+
+import pytest
+
+import snake_core as core
+import snapshot
+import tournament
+
+
+def _play(game_state, ticks, seed):
+    rng = Random(seed)
+    for _ in range(ticks):
+        game_state.step(tournament.greedy_policy(game_state, rng))
+
+
+def _state(game_state):
+    board = game_state.board
+    return (
+        game_state.ticks,
+        game_state.speed,
+        list(game_state.snake.positions),
+        game_state.snake.direction,
+        game_state.snake.length,
+        [
+            (obj.position, obj.expires_at, obj.blink_tick_count,
+             obj.is_blinked)
+            for obj in game_state.objects[1:]
+        ],
+        bytes(board.cells),
+        list(board.empty_cells),
+        sorted(board.items),
+        game_state.rng.getstate(),
+    )
+
+
+@pytest.mark.parametrize('width, height, rocks', [(32, 24, 5), (64, 48, 50)])
+def test_forked_games_go_on_as_the_original(width, height, rocks):
+    game_state = core.GameState(
+        width=width, height=height, rocks=rocks, seed=7
+    )
+    _play(game_state, 3000, seed=1)
+    game_state.snake.turn(core.UP)
+    data = snapshot.save_state(game_state)
+
+    loaded = snapshot.load_state(data)
+    restored = core.GameState(width=width, height=height, rocks=rocks)
+    snapshot.restore_state(restored, data)
+    assert _state(loaded) == _state(restored) == _state(game_state)
+
+    for game in (game_state, loaded, restored):
+        _play(game, 5000, seed=2)
+    assert _state(loaded) == _state(restored) == _state(game_state)
+
+
+def test_restore_returns_game_to_saved_point():
+    game_state = core.GameState(seed=3)
+    _play(game_state, 500, seed=4)
+    data = snapshot.save_state(game_state)
+    saved = _state(game_state)
+    for seed in range(3):
+        _play(game_state, 300, seed=seed)
+        snapshot.restore_state(game_state, data)
+        assert _state(game_state) == saved
+
+
+def test_damaged_snapshots_are_rejected():
+    game_state = core.GameState(seed=5)
+    data = snapshot.save_state(game_state)
+    with pytest.raises(snapshot.SnapshotFormatError, match='Not a'):
+        snapshot.load_state(b'SNKR' + data[4:])
+    with pytest.raises(snapshot.SnapshotFormatError, match='version'):
+        snapshot.load_state(data[:4] + b'\x63' + data[5:])
+    with pytest.raises(snapshot.SnapshotFormatError):
+        snapshot.load_state(data[:-100])
+    with pytest.raises(snapshot.SnapshotFormatError, match='does not fit'):
+        snapshot.restore_state(core.GameState(rocks=6), data)
+
+
+def test_game_is_resumed_from_save(_the_snake, tmp_path):
+    game_state = core.GameState(seed=9)
+    _play(game_state, 1000, seed=9)
+    path = tmp_path / 'game.snks'
+    path.write_bytes(snapshot.save_state(game_state))
+
+    resumed = _the_snake.create_game(
+        _the_snake.parse_args(['--save', str(path), '--rocks', '1'])
+    )
+    assert isinstance(resumed.snake, _the_snake.Snake)
+    assert isinstance(resumed.apple, _the_snake.Apple)
+    assert _state(resumed) == _state(game_state)
+
+
+def test_damaged_snapshot_leaves_game_as_it_was():
+    game_state = core.GameState(seed=6)
+    _play(game_state, 700, seed=6)
+    saved = _state(game_state)
+    other = core.GameState(seed=8)
+    data = snapshot.save_state(other)
+    snake_cells = snapshot.HEADER.size + snapshot.RANDOM_STATE.size
+    empty_cells = (
+        len(data) - 4 * other.board.size - 4 * len(other.board.empty_cells)
+    )
+
+    def damage(offset, value):
+        return data[:offset] + value + data[offset + len(value):]
+
+    for damaged in (
+        data[:-1],
+        data + b'\0',
+        damage(snake_cells, (10**6).to_bytes(4, 'little')),
+        damage(empty_cells, data[empty_cells + 4:empty_cells + 8]),
+    ):
+        with pytest.raises(snapshot.SnapshotFormatError):
+            snapshot.restore_state(game_state, damaged)
+        assert _state(game_state) == saved
+
+
+def test_speed_is_saved_as_integer():
+    game_state = core.GameState(seed=2)
+    game_state.speed = 9
+    loaded = snapshot.load_state(snapshot.save_state(game_state))
+    assert loaded.speed == 9
+    assert isinstance(loaded.speed, int)
+
+
+def test_seeds_that_do_not_fit_snapshots_are_rejected(_the_snake):
+    with pytest.raises(ValueError):
+        core.GameState(seed=-1)
+    with pytest.raises(ValueError):
+        core.GameState(seed=core.MAX_SEED + 1)
+    with pytest.raises(SystemExit):
+        _the_snake.parse_args(['--seed', '-1'])
+    game_state = core.GameState(seed=core.MAX_SEED)
+    assert snapshot.load_state(snapshot.save_state(game_state)).seed == (
+        core.MAX_SEED
+    )
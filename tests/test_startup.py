@@ -0,0 +1,40 @@
+import subprocess
+import sys
+
+from conftest import BASE_DIR
+
+
+def test_import_does_not_open_window():
+    output = subprocess.run(
+        [
+            sys.executable, '-c',
+            'import the_snake, pygame; '
+            'print(pygame.display.get_init(), '
+            'isinstance(the_snake.screen, pygame.Surface))',
+        ],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=10,
+    ).stdout
+    assert output.split() == ['False', 'True']
+
+
+def test_import_does_not_load_optional_modules():
+    output = subprocess.run(
+        [
+            sys.executable, '-c',
+            'import sys, the_snake; '
+            'the_snake.parse_args([]); '
+            'print(*sorted(set(sys.modules) & {'
+            '"arena", "autopilot", "fields", "replay", "snapshot", '
+            '"sqlite3", "stats"}))',
+        ],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=10,
+    ).stdout
+    assert output.split() == []
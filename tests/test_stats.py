@@ -0,0 +1,72 @@
+import sqlite3
+import time
+from random import Random
+
+import snake_core as core
+import stats
+import tournament
+
+
+def _death(length, ticks=100, cause=core.HIT_ROCK):
+    return stats.Death(
+        died_at=time.time(), length=length, apples=length - 1,
+        ticks=ticks, cause=cause, speed=core.START_SPEED,
+    )
+
+
+def test_deaths_are_kept_between_sessions(tmp_path):
+    path = tmp_path / 'stats.sqlite3'
+    store = stats.StatsStore(path)
+    for length in (5, 12, 3):
+        store.record(_death(length))
+    store.record(_death(12, ticks=50, cause=core.HIT_SELF))
+    assert store.totals == stats.Totals(4, 28, 350, 12)
+    store.close()
+
+    store = stats.StatsStore(path)
+    assert store.totals == stats.Totals(4, 28, 350, 12)
+    assert [
+        (death.length, death.ticks) for death in store.leaderboard(3)
+    ] == [(12, 50), (12, 100), (5, 100)]
+    causes = store.causes()
+    assert causes[core.HIT_ROCK][:2] == (3, 12)
+    assert causes[core.HIT_SELF] == (1, 12, 12.0)
+    store.close()
+
+
+def test_record_does_not_wait_for_locked_database(tmp_path):
+    path = tmp_path / 'stats.sqlite3'
+    store = stats.StatsStore(path, flush_seconds=0)
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute('BEGIN EXCLUSIVE')
+    started = time.perf_counter()
+    for length in range(1, 101):
+        store.record(_death(length))
+    assert time.perf_counter() - started < 0.5
+    time.sleep(0.1)
+    blocker.execute('COMMIT')
+    blocker.close()
+
+    store.flush()
+    assert store.connection.execute(
+        'SELECT COUNT(*), MAX(length) FROM deaths'
+    ).fetchone() == (100, 100)
+    store.close()
+
+
+def test_death_tracker_reports_game_before_reset():
+    game_state = core.GameState(width=12, height=10, rocks=10, seed=3)
+    tracker = stats.DeathTracker(game_state)
+    rng = Random(3)
+    deaths = []
+    while len(deaths) < 3:
+        length = game_state.snake.length
+        event = game_state.step(tournament.greedy_policy(game_state, rng))
+        death = tracker.update(event)
+        if death is not None:
+            assert death.length == length
+            assert death.apples == length - 1
+            assert death.cause == event
+            deaths.append(death)
+    assert sum(death.ticks for death in deaths) == game_state.ticks
+    assert tracker.games == 3
@@ -0,0 +1,28 @@
+import pytest
+
+import snake_core as core
+import tournament
+
+
+def test_play_game_is_reproducible():
+    first = tournament.play_game(5, policy='greedy', max_ticks=5000)
+    assert first == tournament.play_game(5, policy='greedy', max_ticks=5000)
+    assert first.death in core.GAME_OVER_EVENTS + (tournament.TIMEOUT,)
+    assert 0 < first.ticks <= 5000
+
+
+def test_run_tournament_returns_every_game():
+    results = list(tournament.run_tournament(
+        6, seed=10, workers=2, policy='random', max_ticks=300
+    ))
+    assert sorted(result.seed for result in results) == list(range(10, 16))
+    assert results[0] == tournament.play_game(
+        results[0].seed, policy='random', max_ticks=300
+    )
+
+
+@pytest.mark.parametrize('games', ['0', '-3'])
+def test_tournament_needs_at_least_one_game(games, capsys):
+    with pytest.raises(SystemExit):
+        tournament.main(['--games', games])
+    assert '--games' in capsys.readouterr().err
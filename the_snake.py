@@ -16,6 +16,9 @@ This version of a game contains:
          Increasing its speed over every eaten apple.
          Dies on hitting a rock.
 
+Game rules live in module 'snake_core' and do not depend on pygame.
+This module draws game objects and handles keyboard input.
+
 Controls:
     Use your keyboard arrows to set direction of a snake.
     Space - pause game.
@@ -27,31 +30,42 @@ Created by Yandex.Practicum student:
     isarenko.dmitry.it@gmail.com
 """
 
-from random import choice, randint, randrange
-
-import pygame as pg
-
-# Параметры яблок(а)
-APPLE_LIFE_IN_TICKS = [25, 70]
-APPLE_BLINK_SPEED_IN_TICKS = 3
-
-# Параметры камня(ей)
-ROCKS_GENERATED = 5
-ROCK_LIFE_IN_TICKS = [40, 150]
-ROCK_BLINK_SPEED_IN_TICKS = 3
+import argparse
+import os
+from time import perf_counter_ns
+
+# pygame печатает приветствие при импорте - отключаем его:
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame as pg  # noqa: E402
+
+import snake_core as core  # noqa: E402
+from snake_core import (  # noqa: E402
+    DIRECTIONS,
+    DOWN,
+    GAME_OVER_EVENTS,
+    GRID_HEIGHT,
+    GRID_WIDTH,
+    LEFT,
+    RIGHT,
+    UP,
+    GameState,
+)
+from profiler import (  # noqa: E402
+    NULL_PROFILER,
+    PROFILE_ENV,
+    FrameTimeStats,
+    TickProfiler,
+)
+
+# Модули арены, автопилота, записи, снимков и статистики импортируются
+# в main() и create_game() только для своих опций: игра без них
+# запускается быстрее, а sqlite3 и потоки не загружаются вовсе.
 
 # Константы для размеров поля и сетки:
-SCREEN_WIDTH, SCREEN_HEIGHT = 640, 480
 GRID_SIZE = 20
-GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
-GRID_HEIGHT = SCREEN_HEIGHT // GRID_SIZE
-SCREEN_CENTER_POS = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-
-# Направления движения:
-UP = (0, -1)
-DOWN = (0, 1)
-LEFT = (-1, 0)
-RIGHT = (1, 0)
+SCREEN_WIDTH, SCREEN_HEIGHT = GRID_WIDTH * GRID_SIZE, GRID_HEIGHT * GRID_SIZE
+SCREEN_CENTER_CELL = GRID_HEIGHT // 2 * GRID_WIDTH + GRID_WIDTH // 2
 
 # Цвет фона - черный:
 BOARD_BACKGROUND_COLOR = (0, 0, 0)
@@ -71,34 +85,279 @@ APPLE_COLOR = (255, 0, 0)
 # Цвет змейки
 SNAKE_COLOR = (0, 255, 0)
 
-# Скорость движения змейки:
-START_SPEED = 6
-SPEED_STEP = 0
+# Цвет змеек ботов на арене (--snakes)
+BOT_SNAKE_COLOR = (255, 200, 0)
+
+# Если голова змейки подходит к краю окна ближе, чем на столько ячеек,
+# камера сдвигается так, чтобы голова оказалась в центре окна:
+CAMERA_MARGIN = 4
+
+# Частота кадров отрисовки. Игра идет со своей скоростью (тиков в
+# секунду), а кадры рисуются чаще, между тиками змейка движется плавно:
+RENDER_FPS = 60
+
+# Сколько тиков игры можно догнать за один кадр. Если отрисовка отстала
+# сильнее, оставшееся время отбрасывается, чтобы игра не ускорялась
+# рывками:
+MAX_TICKS_PER_FRAME = 5
+
+# Заголовок окна и как часто в нем обновляются FPS и джиттер кадров:
+CAPTION = 'Змейка'
+CAPTION_UPDATE_MS = 1000
+
+# Клавиши управления змейкой:
+MOVEMENT_KEYS = {
+    pg.K_UP: UP,
+    pg.K_DOWN: DOWN,
+    pg.K_LEFT: LEFT,
+    pg.K_RIGHT: RIGHT,
+}
+
+# Режимы отрисовки:
+# - full: каждый кадр перерисовывается весь экран
+# - dirty: на экран выводятся только изменившиеся ячейки
+RENDER_FULL = 'full'
+RENDER_DIRTY = 'dirty'
+RENDER_MODES = (RENDER_FULL, RENDER_DIRTY)
+DEFAULT_RENDER_MODE = os.environ.get('SNAKE_RENDER_MODE', RENDER_DIRTY)
+
+# На сколько змеек арены приходится одно яблоко:
+ARENA_SNAKES_PER_APPLE = 2
+
+# Переменная окружения с путем к базе статистики (см. stats.py):
+STATS_ENV = 'SNAKE_STATS'
 
 # Глобальные изменяемые переменные
-game_speed = START_SPEED
 is_paused = False
+render_mode = DEFAULT_RENDER_MODE
+
+# Автопилот, который ведет змейку вместо игрока (--autopilot):
+autopilot = None
 
-# Список занятых ячеек:
-not_empty_cells: list[tuple] = []
+# Смерти змейки игрока и база, куда они пишутся (--stats):
+death_tracker = None
+stats_store = None
 
-# Список активных игровых объектов:
-game_objects = []
+# Сколько игр сыграно за сеанс, если статистика не ведется:
+games_played = 0
 
-# Настройка игрового окна:
-screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), 0, 32)
+# Ячейки, которые будут выведены на экран в текущем кадре:
+pending_blits = []
 
-# Заголовок окна игрового поля:
-pg.display.set_caption('Змейка')
+# Яблоки и камни, перемещенные в текущем тике, - их нужно нарисовать на
+# новом месте:
+moved_objects = []
+
+# Поверхность для отрисовки. До вызова init_display() это поверхность
+# в памяти: импорт модуля не открывает окно и не запускает видеосистему.
+screen = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
 
 # Настройка времени:
 clock = pg.time.Clock()
 
 
+class TileCache:
+    """
+    Pre-rendered cell surfaces, one per pair of body and border colors.
+    Tiles are looked up by color values, so a changed color gets its own
+    tile, and all tiles are rendered again if GRID_SIZE has changed or
+    the window was opened again.
+    """
+
+    def __init__(self):
+        self.tiles = {}
+        self.tile_size = GRID_SIZE
+
+    def clear(self):
+        """Forgets all tiles, they are rendered again when needed."""
+        self.tiles.clear()
+        self.tile_size = GRID_SIZE
+
+    def get(self, color, border_color):
+        """
+        Returns a cell surface filled with a color and framed with
+        a 1px border.
+
+        args:
+            color (tuple | list | pygame.Color): RGB color of a cell
+            border_color (tuple | list | pygame.Color): RGB color of
+                a cell border
+        returns:
+            pygame.Surface
+        """
+        if self.tile_size != GRID_SIZE:
+            self.clear()
+        # Списки и pygame.Color изменяемы, ключом служат их значения:
+        key = (tuple(color), tuple(border_color))
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = pg.Surface((GRID_SIZE, GRID_SIZE))
+            tile.fill(color)
+            pg.draw.rect(tile, border_color, tile.get_rect(), 1)
+            if pg.display.get_surface():
+                tile = tile.convert()
+            self.tiles[key] = tile
+        return tile
+
+
+tile_cache = TileCache()
+
+
+class Camera:
+    """
+    Part of a game board shown in the window. A board may be much larger
+    than the window: the camera follows the snake`s head and only cells
+    in view are drawn, so cost of a frame does not depend on board size.
+
+    args:
+        world_width, world_height (int): board size in cells
+        view_width, view_height (int): window size in cells, cut down
+            to board size for small boards
+    """
+
+    def __init__(
+        self,
+        world_width=GRID_WIDTH,
+        world_height=GRID_HEIGHT,
+        view_width=GRID_WIDTH,
+        view_height=GRID_HEIGHT,
+    ):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.view_width = min(view_width, world_width)
+        self.view_height = min(view_height, world_height)
+        # Ячейка доски в левом верхнем углу окна:
+        self.column = 0
+        self.row = 0
+
+    @property
+    def screen_size(self):
+        """Size of the view in pixels."""
+        return self.view_width * GRID_SIZE, self.view_height * GRID_SIZE
+
+    def to_screen(self, position):
+        """
+        Converts a cell index to window coordinates of its top left corner.
+
+        args:
+            position (int): cell index
+        returns:
+            tuple | None: (x, y) in pixels or None if a cell is out of view
+        """
+        row, column = divmod(position, self.world_width)
+        column = (column - self.column) % self.world_width
+        row = (row - self.row) % self.world_height
+        if column >= self.view_width or row >= self.view_height:
+            return None
+        return column * GRID_SIZE, row * GRID_SIZE
+
+    def center_on(self, position):
+        """Moves the view so that a cell is in the middle of it."""
+        row, column = divmod(position, self.world_width)
+        self.column = self._centered(
+            column, self.view_width, self.world_width
+        )
+        self.row = self._centered(row, self.view_height, self.world_height)
+
+    def follow(self, position):
+        """
+        Centers the view on a cell if it came closer than CAMERA_MARGIN
+        to an edge of the window or left the view.
+
+        args:
+            position (int): cell index, usually the snake`s head
+        returns:
+            bool: True if the view has moved
+        """
+        row, column = divmod(position, self.world_width)
+        if (
+            self._is_inside(column, self.column,
+                            self.view_width, self.world_width)
+            and self._is_inside(row, self.row,
+                                self.view_height, self.world_height)
+        ):
+            return False
+        origin = self.column, self.row
+        self.center_on(position)
+        return origin != (self.column, self.row)
+
+    def visible_cells(self):
+        """Yields indexes of all cells in view, row by row."""
+        columns = [
+            column % self.world_width
+            for column in range(self.column, self.column + self.view_width)
+        ]
+        for row in range(self.row, self.row + self.view_height):
+            row_start = row % self.world_height * self.world_width
+            for column in columns:
+                yield row_start + column
+
+    @staticmethod
+    def _centered(cell, view, world):
+        if view >= world:
+            return 0
+        return (cell - view // 2) % world
+
+    @staticmethod
+    def _is_inside(cell, origin, view, world):
+        if view >= world:
+            return True
+        margin = min(CAMERA_MARGIN, view // 4)
+        return margin <= (cell - origin) % world < view - margin
+
+
+camera = Camera()
+
+
+def init_display():
+    """
+    Opens the game window of the camera`s view size and makes it
+    the drawing surface.
+
+    args:
+        None
+    returns:
+        None
+    """
+    global screen
+    pg.init()
+    screen = pg.display.set_mode(camera.screen_size, 0, 32)
+    pg.display.set_caption(CAPTION)
+    tile_cache.clear()
+
+
+def cell_to_pixels(position):
+    """
+    Converts a cell index to screen coordinates of its top left corner.
+
+    args:
+        position (int): cell index
+    returns:
+        tuple | None: (x, y) in pixels or None if a cell is out of view
+    """
+    return camera.to_screen(position)
+
+
+def cell_edge(direction, size):
+    """
+    Part of a cell along its side that faces a direction.
+
+    args:
+        direction (tuple): side of a cell, one of DIRECTIONS
+        size (int): width of the part in pixels
+    returns:
+        pygame.Rect: area within a cell
+    """
+    dx, dy = direction
+    if dx:
+        return pg.Rect(GRID_SIZE - size if dx > 0 else 0, 0, size, GRID_SIZE)
+    return pg.Rect(0, GRID_SIZE - size if dy > 0 else 0, GRID_SIZE, size)
+
+
 class GameObject:
     """
-    Base game class. Used to define fundamental attributes to all
-    inheritant classes.
+    Base game class. Used to define fundamental drawing attributes to all
+    inheritant classes. Game rules are inherited from 'snake_core'.
 
     Superclass:
         object (built-in)
@@ -108,17 +367,14 @@ class GameObject:
 
     def __init__(
         self,
-        position=SCREEN_CENTER_POS,
+        position=SCREEN_CENTER_CELL,
         body_color=BOARD_BACKGROUND_COLOR,
         border_color=BORDER_COLOR,
     ):
         self.body_color = body_color
-        self.default_body_color = body_color
         self.border_color = border_color
-        self.low_life_blink_speed = 3
-        self.blink_tick_count = 0
         self.position = position
-        game_objects.append(self)
+        self.drawn_look = None
 
     def draw(self):
         """Method is not available in superclass.
@@ -127,138 +383,107 @@ class GameObject:
 
     def draw_single_dot(self, color=None, border_color=None, position=None):
         """
-        Method is used for drawing an apple object on a grid.
-        Color is predefined.
+        Method is used for drawing a single cell object on a grid.
+        Colors and position default to the object`s own ones.
+        Cell is queued and is put on screen by 'flush_tiles',
+        cells out of the camera`s view are skipped.
 
         args:
-            None
+            color (tuple): RGB color of a cell
+            border_color (tuple): RGB color of a cell border
+            position (int): cell index
         returns:
             None
         """
         color = color or self.body_color
         border_color = border_color or self.border_color
-        position = position or self.position
-
-        rect = pg.Rect(position, (GRID_SIZE, GRID_SIZE))
-        pg.draw.rect(screen, color, rect)
-        pg.draw.rect(screen, border_color, rect, 1)
-
-
-class LifeUpdatableMixin:
-    """
-    Mixin that adds lifespan to a class.
-    Built-in check for having attr 'life'
-    """
-
-    def update_life(self):
-        """
-        Method is used to decrease 'life' counter of an object.
-        - Triggers method 'blink_on_low_life' when reaching certain amount.
-        - Triggers method 'reset' on reaching zero.
-
-        args:
-            None
-        returns:
-            None
-        """
-        if hasattr(self, 'life'):
-            self.life -= 1
-            if self.life <= 0:
-                self.reset()
-            elif self.life <= 20:
-                self.blink_on_low_life()
-
+        if position is None:
+            position = self.position
 
-class RandomizibleCoordsMixin:
-    """
-    Mixin that forces initialized object to appear at random location.
-    Used for Apple and Rock classes.
-    """
+        pixels = cell_to_pixels(position)
+        if pixels is not None:
+            pending_blits.append((tile_cache.get(color, border_color), pixels))
 
-    def randomize_position(self):
+    def draw_cell_part(self, position, side, fraction):
         """
-        Assigns a random position for an object.
-        Coords stays withing the game field.
+        Draws a cell filled with the object`s color only partly:
+        a strip along one side, the rest of a cell is cleared.
 
         args:
-            None
+            position (int): cell index
+            side (tuple): direction of the side the strip is drawn along
+            fraction (float): width of the strip, from 0 to 1
         returns:
             None
         """
-        update_not_empty_cells(get_not_empty_cells(*game_objects))
-        while True:
-            rand_x = randrange(0, SCREEN_WIDTH, GRID_SIZE)
-            rand_y = randrange(0, SCREEN_HEIGHT, GRID_SIZE)
-            if (rand_x, rand_y) not in not_empty_cells:
-                break
-        self.position = (rand_x, rand_y)
-        update_not_empty_cells(get_not_empty_cells(*game_objects))
-
-
-class BlinkableMixin:
-    """
-    Mixin that allows blinking behaviour.
-    Applies to Apple and Rock classes.
-    """
-
-    def blink_on_low_life(self):
+        pixels = cell_to_pixels(position)
+        if pixels is None:
+            return
+        pending_blits.append((
+            tile_cache.get(BOARD_BACKGROUND_COLOR, BOARD_BACKGROUND_COLOR),
+            pixels,
+        ))
+        size = round(GRID_SIZE * fraction)
+        if size > 0:
+            area = cell_edge(side, size)
+            pending_blits.append((
+                tile_cache.get(self.body_color, self.border_color),
+                (pixels[0] + area.x, pixels[1] + area.y),
+                area,
+            ))
+
+    def needs_redraw(self, look):
         """
-        Adds blinks for a rock object on trigger. Each iteration switches
-        color from default rock color to predefined blinking color.
+        Checks if an object looks different from the last time it was
+        drawn. In full render mode objects are always redrawn.
 
         args:
-            None
+            look (tuple): anything that affects appearance of an object
         returns:
-            None
+            bool
         """
-        if self.blink_tick_count == self.low_life_blink_speed:
-            self.body_color = self.default_body_color
-            self.blink_tick_count = 0
-        elif self.blink_tick_count % 2 == 0:
-            self.blink_tick_count += 1
-            self.body_color = self.default_body_color
-        else:
-            self.blink_tick_count += 1
-            self.body_color = BLINK_COLOR
+        if render_mode == RENDER_DIRTY and look == self.drawn_look:
+            return False
+        self.drawn_look = look
+        return True
 
 
-class Apple(
-    GameObject,
-    LifeUpdatableMixin,
-    RandomizibleCoordsMixin,
-    BlinkableMixin,
-):
+class Apple(GameObject, core.Apple):
     """
-    Class that describes an apple in game.
-    - Apple has a random lifetime and disappears if hasn`t been picked up.
-    - Blinks on final lifespan phase.
-
-    Picking up:
-    - increases the snake`s length by 1 segment.
-    - increases the snake`s speed by fixed amount.
-    - generates a new apple at a random location.
+    Class that draws an apple in game. Rules are described
+    in 'snake_core.Apple'.
 
     Superclass:
-        GameObject
+        GameObject, snake_core.Apple
     Subclasses:
         None
     """
 
     def __init__(
         self,
-        position=SCREEN_CENTER_POS,
+        position=SCREEN_CENTER_CELL,
         body_color=APPLE_COLOR,
         border_color=BORDER_COLOR,
+        board=None,
+        rng=None,
+        scheduler=None,
+        store=None,
     ):
-        super().__init__(position=position,
-                         body_color=body_color,
-                         border_color=border_color)
-        self.randomize_position()
-        self.life = randint(APPLE_LIFE_IN_TICKS[0], APPLE_LIFE_IN_TICKS[1])
-        self.low_life_blink_speed = APPLE_BLINK_SPEED_IN_TICKS
+        core.Apple.__init__(
+            self, board=board, rng=rng, scheduler=scheduler, store=store
+        )
+        GameObject.__init__(self,
+                            position=self.position,
+                            body_color=body_color,
+                            border_color=border_color)
 
     def draw(self, body_color=None, border_color=None):
-        """Method that draws Apple object."""
+        """Method that draws Apple object if it has changed."""
+        if body_color is None:
+            if not self.needs_redraw((self.position, self.is_blinked)):
+                return
+            if self.is_blinked:
+                body_color = BLINK_COLOR
         self.draw_single_dot(
             position=self.position,
             color=body_color,
@@ -266,51 +491,50 @@ class Apple(
         )
 
     def reset(self):
-        """Method that resets Apple object."""
+        """Method that erases and resets Apple object."""
         self.draw(body_color=BOARD_BACKGROUND_COLOR,
                   border_color=BOARD_BACKGROUND_COLOR)
-        self.body_color = self.default_body_color
-        self.randomize_position()
-        self.life = randint(APPLE_LIFE_IN_TICKS[0], APPLE_LIFE_IN_TICKS[1])
+        self.drawn_look = None
+        super().reset()
+        moved_objects.append(self)
 
 
-class Rock(
-    GameObject,
-    LifeUpdatableMixin,
-    RandomizibleCoordsMixin,
-    BlinkableMixin,
-):
+class Rock(GameObject, core.Rock):
     """
-    Class that describes a rock in game.
-    - Rock has a random lifetime and disappears over time.
-    - Blinks on final lifespan phase.
-
-    Hitting rock:
-    - kills your snake instantly.
-    - decreases snake`s length to 1.
-    - decreases snake`s speed to default speed.
+    Class that draws a rock in game. Rules are described
+    in 'snake_core.Rock'.
 
     Superclass:
-        Apple
+        GameObject, snake_core.Rock
     Subclasses:
         None
     """
 
     def __init__(
         self,
-        position=SCREEN_CENTER_POS,
+        position=SCREEN_CENTER_CELL,
         body_color=ROCK_COLOR,
         border_color=BORDER_COLOR,
+        board=None,
+        rng=None,
+        scheduler=None,
+        store=None,
     ):
-        super().__init__(position=position,
-                         body_color=body_color,
-                         border_color=border_color)
-        self.randomize_position()
-        self.life = randint(ROCK_LIFE_IN_TICKS[0], ROCK_LIFE_IN_TICKS[1])
-        self.low_life_blink_speed = ROCK_BLINK_SPEED_IN_TICKS
+        core.Rock.__init__(
+            self, board=board, rng=rng, scheduler=scheduler, store=store
+        )
+        GameObject.__init__(self,
+                            position=self.position,
+                            body_color=body_color,
+                            border_color=border_color)
 
     def draw(self, body_color=None, border_color=None):
-        """Method that draws Rock object."""
+        """Method that draws Rock object if it has changed."""
+        if body_color is None:
+            if not self.needs_redraw((self.position, self.is_blinked)):
+                return
+            if self.is_blinked:
+                body_color = BLINK_COLOR
         self.draw_single_dot(
             position=self.position,
             color=body_color,
@@ -318,131 +542,145 @@ class Rock(
         )
 
     def reset(self):
-        """Method that resets Rock object."""
+        """Method that erases and resets Rock object."""
         self.draw(body_color=BOARD_BACKGROUND_COLOR,
                   border_color=BOARD_BACKGROUND_COLOR)
-        self.body_color = self.default_body_color
-        self.randomize_position()
-        self.life = randint(ROCK_LIFE_IN_TICKS[0], ROCK_LIFE_IN_TICKS[1])
+        self.drawn_look = None
+        super().reset()
+        moved_objects.append(self)
 
 
-class Snake(GameObject):
+class Snake(GameObject, core.Snake):
     """
-    Class that describes a snake in game.
-    -  Starting direction: right.
-    -  Starting length: 1.
-    -  Moves in discrete steps on grid. Controlled by keyboard arrows.
-    -  Grows by consuming apples.
-    -  Dies upon hitting itself or any rock.
+    Class that draws a snake in game. Rules are described
+    in 'snake_core.Snake'.
 
     Superclass:
-        GameObject
+        GameObject, snake_core.Snake
     Subclasses:
         None
     """
 
     def __init__(
         self,
-        position=SCREEN_CENTER_POS,
+        position=SCREEN_CENTER_CELL,
         body_color=SNAKE_COLOR,
         border_color=BORDER_COLOR,
+        board=None,
+        rng=None,
     ):
-        super().__init__(position=position,
-                         body_color=body_color,
-                         border_color=border_color)
-        self.direction = RIGHT
-        self.next_direction = None
-        self.length = 1
-        self.positions = [self.position]
-        self.last = None
-
-    def get_head_position(self):
-        """
-        Returns position of the snake`s head.
-
-        args:
-            None
-        returns:
-            tuple: (x, y)
-        """
-        return self.positions[0]
+        GameObject.__init__(self,
+                            position=position,
+                            body_color=body_color,
+                            border_color=border_color)
+        core.Snake.__init__(self, board=board, rng=rng, position=position)
+        # Ячейка, в которой нарисован уползающий хвост между тиками:
+        self.trail = None
+        # Ячейка, в которую голова нарисована вползающей между тиками:
+        self.partial_head = None
 
-    def reset(self):
+    def draw(self):
         """
-        Resets game.
+        Draws head and body of a snake. Clears tail trail on movement,
+        unless something else has entered the cell left by the tail.
 
         args:
             None
         returns:
             None
         """
-        self.length = 1
-        self.next_direction = None
-        self.positions = [self.position]
+        if self.trail is not None:
+            if self.trail not in self.board:
+                self.draw_single_dot(
+                    color=BOARD_BACKGROUND_COLOR,
+                    border_color=BOARD_BACKGROUND_COLOR,
+                    position=self.trail,
+                )
+            self.trail = None
+        self.finish_head()
+        self.draw_single_dot(position=self.positions[0])
+
+        if self.last is not None and self.last not in self.board:
+            self.draw_single_dot(
+                color=BOARD_BACKGROUND_COLOR,
+                border_color=BOARD_BACKGROUND_COLOR,
+                position=self.last,
+            )
 
-    def draw(self):
+    def reset(self):
         """
-        Draws head and body of a snake. Clears tail trail on movement.
-
-        args:
-            None
-        returns:
-            None
+        Erases the snake and returns it to its starting cell. Cells
+        taken by something else (e.g. another snake on an arena) are
+        left as they are.
         """
-        head_rect = pg.Rect(self.positions[0], (GRID_SIZE, GRID_SIZE))
-        pg.draw.rect(screen, self.body_color, head_rect)
-        pg.draw.rect(screen, self.border_color, head_rect, 1)
-
-        if self.last:
-            last_rect = pg.Rect(self.last, (GRID_SIZE, GRID_SIZE))
-            pg.draw.rect(screen, BOARD_BACKGROUND_COLOR, last_rect)
-
-    def move(self):
+        # Клетка, которую хвост покинул на этом тике, тоже стирается:
+        old_positions = [*self.positions, self.last]
+        self.partial_head = None
+        super().reset()
+        for position in old_positions:
+            if position is not None and position not in self.board:
+                self.draw_single_dot(
+                    color=BOARD_BACKGROUND_COLOR,
+                    border_color=BOARD_BACKGROUND_COLOR,
+                    position=position,
+                )
+
+    def draw_interpolated(self, fraction):
         """
-        Implementation of 'movement' of a snake:
-        1. add head to heading direction
-        2. cut the tail segment if haven`t recently eaten an apple
-
-        Warping over game field edges.
+        Draws a snake between two ticks: the head slides into its cell
+        and the tail slides out of the cell left at the last tick, unless
+        something else has appeared there. Used for frames drawn more
+        often than the game ticks.
 
         args:
-            None
+            fraction (float): part of the tick passed, from 0 to 1
         returns:
             None
         """
-        current_x, current_y = self.get_head_position()
-        direction_x, direction_y = self.direction
-        next_x = (current_x + GRID_SIZE * direction_x) % SCREEN_WIDTH
-        next_y = (current_y + GRID_SIZE * direction_y) % SCREEN_HEIGHT
-
-        self.positions.insert(0, ((next_x), (next_y)))
-
-        self.last = self.positions.pop(-1)
-        update_not_empty_cells(get_not_empty_cells(*game_objects))
-
-    def grow(self):
-        """Method allows growing behavior on call."""
-        self.positions.append(self.last)
-        self.last = None
-
-    def update_direction(self):
+        head = self.positions[0]
+        self.finish_head()
+        if len(self.positions) > 1:
+            self.draw_single_dot(position=self.positions[1])
+        dx, dy = self.direction
+        self.draw_cell_part(head, (-dx, -dy), fraction)
+        self.partial_head = head
+        if self.last is None or self.last in self.board:
+            return
+        tail = self.positions[-1]
+        for direction in DIRECTIONS:
+            if self.board.neighbour(self.last, direction) == tail:
+                self.draw_cell_part(self.last, direction, 1 - fraction)
+                self.trail = self.last
+                return
+
+    def finish_head(self):
         """
-        Rewrites movement direction if another one was set.
+        Repaints the cell the head was drawn sliding into by the last
+        frame, if the head has left it since: several ticks may pass
+        between two frames, so it is not always the cell behind the
+        head. Erased if the snake has left the cell too.
 
         args:
             None
         returns:
             None
         """
-        if self.next_direction:
-            self.direction = self.next_direction
-            self.next_direction = None
+        cell = self.partial_head
+        self.partial_head = None
+        if cell is None or cell == self.positions[0]:
+            return
+        if cell in self.segment_counts:
+            self.draw_single_dot(position=cell)
+        elif cell not in self.board:
+            self.draw_single_dot(
+                color=BOARD_BACKGROUND_COLOR,
+                border_color=BOARD_BACKGROUND_COLOR,
+                position=cell,
+            )
 
 
 def handle_keys(game_object: Snake):
     """Handles keyboard inputs for controlling snake and exiting game."""
-    global is_paused
-
     for event in pg.event.get():
         if event.type == pg.QUIT:
             quit_game()
@@ -463,14 +701,9 @@ def handle_movement_keys(event, game_object: Snake):
     if is_paused:
         return
 
-    if event.key == pg.K_UP and game_object.direction != DOWN:
-        game_object.next_direction = UP
-    elif event.key == pg.K_DOWN and game_object.direction != UP:
-        game_object.next_direction = DOWN
-    elif event.key == pg.K_LEFT and game_object.direction != RIGHT:
-        game_object.next_direction = LEFT
-    elif event.key == pg.K_RIGHT and game_object.direction != LEFT:
-        game_object.next_direction = RIGHT
+    direction = MOVEMENT_KEYS.get(event.key)
+    if direction:
+        game_object.turn(direction, made_at=perf_counter_ns())
 
 
 def handle_pause_exit_keys(event):
@@ -482,129 +715,374 @@ def handle_pause_exit_keys(event):
         is_paused = not is_paused
 
 
-def increase_game_speed():
+def redraw_screen(game_state):
     """
-    Increases speed on call. Typically used in eating an apple condition.
+    Clears the screen and draws every taken cell in the camera`s view
+    from scratch. Only visible cells are visited, so a long snake on
+    a large board costs no more than a short one.
 
     args:
-        None
+        game_state (GameState | Arena): game to draw
     returns:
         None
     """
-    global game_speed, game_speed_saved
-    game_speed += SPEED_STEP
-
+    screen.fill(BOARD_BACKGROUND_COLOR)
+    board = game_state.board
+    cells = board.cells
+    snake = game_state.snake
+    for position in camera.visible_cells():
+        if cells[position]:
+            item = board.item_at(position)
+            if item is None:
+                # Клетки без предметов, не занятые змейкой игрока,
+                # принадлежат ботам арены:
+                snake.draw_single_dot(
+                    color=(
+                        None if position in snake.segment_counts
+                        else BOT_SNAKE_COLOR
+                    ),
+                    position=position,
+                )
+            else:
+                item.drawn_look = None
+                item.draw()
+    flush_tiles()
+    pg.display.update()
+
+
+def draw_objects(game_state):
+    """
+    Draws game objects that may have changed at the last tick.
+    In dirty render mode only snakes, moved objects and blinking
+    ones are visited, so rocks that stay still cost nothing however
+    many there are. In full mode every object is drawn.
 
-def get_not_empty_cells(*args) -> list[tuple]:
-    """Function that can be used to get all taken cells."""
-    not_empty_cells = []
+    args:
+        game_state (GameState | Arena): game to draw
+    returns:
+        None
+    """
+    if render_mode == RENDER_DIRTY:
+        for snake in game_state.snakes:
+            snake.draw()
+        for obj in moved_objects:
+            obj.draw()
+        for obj in game_state.store.low_life:
+            obj.draw()
+    else:
+        for obj in game_state.objects:
+            obj.draw()
+    moved_objects.clear()
 
-    for obj in args:
-        if isinstance(obj, Snake):
-            not_empty_cells.extend(obj.positions)
-        elif isinstance(obj, Rock) or isinstance(obj, Apple):
-            not_empty_cells.append(obj.position)
-    return not_empty_cells
 
+def flush_tiles():
+    """
+    Draws all cells queued in the current frame with a single blits call.
 
-def update_not_empty_cells(data: list[tuple]) -> None:
-    """Function updates global variable that contains all not empty cells."""
-    global not_empty_cells
-    not_empty_cells = data
+    args:
+        None
+    returns:
+        list[pygame.Rect]: changed areas of the screen
+    """
+    rects = screen.blits(pending_blits)
+    pending_blits.clear()
+    return rects
 
 
-def check_collision(obj_1: Snake | Rock | Apple, obj_2=None):
+def update_display():
     """
-    Check collisions with game objects:
-    - Apple: triggers growth
-    - Rock: triggers death
-    - Snake: (hit yourself) triggers death
+    Pushes drawn changes to the window. In dirty render mode only
+    changed cells are updated, in full mode - the whole screen.
 
     args:
-        game_object (GameObject): The object to check collision against.
+        None
     returns:
         None
     """
-    if isinstance(obj_1, Snake):
-        if isinstance(obj_2, Rock):
-            if obj_1.get_head_position() == obj_2.position:
-                reset_game()
-                obj_1.direction = RIGHT
-        elif isinstance(obj_2, Apple):
-            if obj_1.get_head_position() == obj_2.position:
-                obj_1.grow()
-                obj_2.reset()
-                increase_game_speed()
-        elif obj_2 is None:
-            if any(
-                pos == obj_1.get_head_position()
-                for pos in obj_1.positions[1::]
-            ):
-                reset_game()
-                obj_1.direction = choice([LEFT, RIGHT, UP, DOWN])
-
-
-def reset_game():
-    """Function resets game."""
-    global game_objects, game_speed, game_speed_saved
-    for obj in game_objects:
-        obj.reset()
-
-    game_speed = START_SPEED
-
-    screen.fill(BOARD_BACKGROUND_COLOR)
+    dirty_rects = flush_tiles()
+    if render_mode == RENDER_DIRTY:
+        pg.display.update(dirty_rects)
+    else:
+        pg.display.update()
+
+
+def parse_args(argv=None):
+    """Parses command line arguments of the game."""
+    parser = argparse.ArgumentParser(description='The Snake Game.')
+    parser.add_argument(
+        '--render',
+        choices=RENDER_MODES,
+        default=DEFAULT_RENDER_MODE,
+        help='redraw full screen or changed cells only '
+             '(env: SNAKE_RENDER_MODE)',
+    )
+    parser.add_argument(
+        '--width', type=int, default=GRID_WIDTH,
+        help='board width in cells, the window scrolls over larger boards',
+    )
+    parser.add_argument(
+        '--height', type=int, default=GRID_HEIGHT,
+        help='board height in cells',
+    )
+    parser.add_argument(
+        '--rocks', type=int, default=core.ROCKS_GENERATED,
+        help='amount of rocks on a board',
+    )
+    parser.add_argument(
+        '--seed', type=int, default=None,
+        help='seed of the game, random by default',
+    )
+    saving = parser.add_mutually_exclusive_group()
+    saving.add_argument(
+        '--record', metavar='PATH', default=None,
+        help='save direction changes to a replay log (see replay.py)',
+    )
+    saving.add_argument(
+        '--save', metavar='PATH', default=None,
+        help='resume the game saved in PATH if there is one and save '
+             'the game there on exit, also if it crashes (see snapshot.py)',
+    )
+    parser.add_argument(
+        '--autopilot', action='store_true',
+        help='let the computer steer the snake (see autopilot.py)',
+    )
+    parser.add_argument(
+        '--stats', metavar='PATH', default=os.environ.get(STATS_ENV),
+        help='keep every game over in an SQLite database and count '
+             f'games played over all sessions (see stats.py, env: '
+             f'{STATS_ENV})',
+    )
+    parser.add_argument(
+        '--snakes', type=int, default=1,
+        help='play on an arena with bots: amount of snakes, yours '
+             'included (see arena.py)',
+    )
+    parser.add_argument(
+        '--profile', metavar='PATH', default=os.environ.get(PROFILE_ENV),
+        help='measure phases of every frame and save a Chrome trace '
+             '(or CSV if PATH ends with .csv) on exit '
+             f'(env: {PROFILE_ENV})',
+    )
+    args = parser.parse_args(argv)
+    if args.snakes < 1:
+        parser.error('--snakes has to be at least 1')
+    if args.seed is not None and not 0 <= args.seed <= core.MAX_SEED:
+        parser.error(f'--seed has to be from 0 to {core.MAX_SEED}')
+    if args.snakes > 1 and (args.record or args.save or args.autopilot):
+        parser.error(
+            '--snakes can`t be used with --record, --save or --autopilot'
+        )
+    return args
 
 
-def main():
+def main(args=None):
     """
     Initializes and runs the main game loop.
 
-    Handles object rendering, movement, input processing,
-    collision detection, and frame timing.
+    Advances game state, handles object rendering, input processing
+    and frame timing.
 
     args:
-        None
+        args (argparse.Namespace | None): options from 'parse_args',
+            defaults are used if not given
     returns:
         None
     """
-    global not_empty_cells, game_speed
-    pg.init()
+    global autopilot, camera, death_tracker, games_played, render_mode
+    global stats_store
+    args = args or parse_args([])
+    render_mode = args.render
+    game_state = create_game(args)
+    autopilot = death_tracker = stats_store = None
+    games_played = 0
+    if args.autopilot:
+        from autopilot import Autopilot
+        autopilot = Autopilot(game_state)
+    if args.stats:
+        from stats import DeathTracker, StatsStore
+        death_tracker = DeathTracker(game_state)
+        stats_store = StatsStore(args.stats)
+    board = game_state.board
+    camera = Camera(board.width, board.height)
+    init_display()
+
+    camera.center_on(game_state.snake.get_head_position())
+    if args.profile:
+        game_state.profiler = TickProfiler()
+    try:
+        if args.record is None:
+            run_game(game_state)
+            return
+
+        from replay import record_game
+        with open(args.record, 'wb') as log:
+            recorder = record_game(game_state, log)
+            try:
+                run_game(game_state)
+            finally:
+                recorder.close()
+    finally:
+        if args.save:
+            from snapshot import save_state
+            with open(args.save, 'wb') as save:
+                save.write(save_state(game_state))
+        if game_state.profiler is not None:
+            game_state.profiler.dump(args.profile)
+            print(game_state.profiler.summary())
+        if stats_store is not None:
+            stats_store.close()
+
+
+def create_game(args):
+    """
+    Creates a new game, an arena or resumes a saved game.
 
-    snake = Snake()
-    apple = Apple()
-    if ROCKS_GENERATED > 0:
-        rocks = [Rock() for _ in range(ROCKS_GENERATED)]
-    else:
-        rocks = None
+    args:
+        args (argparse.Namespace): options from 'parse_args'; a game
+            saved in 'save' is resumed if there is one, board size and
+            rocks of a saved game are used then
+    returns:
+        GameState | Arena
+    """
+    classes = {'snake_cls': Snake, 'apple_cls': Apple, 'rock_cls': Rock}
+    if args.snakes > 1:
+        from arena import Arena
+        arena = Arena(
+            width=args.width,
+            height=args.height,
+            snakes=args.snakes,
+            apples=max(1, args.snakes // ARENA_SNAKES_PER_APPLE),
+            rocks=args.rocks,
+            seed=args.seed,
+            **classes,
+        )
+        for snake in arena.snakes[arena.players:]:
+            snake.body_color = BOT_SNAKE_COLOR
+        return arena
+    if args.save and os.path.exists(args.save):
+        from snapshot import load_state
+        with open(args.save, 'rb') as save:
+            return load_state(save.read(), **classes)
+    return GameState(
+        width=args.width,
+        height=args.height,
+        rocks=args.rocks,
+        seed=args.seed,
+        **classes,
+    )
+
+
+def run_game(game_state):
+    """
+    Runs the main game loop until the game is closed.
+
+    Frames are drawn at RENDER_FPS and input is read every frame, while
+    game ticks run at the game speed: time of frames is accumulated and
+    spent on as many ticks as fit into it. Between ticks the snake is
+    drawn interpolated. Frame rate and jitter are shown in the window
+    caption.
+
+    args:
+        game_state (GameState): game to play
+    returns:
+        None
+    """
+    snake = game_state.snake
+    profiler = game_state.profiler or NULL_PROFILER
+    frame_times = FrameTimeStats()
+    redraw_screen(game_state)
+    lag_ms = 0
+    caption_ms = 0
+    interpolate = False
+    frame_start = perf_counter_ns()
 
     while True:
-        if not is_paused:
-            clock.tick(game_speed)
+        profiler.start_frame(RENDER_FPS)
+        frame_ms = clock.tick(RENDER_FPS)
+        profiler.lap('wait')
+        now = perf_counter_ns()
+        frame_times.add(now - frame_start)
+        frame_start = now
+        caption_ms += frame_ms
+        if caption_ms >= CAPTION_UPDATE_MS:
+            pg.display.set_caption(
+                f'{CAPTION} ({game_counters(game_state)}, {frame_times})'
+            )
+            frame_times.reset()
+            caption_ms = 0
+
+        handle_keys(snake)
+        profiler.lap('input')
+        if is_paused:
+            profiler.end_frame()
+            continue
+
+        lag_ms += frame_ms
+        for _ in range(MAX_TICKS_PER_FRAME):
+            tick_ms = 1000 / game_state.speed
+            if lag_ms < tick_ms:
+                break
+            lag_ms -= tick_ms
+            interpolate = run_tick(game_state)
+        else:
+            lag_ms = min(lag_ms, 1000 / game_state.speed)
+        if interpolate:
+            snake.draw_interpolated(lag_ms * game_state.speed / 1000)
+            profiler.lap('draw')
 
-            snake.move()
+        update_display()
+        profiler.lap('display')
+        profiler.end_frame()
 
-            apple.update_life()
-            if rocks:
-                for rock in rocks:
-                    rock.update_life()
 
-            check_collision(snake)
-            check_collision(snake, apple)
-            if rocks:
-                for rock in rocks:
-                    check_collision(snake, rock)
+def game_counters(game_state):
+    """
+    Apples eaten in the current game and games played, over all
+    sessions if statistics are kept.
 
-            handle_keys(snake)
-            snake.update_direction()
+    args:
+        game_state (GameState | Arena): game being played
+    returns:
+        str: text for the window caption
+    """
+    if stats_store is not None:
+        games = stats_store.totals.games
+    else:
+        games = games_played
+    return f'яблоки: {game_state.snake.length - 1}, игры: {games}'
 
-            for obj in game_objects:
-                obj.draw()
 
-            pg.display.update()
-        else:
-            clock.tick(game_speed)
-            handle_keys(snake)
+def run_tick(game_state):
+    """
+    Advances a game by one tick and draws what changed. Steering of
+    the autopilot is measured as 'input' and drawing as 'draw', so
+    a frame with several ticks has every phase once per tick.
+
+    args:
+        game_state (GameState): game to advance
+    returns:
+        bool: False if the game is over and the snake has to be drawn
+            as is, True if it may be drawn interpolated
+    """
+    global games_played
+    profiler = game_state.profiler or NULL_PROFILER
+    if autopilot is not None:
+        autopilot.steer()
+        profiler.lap('input')
+    event = game_state.step()
+    game_over = event in GAME_OVER_EVENTS
+    if game_over:
+        games_played += 1
+    if death_tracker is not None:
+        death = death_tracker.update(event)
+        if death is not None:
+            stats_store.record(death)
+    if camera.follow(game_state.snake.get_head_position()) or game_over:
+        redraw_screen(game_state)
+    draw_objects(game_state)
+    profiler.lap('draw')
+    return not game_over
 
 
 if __name__ == '__main__':
-    main()
+    main(parse_args())
@@ -0,0 +1,201 @@
+"""
+Tournament runner
+=================
+Plays many seeded headless games over a process pool and streams
+results of every game as soon as it is finished.
+
+Usage:
+    python tournament.py --games 1000 --workers 8 --policy greedy
+
+Every game lasts until the snake dies (or fills the board) or until
+'--max-ticks' is reached. Output lines contain seed, score (apples eaten),
+length, ticks survived and cause of death, followed by totals and
+throughput in games and ticks per second.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter, namedtuple
+from multiprocessing import get_context
+from random import Random
+
+from autopilot import autopilot_policy
+from snake_core import (
+    APPLE_EATEN,
+    DIRECTIONS,
+    GAME_OVER_EVENTS,
+    GRID_HEIGHT,
+    GRID_WIDTH,
+    MAX_SEED,
+    ROCKS_GENERATED,
+    GameState,
+    greedy_direction,
+)
+
+# Максимальная длительность одной игры в тиках:
+MAX_TICKS = 100_000
+
+# Причина окончания игры, если змейка дожила до лимита тиков:
+TIMEOUT = 'timeout'
+
+GameResult = namedtuple(
+    'GameResult', ('seed', 'score', 'length', 'ticks', 'death')
+)
+
+
+def random_policy(game_state, rng):
+    """Turns to a random direction every few ticks."""
+    if rng.random() < 0.2:
+        return rng.choice(DIRECTIONS)
+    return None
+
+
+def greedy_policy(game_state, rng):
+    """
+    Heads towards the apple over the shortest wrapped distance,
+    avoiding cells that are taken right now.
+    """
+    snake = game_state.snake
+    return greedy_direction(
+        game_state.board,
+        snake.positions[0],
+        snake.direction,
+        game_state.apple.position,
+    )
+
+
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+    'autopilot': autopilot_policy,
+}
+
+
+def play_game(seed, policy='greedy', max_ticks=MAX_TICKS, **state_kwargs):
+    """
+    Plays a single headless game until the snake dies.
+
+    args:
+        seed (int): seed of the game and of the policy
+        policy (str): name of a policy in POLICIES
+        max_ticks (int): game is stopped after this amount of ticks
+        state_kwargs: arguments passed to GameState
+    returns:
+        GameResult
+    """
+    game_state = GameState(seed=seed, **state_kwargs)
+    choose_action = POLICIES[policy]
+    rng = Random(seed)
+    snake = game_state.snake
+    score = 0
+    death = TIMEOUT
+    while game_state.ticks < max_ticks:
+        length = snake.length
+        event = game_state.step(choose_action(game_state, rng))
+        if event == APPLE_EATEN:
+            score += 1
+        elif event in GAME_OVER_EVENTS:
+            death = event
+            break
+    else:
+        length = snake.length
+    return GameResult(seed, score, length, game_state.ticks, death)
+
+
+def _play_game(task):
+    seed, options = task
+    return play_game(seed, **options)
+
+
+def run_tournament(games, seed=0, workers=None, **options):
+    """
+    Plays games with seeds seed..seed+games-1 over a process pool.
+
+    args:
+        games (int): amount of games
+        seed (int): seed of the first game
+        workers (int | None): amount of processes, all cores by default
+        options: arguments passed to 'play_game'
+    yields:
+        GameResult: in order games are finished
+    """
+    tasks = [(seed + number, options) for number in range(games)]
+    workers = workers or os.cpu_count()
+    chunksize = max(1, games // (workers * 16))
+    # Workers are spawned rather than forked: a fork may inherit locks
+    # held by threads of a parent process (SDL, test runners) and hang.
+    with get_context('spawn').Pool(workers) as pool:
+        yield from pool.imap_unordered(_play_game, tasks, chunksize)
+
+
+def parse_args(argv=None):
+    """Parses command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Plays many headless Snake games over all CPU cores.'
+    )
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-ticks', type=int, default=MAX_TICKS)
+    parser.add_argument('--policy', choices=POLICIES, default='greedy')
+    parser.add_argument('--rocks', type=int, default=ROCKS_GENERATED)
+    parser.add_argument('--width', type=int, default=GRID_WIDTH)
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT)
+    parser.add_argument(
+        '--quiet', action='store_true', help='print totals only'
+    )
+    args = parser.parse_args(argv)
+    if args.games < 1:
+        parser.error('--games has to be at least 1')
+    if not 0 <= args.seed <= MAX_SEED - (args.games - 1):
+        parser.error(f'seeds of all games have to be from 0 to {MAX_SEED}')
+    return args
+
+
+def main(argv=None):
+    """Runs a tournament and prints results and throughput."""
+    args = parse_args(argv)
+    options = {
+        'policy': args.policy,
+        'max_ticks': args.max_ticks,
+        'rocks': args.rocks,
+        'width': args.width,
+        'height': args.height,
+    }
+    started = time.perf_counter()
+    total_ticks = 0
+    total_score = 0
+    best = None
+    deaths = Counter()
+    for result in run_tournament(
+        args.games, seed=args.seed, workers=args.workers, **options
+    ):
+        total_ticks += result.ticks
+        total_score += result.score
+        deaths[result.death] += 1
+        if best is None or result.score > best.score:
+            best = result
+        if not args.quiet:
+            print(
+                f'seed={result.seed} score={result.score} '
+                f'length={result.length} ticks={result.ticks} '
+                f'death={result.death}',
+                flush=True,
+            )
+    elapsed = time.perf_counter() - started
+
+    print(
+        f'games={args.games} mean_score={total_score / args.games:.2f} '
+        f'best_score={best.score} (seed {best.seed}) '
+        + ' '.join(f'{death}={count}' for death, count in deaths.items())
+    )
+    print(
+        f'elapsed={elapsed:.2f}s games/sec={args.games / elapsed:.1f} '
+        f'ticks/sec={total_ticks / elapsed:.0f}'
+    )
+
+
+if __name__ == '__main__':
+    sys.exit(main())